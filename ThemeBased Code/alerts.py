@@ -0,0 +1,204 @@
+import json
+import queue
+import threading
+import time
+import urllib.request
+
+try:
+    import winsound  # Windows only
+except ImportError:
+    winsound = None
+
+# Alert dispatcher settings
+ALERT_QUEUE_SIZE = 256  # Alerts waiting for delivery before new ones are dropped
+ALERT_MIN_INTERVAL = 2.0  # Seconds between two delivered alerts of one type from one camera
+ALERT_DEDUPE_WINDOW = 10.0  # Seconds an identical alert from the same camera is suppressed for
+ALERT_WEBHOOK_URL = None  # e.g. "http://localhost:5000/api/alerts/webhook" (the local stub in app.py); see set_webhook_url
+ALERT_WEBHOOK_TIMEOUT = 2.0  # Seconds before a webhook delivery is given up
+WEBHOOK_QUEUE_SIZE = 64  # Alerts waiting for the webhook before new ones are dropped
+ALERT_SOUND = True  # Play a sound on the server for every delivered alert
+SUBSCRIBER_QUEUE_SIZE = 100  # Alerts buffered per WebSocket subscriber before new ones are dropped
+
+def log_sink(alert):
+    print(f"ALERT [{alert['camera_id']}] {alert['alert_type']}: {alert['message']}")
+
+def sound_sink(alert):
+    """Play the system alert sound without waiting for it to finish."""
+    if winsound is not None:
+        winsound.PlaySound("SystemExclamation", winsound.SND_ALIAS | winsound.SND_ASYNC)
+    else:
+        # No sound API off Windows: ring the terminal bell
+        print("\a", end="", flush=True)
+
+class WebSocketSink:
+    """Fan alerts out to subscriber queues, one per connected WebSocket."""
+
+    def __init__(self):
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self.lock:
+            self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+
+    def __call__(self, alert):
+        message = {
+            "type": "detection",
+            "camera_id": alert["camera_id"],
+            "detection": alert["detection"],
+            "time": alert["time"]
+        }
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # A slow subscriber must not hold up the others
+                pass
+
+class WebhookSink:
+    """POST every alert as JSON to a URL from the sink's own thread.
+
+    Calling the sink only queues the alert, so a slow or unreachable receiver
+    never holds up the dispatcher or the other sinks. Set `url` to None to
+    stop posting.
+    """
+
+    def __init__(self, url, timeout=ALERT_WEBHOOK_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+        self.queue = queue.Queue(maxsize=WEBHOOK_QUEUE_SIZE)
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, name="alert-webhook", daemon=True)
+        self.thread.start()
+
+    def __call__(self, alert):
+        try:
+            self.queue.put_nowait(alert)
+        except queue.Full:
+            self.dropped += 1
+
+    def post(self, alert, url):
+        data = json.dumps(alert, default=str).encode()
+        request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def _run(self):
+        while True:
+            alert = self.queue.get()
+            url = self.url
+            if url is None:
+                continue
+            try:
+                self.post(alert, url)
+            except Exception as e:
+                print(f"Error delivering alert to webhook {url}: {str(e)}")
+
+class AlertDispatcher:
+    """Deliver alerts to sinks on a background thread.
+
+    push() only puts the alert on a bounded queue, so detectors never wait for
+    a sound, socket or webhook. The dispatcher thread drops alerts of a type
+    that arrive within ALERT_MIN_INTERVAL of the last one delivered for the
+    same camera, and identical messages within ALERT_DEDUPE_WINDOW, then calls
+    every sink. A failing sink is logged and does not affect the others.
+    """
+
+    def __init__(self, sinks=None, min_interval=ALERT_MIN_INTERVAL, dedupe_window=ALERT_DEDUPE_WINDOW):
+        self.sinks = list(sinks or [])
+        self.min_interval = min_interval
+        self.dedupe_window = dedupe_window
+        self.queue = queue.Queue(maxsize=ALERT_QUEUE_SIZE)
+        self.last_delivered = {}
+        self.last_messages = {}
+        self.thread = None
+        self.lock = threading.Lock()
+        # Alerts delivered, suppressed by rate limit/dedupe, and dropped on a full queue
+        self.delivered = 0
+        self.suppressed = 0
+        self.dropped = 0
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def push(self, camera_id, detection):
+        """Queue a detection for delivery; returns False if the queue was full."""
+        self._ensure_thread()
+        alert = {
+            "camera_id": camera_id,
+            "alert_type": detection.get("type"),
+            "message": detection.get("event"),
+            "detection": detection,
+            "time": time.time()
+        }
+        try:
+            self.queue.put_nowait(alert)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _ensure_thread(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+                self.thread.start()
+
+    def _should_deliver(self, alert):
+        key = (alert["camera_id"], alert["alert_type"])
+        last_time = self.last_delivered.get(key)
+        if last_time is not None and alert["time"] - last_time < self.min_interval:
+            return False
+        message_key = (alert["camera_id"], alert["message"])
+        last_time = self.last_messages.get(message_key)
+        if last_time is not None and alert["time"] - last_time < self.dedupe_window:
+            return False
+        self.last_delivered[key] = alert["time"]
+        self.last_messages[message_key] = alert["time"]
+        if len(self.last_messages) > 1000:
+            # Messages embed counts, so forget the ones outside the window
+            self.last_messages = {message: seen for message, seen in self.last_messages.items()
+                                  if alert["time"] - seen < self.dedupe_window}
+        return True
+
+    def _run(self):
+        while True:
+            alert = self.queue.get()
+            if not self._should_deliver(alert):
+                self.suppressed += 1
+                continue
+            self.delivered += 1
+            for sink in self.sinks:
+                try:
+                    sink(alert)
+                except Exception as e:
+                    print(f"Error delivering alert to {getattr(sink, '__name__', type(sink).__name__)}: {str(e)}")
+
+websocket_sink = WebSocketSink()
+alert_dispatcher = AlertDispatcher([log_sink, websocket_sink])
+if ALERT_SOUND:
+    alert_dispatcher.add_sink(sound_sink)
+webhook_sink = None
+_webhook_lock = threading.Lock()
+
+def set_webhook_url(url):
+    """POST alerts to `url` from now on; None stops the webhook."""
+    global webhook_sink
+    with _webhook_lock:
+        if webhook_sink is not None:
+            webhook_sink.url = url
+        elif url:
+            webhook_sink = WebhookSink(url)
+            alert_dispatcher.add_sink(webhook_sink)
+
+if ALERT_WEBHOOK_URL:
+    set_webhook_url(ALERT_WEBHOOK_URL)
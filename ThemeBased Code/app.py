@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, Response, stream_with_context
 from flask_cors import CORS
 import cv2
 import numpy as np
@@ -6,47 +6,63 @@ import base64
 from PIL import Image
 import io
 import os
-from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
-from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
-import pandas as pd
-import folium
 import uuid
 import time
-from datetime import datetime
-from video_processor import process_video_combined
-from live_camera_processor import process_live_camera, list_cameras
+from camera_discovery import get_cameras, refresh_cameras
+from latest_frame import LatestFrame
+from frame_decode import decode_frame, scale_box
+from alerts import alert_dispatcher, websocket_sink
+from model_registry import model_report, readiness, start_warm_up, WARMUP_MODELS
+from inference_server import USE_INFERENCE_SERVER
+from video_jobs import new_job_id, submit_job, get_job, cancel_job, list_jobs, resume_jobs, JOBS_DIR
 import json
 import threading
 import queue
 from flask_sock import Sock
+from werkzeug.utils import secure_filename
+from simple_websocket import ConnectionClosed
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})  # Enable CORS for all routes
 sock = Sock(app)
 
 # Create necessary directories
-for directory in ['static', 'uploads']:
+for directory in ['static', 'uploads', JOBS_DIR]:
     if not os.path.exists(directory):
         os.makedirs(directory)
         print(f"Created directory: {directory}")
 
-# Load the dataset once when the server starts
-try:
-    df = pd.read_csv("women-crimedataset-India.csv", encoding="latin1")
-    # Calculate TOTAL_CRIMES if not present
-    if "TOTAL_CRIMES" not in df.columns:
-        crime_columns = df.columns.tolist()[3:15]
-        df["TOTAL_CRIMES"] = df[crime_columns].sum(axis=1)
-except Exception as e:
-    print(f"Error loading dataset: {str(e)}")
-    df = None
+# The dataset is loaded once, by the warm-up or the first hotspot request
+crime_data = None
+crime_data_lock = threading.Lock()
+
+def get_crime_data():
+    """The crime dataset, loaded on first use; None if it could not be read."""
+    global crime_data
+    with crime_data_lock:
+        if crime_data is None:
+            import pandas as pd
+            try:
+                df = pd.read_csv("women-crimedataset-India.csv", encoding="latin1")
+                # Calculate TOTAL_CRIMES if not present
+                if "TOTAL_CRIMES" not in df.columns:
+                    crime_columns = df.columns.tolist()[3:15]
+                    df["TOTAL_CRIMES"] = df[crime_columns].sum(axis=1)
+                crime_data = df
+            except Exception as e:
+                print(f"Error loading dataset: {str(e)}")
+        return crime_data
 
 # Global variables for camera processing
 camera_thread = None
 frame_queue = queue.Queue(maxsize=10)
-stop_processing = False
-detection_results = []
+# Live camera sessions by session ID, one per /ws/camera connection
+live_sessions = {}
+live_sessions_lock = threading.Lock()
+LIVE_RECEIVE_TIMEOUT = 1.0  # Seconds the socket reader/inference loop wait before re-checking for stop
+LIVE_RATE_SMOOTHING = 0.1  # Weight of the newest frame in the moving average of processing time
+LIVE_FRAME_WIDTH = 640  # Width clients should send frames at; YOLO runs at 640 anyway
+LIVE_JPEG_QUALITY = 0.7  # JPEG quality clients should encode frames with (0-1)
 
 def base64_to_cv2(base64_string):
     """Convert base64 image to cv2 format"""
@@ -60,6 +76,8 @@ def base64_to_cv2(base64_string):
 
 def geocode_with_retry(location_name, max_retries=3, timeout=10):
     """Geocode location with retry logic"""
+    from geopy.geocoders import Nominatim
+    from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
     geolocator = Nominatim(user_agent="herwatch", timeout=timeout)
     
     for attempt in range(max_retries):
@@ -82,9 +100,19 @@ def health_check():
     """Health check endpoint to verify the API is running"""
     return jsonify({"status": "ok", "message": "API is running"}), 200
 
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: 200 once every model is loaded and warmed up, 503 until then."""
+    status = readiness()
+    return jsonify(status), 200 if status["ready"] else 503
+
 @app.route('/api/hotspots/analyze', methods=['POST'])
 def analyze_hotspots():
     try:
+        import pandas as pd
+        import folium
+        from geopy.distance import geodesic
+        df = get_crime_data()
         if df is None:
             return jsonify({"error": "Dataset not loaded"}), 500
 
@@ -189,8 +217,53 @@ def analyze_hotspots():
         print(f"Error in analyze_hotspots: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/analyze_video', methods=['POST'])
-def analyze_video():
+def upload_path(upload_id, filename):
+    """Where an uploaded video is saved: under uploads/, named after the upload's
+    ID plus the sanitized client file name, so names never collide or escape the folder."""
+    return os.path.join("uploads", f"{upload_id}_{secure_filename(filename) or 'video'}")
+
+def format_detection(detection):
+    """Shape a raw video detection record the way the frontend expects it."""
+    # Use the type field if available, otherwise determine from event message
+    detection_type = detection.get("type", "Lone Woman")
+    
+    # If type is not provided, determine from event message
+    if "type" not in detection:
+        if "SOS" in detection["event"] or "HELP" in detection["event"] or "DISTRESS" in detection["event"] or "EMERGENCY" in detection["event"]:
+            detection_type = "SOS Gesture"
+        elif "MORE MEN" in detection["event"]:
+            detection_type = "More Men"
+    
+    formatted_detection = {
+        "type": detection_type,
+        "confidence": 0.8,  # Default confidence
+        "frame": detection["frame"],
+        "timestamp": detection.get("timestamp"),  # Seconds into the video
+        "event": detection["event"]
+    }
+    
+    # Add additional data for More Men detection
+    if detection_type == "More Men" and "male_count" in detection and "female_count" in detection:
+        formatted_detection["male_count"] = detection["male_count"]
+        formatted_detection["female_count"] = detection["female_count"]
+    
+    # Add gesture type information for SOS Gesture detection
+    if detection_type == "SOS Gesture" and "gesture_type" in detection:
+        formatted_detection["gesture_type"] = detection["gesture_type"]
+        formatted_detection["gesture_description"] = detection.get("gesture_description", "")
+        if "person_box" in detection:
+            formatted_detection["person_box"] = detection["person_box"]
+            formatted_detection["track_id"] = detection.get("track_id")
+    
+    return formatted_detection
+
+@app.route('/analyze_video/stream', methods=['POST'])
+def analyze_video_stream():
+    """Analyze an uploaded video and stream detections as NDJSON while it runs.
+
+    Each line is a JSON object: `detection` lines as alerts fire (with the
+    progress so far), then one `complete` line with the totals.
+    """
     try:
         if 'video' not in request.files:
             return jsonify({"error": "No video file provided"}), 400
@@ -199,89 +272,225 @@ def analyze_video():
         if file.filename == '':
             return jsonify({"error": "No selected file"}), 400
             
-        # Get time from form data or use default
         time_str = request.form.get("time", "22:00")  # default to night
+        sample_fps = request.form.get("sample_fps", type=float)
         
-        # Save the file
-        file_path = os.path.join("uploads", file.filename)
+        file_path = upload_path(uuid.uuid4().hex, file.filename)
         file.save(file_path)
         print(f"Video saved to: {file_path}")
-        
+    except Exception as e:
+        print(f"Error in video stream upload: {str(e)}")
+        return jsonify({"error": f"Error in video analysis: {str(e)}"}), 500
+
+    def generate():
+        from video_processor import iter_video_detections
+        progress = {"frames_done": 0, "total_frames": 0}
+        counts = {"SOS Gesture": 0, "Lone Woman": 0, "More Men": 0}
+
+        def on_progress(frames_done, frames_total, new_detections):
+            progress["frames_done"] = frames_done
+            progress["total_frames"] = frames_total
+
+        detection_count = 0
+        for detection in iter_video_detections(file_path, time_str, sample_fps=sample_fps,
+                                               headless=True, progress_callback=on_progress):
+            formatted_detection = format_detection(detection)
+            detection_count += 1
+            counts[formatted_detection["type"]] = counts.get(formatted_detection["type"], 0) + 1
+            yield json.dumps({"type": "detection", "detection": formatted_detection, **progress}) + "\n"
+
+        print(f"Streamed {detection_count} detections for {file_path}")
+        yield json.dumps({
+            "type": "complete",
+            "total_frames": progress["frames_done"],
+            "sosDetections": counts["SOS Gesture"],
+            "loneWomanDetections": counts["Lone Woman"],
+            "moreMenDetections": counts["More Men"],
+            "detectionRate": detection_count / progress["frames_done"] if progress["frames_done"] else 0
+        }) + "\n"
+
+    def remove_upload():
+        # Runs when the response closes, also if the client disconnected mid-stream
         try:
-            # Process the video
-            results = process_video_combined(file_path, time_str)
-            print(f"Video analysis complete. Found {len(results)} detections")
+            os.remove(file_path)
+        except OSError as e:
+            print(f"Error removing {file_path}: {str(e)}")
+
+    response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    response.call_on_close(remove_upload)
+    return response
+
+@app.before_first_request
+def start_video_jobs():
+    """Pick up jobs left queued or running by a previous server process."""
+    try:
+        resume_jobs()
+    except Exception as e:
+        print(f"Error resuming video jobs: {str(e)}")
+
+@app.before_first_request
+def start_camera_discovery():
+    """Scan for local cameras in the background so the first list request is instant."""
+    refresh_cameras()
+
+def start_server_cameras():
+    """Start the server-side cameras listed in cameras.json, if any (run after warm-up)."""
+    try:
+        from camera_hub import camera_hub
+        started = camera_hub.load_config()
+        if started:
+            print(f"Started {started} server-side camera(s)")
+    except Exception as e:
+        print(f"Error starting server-side cameras: {str(e)}")
+
+def job_response(job):
+    """Shape a stored video job for the frontend."""
+    total_frames = job.get("total_frames") or 0
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "frames_done": job.get("frames_done", 0),
+        "total_frames": total_frames,
+        "progress": (job.get("frames_done", 0) / total_frames * 100) if total_frames else 0,
+        "cancel_requested": job.get("cancel_requested", False),
+        "error": job.get("error"),
+        "detections": [format_detection(detection) for detection in job.get("detections", [])]
+    }
+
+# /analyze_video used to analyze inside the request; it now queues a job like
+# /api/video/jobs (poll /api/video/jobs/<job_id>, or use /analyze_video/stream)
+@app.route('/analyze_video', methods=['POST'])
+@app.route('/api/video/jobs', methods=['POST'])
+def submit_video_job():
+    """Save an uploaded video and queue it for background analysis."""
+    try:
+        if 'video' not in request.files:
+            return jsonify({"error": "No video file provided"}), 400
             
-            # Format results for frontend
-            formatted_results = []
-            for detection in results:
-                # Use the type field if available, otherwise determine from event message
-                detection_type = detection.get("type", "Lone Woman")
-                
-                # If type is not provided, determine from event message
-                if "type" not in detection:
-                    if "SOS" in detection["event"] or "HELP" in detection["event"] or "DISTRESS" in detection["event"] or "EMERGENCY" in detection["event"]:
-                        detection_type = "SOS Gesture"
-                    elif "MORE MEN" in detection["event"]:
-                        detection_type = "More Men"
-                
-                formatted_detection = {
-                    "type": detection_type,
-                    "confidence": 0.8,  # Default confidence
-                    "frame": detection["frame"],
-                    "event": detection["event"]
-                }
-                
-                # Add additional data for More Men detection
-                if detection_type == "More Men" and "male_count" in detection and "female_count" in detection:
-                    formatted_detection["male_count"] = detection["male_count"]
-                    formatted_detection["female_count"] = detection["female_count"]
-                
-                # Add gesture type information for SOS Gesture detection
-                if detection_type == "SOS Gesture" and "gesture_type" in detection:
-                    formatted_detection["gesture_type"] = detection["gesture_type"]
-                    formatted_detection["gesture_description"] = detection.get("gesture_description", "")
-                
-                formatted_results.append(formatted_detection)
+        file = request.files['video']
+        if file.filename == '':
+            return jsonify({"error": "No selected file"}), 400
             
-            print(f"Formatted {len(formatted_results)} detections for frontend")
-            return jsonify({
-                "detections": formatted_results,
-                "total_frames": len(results)  # Approximate
-            })
-        except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            print(f"Error in video processing: {error_details}")
-            return jsonify({"error": f"Error processing video: {str(e)}"}), 500
+        time_str = request.form.get("time", "22:00")  # default to night
+        options = {}
+        sample_fps = request.form.get("sample_fps", type=float)
+        if sample_fps:
+            options["sample_fps"] = sample_fps
+        
+        # The job deletes its video once it reaches a final status
+        job_id = new_job_id()
+        file_path = upload_path(job_id, file.filename)
+        file.save(file_path)
+        print(f"Video saved to: {file_path}")
         
+        job = submit_job(job_id, file_path, time_str, options)
+        if job is None:
+            os.remove(file_path)
+            return jsonify({"error": "Too many videos are being analyzed, please retry later"}), 429
+        return jsonify({"job_id": job_id, "status": job["status"]}), 202
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Error in video analysis: {error_details}")
-        return jsonify({"error": f"Error in video analysis: {str(e)}"}), 500
+        print(f"Error submitting video job: {str(e)}")
+        return jsonify({"error": f"Error submitting video job: {str(e)}"}), 500
+
+@app.route('/api/video/jobs', methods=['GET'])
+def list_video_jobs():
+    """List known video jobs without their detections."""
+    try:
+        jobs = []
+        for job in list_jobs():
+            summary = job_response(job)
+            summary["detection_count"] = len(summary.pop("detections"))
+            jobs.append(summary)
+        return jsonify({"jobs": jobs})
+    except Exception as e:
+        print(f"Error listing video jobs: {str(e)}")
+        return jsonify({"error": "Failed to list video jobs"}), 500
+
+@app.route('/api/video/jobs/<job_id>', methods=['GET'])
+def video_job_status(job_id):
+    """Report progress and the detections found so far for one job."""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": f"Job not found: {job_id}"}), 404
+    return jsonify(job_response(job))
+
+@app.route('/api/video/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_video_job(job_id):
+    """Request cancellation of a queued or running job."""
+    try:
+        job = cancel_job(job_id)
+        if job is None:
+            return jsonify({"error": f"Job not found: {job_id}"}), 404
+        return jsonify({"job_id": job_id, "status": job["status"], "cancel_requested": job["cancel_requested"]})
+    except Exception as e:
+        print(f"Error cancelling video job {job_id}: {str(e)}")
+        return jsonify({"error": "Failed to cancel job"}), 500
+
+def receive_latest_frames(ws, latest):
+    """Socket reader thread: drain incoming frames so only the newest one waits."""
+    try:
+        while not latest.closed:
+            frame_data = ws.receive(timeout=LIVE_RECEIVE_TIMEOUT)
+            if frame_data is not None:
+                latest.put(frame_data)
+    except ConnectionClosed:
+        pass
+    except Exception as e:
+        print(f"Error reading camera frames: {str(e)}")
+    finally:
+        latest.close()
 
 @sock.route('/ws/camera')
 def camera_websocket(ws):
-    global stop_processing, detection_results
+    # Each connection gets its own cooldowns, tracks and MediaPipe graphs.
+    # Clients may ask for a per-frame latency target with ?latency_ms=
+    from live_camera_processor import LiveCameraSession
+    latency_ms = request.args.get('latency_ms', type=float)
+    if latency_ms and latency_ms > 0:
+        session = LiveCameraSession(latency_budget=latency_ms / 1000.0)
+    else:
+        session = LiveCameraSession()
+    with live_sessions_lock:
+        live_sessions[session.session_id] = session
+    print(f"Live camera session {session.session_id} started ({len(live_sessions)} active)")
+    detection_results = session.detections
+    frame_count = 0
+    # Frames are read on their own thread; when inference is slower than the
+    # client sends, older frames are dropped instead of queueing up
+    latest = LatestFrame()
+    reader = threading.Thread(target=receive_latest_frames, args=(ws, latest), daemon=True)
+    avg_frame_time = None
     
     try:
-        stop_processing = False
-        detection_results = []
-        frame_count = 0
         start_time = time.time()
+        # Tell the client the frame size and quality worth sending
+        ws.send(json.dumps({
+            'type': 'session',
+            'session_id': session.session_id,
+            'frame_width': LIVE_FRAME_WIDTH,
+            'jpeg_quality': LIVE_JPEG_QUALITY
+        }))
+        reader.start()
         
-        while not stop_processing:
+        while not session.stop_requested:
             try:
-                # Receive frame data from client
-                frame_data = ws.receive()
+                frame_data = latest.get(timeout=LIVE_RECEIVE_TIMEOUT)
                 if frame_data is None:
+                    if latest.closed:
+                        break
                     continue
                     
                 frame_count += 1
+                session.frame_count = frame_count
                 
                 # Process frame
-                detections = process_frame(frame_data)
+                frame_start = time.time()
+                detections = process_frame(frame_data, session)
+                frame_time = time.time() - frame_start
+                if avg_frame_time is None:
+                    avg_frame_time = frame_time
+                else:
+                    avg_frame_time += LIVE_RATE_SMOOTHING * (frame_time - avg_frame_time)
                 
                 if detections:
                     # Send detection results back to client
@@ -292,16 +501,25 @@ def camera_websocket(ws):
                         }))
                         detection_results.append(detection)
                 
-                # Send progress update every 10 frames
+                # Send progress update every 10 frames, with the rate the client should send at
                 if frame_count % 10 == 0:
                     elapsed_time = time.time() - start_time
                     fps = frame_count / elapsed_time if elapsed_time > 0 else 0
                     ws.send(json.dumps({
                         'type': 'progress',
                         'frame_count': frame_count,
-                        'fps': fps
+                        'fps': fps,
+                        'received_frames': latest.received,
+                        'dropped_frames': latest.dropped,
+                        'sustainable_fps': 1.0 / avg_frame_time if avg_frame_time else None,
+                        'gated_frames': session.motion_gate.frames_gated if session.motion_gate else 0,
+                        'detect_interval': session.scheduler.detect_interval,
+                        'gesture_interval': session.scheduler.gesture_interval
                     }))
                     
+            except ConnectionClosed:
+                # Client went away: end the session instead of spinning on receive()
+                break
             except Exception as e:
                 print(f"Error in WebSocket loop: {str(e)}")
                 continue
@@ -309,6 +527,7 @@ def camera_websocket(ws):
     except Exception as e:
         print(f"WebSocket error: {str(e)}")
     finally:
+        latest.close()
         # Send final results
         try:
             ws.send(json.dumps({
@@ -317,19 +536,33 @@ def camera_websocket(ws):
                 'sosDetections': len([d for d in detection_results if d['type'] == 'SOS Gesture']),
                 'loneWomanDetections': len([d for d in detection_results if d['type'] == 'Lone Woman']),
                 'moreMenDetections': len([d for d in detection_results if d['type'] == 'More Men']),
-                'detectionRate': len(detection_results) / frame_count if frame_count > 0 else 0
+                'detectionRate': len(detection_results) / frame_count if frame_count > 0 else 0,
+                'droppedFrames': latest.dropped
             }))
         except:
             pass
+        with live_sessions_lock:
+            live_sessions.pop(session.session_id, None)
+        session.close()
+        print(f"Live camera session {session.session_id} ended after {frame_count} frames "
+              f"({latest.dropped} of {latest.received} received frames dropped)")
 
 @app.route('/api/live-camera/list', methods=['GET'])
 def list_available_cameras():
-    """List all available cameras."""
+    """List all available cameras from the discovery cache.
+
+    Never waits for a scan: a stale or missing cache starts one in the
+    background, and `scanning` tells the client to ask again.
+    """
     try:
-        cameras = list_cameras()
+        discovered = get_cameras()
+        cameras = [device["index"] for device in discovered["devices"]]
         return jsonify({
             "cameras": cameras,
-            "default": 0 if cameras else None
+            "default": cameras[0] if cameras else None,
+            "devices": discovered["devices"],
+            "scanned_at": discovered["scanned_at"],
+            "scanning": discovered["scanning"]
         })
     except Exception as e:
         print(f"Error listing cameras: {str(e)}")
@@ -337,15 +570,99 @@ def list_available_cameras():
 
 @app.route('/api/live-camera/stop', methods=['POST'])
 def stop_live_camera():
-    """Stop the live camera processing."""
-    global stop_processing
+    """Stop the live camera session given as `session_id` in the JSON body."""
     try:
-        stop_processing = True
-        return jsonify({"message": "Camera processing stopped"})
+        session_id = (request.get_json(silent=True) or {}).get("session_id")
+        if not session_id:
+            return jsonify({"error": "session_id is required"}), 400
+        with live_sessions_lock:
+            session = live_sessions.get(session_id)
+        if session is None:
+            return jsonify({"error": f"Unknown session: {session_id}"}), 404
+        session.stop_requested = True
+        return jsonify({"message": "Camera processing stopped", "session_id": session_id})
     except Exception as e:
         print(f"Error stopping camera: {str(e)}")
         return jsonify({"error": "Failed to stop camera"}), 500
 
+@app.route('/api/cameras', methods=['GET'])
+def list_server_cameras():
+    """List the server-side cameras and their capture/inference counters."""
+    try:
+        from camera_hub import camera_hub
+        return jsonify({"cameras": camera_hub.list_cameras()})
+    except Exception as e:
+        print(f"Error listing server cameras: {str(e)}")
+        return jsonify({"error": "Failed to list server cameras"}), 500
+
+@app.route('/api/cameras', methods=['POST'])
+def add_server_camera():
+    """Start analyzing a device index, RTSP URL or video file on the server."""
+    try:
+        data = request.get_json(silent=True) or {}
+        source = data.get("source")
+        if source is None or source == "":
+            return jsonify({"error": "No camera source provided"}), 400
+        from camera_hub import camera_hub
+        worker = camera_hub.add_camera(source, data.get("camera_id"))
+        if worker is None:
+            return jsonify({"error": f"Camera {data.get('camera_id')} already exists"}), 409
+        return jsonify(worker.describe()), 201
+    except Exception as e:
+        print(f"Error adding server camera: {str(e)}")
+        return jsonify({"error": "Failed to add camera"}), 500
+
+@app.route('/api/cameras/<camera_id>', methods=['DELETE'])
+def remove_server_camera(camera_id):
+    try:
+        from camera_hub import camera_hub
+        worker = camera_hub.remove_camera(camera_id)
+        if worker is None:
+            return jsonify({"error": "Camera not found"}), 404
+        return jsonify({"message": f"Camera {camera_id} stopped"})
+    except Exception as e:
+        print(f"Error removing server camera: {str(e)}")
+        return jsonify({"error": "Failed to remove camera"}), 500
+
+@sock.route('/ws/cameras/alerts')
+def camera_alerts_websocket(ws):
+    """Push every delivered alert (server-side cameras and browser sessions) as it happens."""
+    subscriber = websocket_sink.subscribe()
+    try:
+        while ws.connected:
+            try:
+                message = subscriber.get(timeout=LIVE_RECEIVE_TIMEOUT)
+            except queue.Empty:
+                continue
+            ws.send(json.dumps(message))
+    except ConnectionClosed:
+        pass
+    except Exception as e:
+        print(f"Camera alerts WebSocket error: {str(e)}")
+    finally:
+        websocket_sink.unsubscribe(subscriber)
+
+@app.route('/api/alerts/stats', methods=['GET'])
+def alert_stats():
+    return jsonify({
+        "delivered": alert_dispatcher.delivered,
+        "suppressed": alert_dispatcher.suppressed,
+        "dropped": alert_dispatcher.dropped,
+        "queued": alert_dispatcher.queue.qsize()
+    })
+
+@app.route('/api/models', methods=['GET'])
+def loaded_models():
+    """Models loaded in this process with their memory use."""
+    return jsonify(model_report())
+
+@app.route('/api/alerts/webhook', methods=['POST'])
+def alert_webhook_stub():
+    """Local stand-in for an alert webhook receiver; enable it with alerts.set_webhook_url(<this URL>)."""
+    alert = request.get_json(silent=True) or {}
+    print(f"Webhook stub received alert from {alert.get('camera_id')}: {alert.get('message')}")
+    return jsonify({"received": True})
+
 @app.route('/static/<path:filename>')
 def serve_static(filename):
     """Serve static files from the static directory"""
@@ -373,21 +690,55 @@ def index():
         print(f"Error serving index.html: {str(e)}")
         return jsonify({"error": "Index file not found"}), 404
 
-def process_frame(frame_data):
+def process_frame(frame_data, session=None):
     try:
-        # Convert base64 to image
-        nparr = np.frombuffer(frame_data, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        # Frames larger than needed are decoded straight to a reduced size
+        frame, scale = decode_frame(frame_data, LIVE_FRAME_WIDTH)
         
         if frame is None:
             return None
             
-        # Process frame using video_processor
-        detections = process_live_camera(frame)
-        return detections
+        # Process frame using live_camera_processor
+        from live_camera_processor import process_live_camera
+        detections = process_live_camera(frame, session)
+        # Report person boxes in the coordinates of the frame the client sent. The
+        # detections were also handed to the alert dispatcher, so scale copies
+        return [
+            dict(detection, person_box=scale_box(detection["person_box"], scale))
+            if "person_box" in detection else detection
+            for detection in detections
+        ]
     except Exception as e:
         print(f"Error processing frame: {str(e)}")
         return None
 
+def load_processors():
+    """Import the processors (torch, ultralytics, MediaPipe) and load the crime dataset."""
+    import video_processor
+    import live_camera_processor
+    import camera_hub
+    get_crime_data()
+
+def start_background_services():
+    """Load and warm up the models in the background, then start the server cameras.
+
+    The server already answers /api/health meanwhile; /api/ready reports when
+    the warm-up is done. Only the process that serves requests may call this
+    (it runs once per process): importing app.py never starts it, so spawned
+    worker processes and the debug reloader's watcher stay light.
+    """
+    start_warm_up(() if USE_INFERENCE_SERVER else WARMUP_MODELS, prepare=load_processors, after=start_server_cameras)
+
+@app.before_first_request
+def start_background_services_on_request():
+    """Under a WSGI server, start the warm-up with the first request (usually a probe)."""
+    start_background_services()
+
+def run_server():
+    # With the debug reloader only the serving child (WERKZEUG_RUN_MAIN) warms up
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background_services()
+    app.run(host='0.0.0.0', port=5000, debug=True)
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    run_server()
\ No newline at end of file
@@ -0,0 +1,195 @@
+import glob
+import os
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import cv2
+
+try:
+    import fcntl  # Only available on Linux/macOS, used for the V4L2 capability query
+except ImportError:
+    fcntl = None
+
+# Camera discovery settings
+CAMERA_SCAN_INDICES = 10  # Device indices probed on platforms without a device listing
+CAMERA_PROBE_TIMEOUT = 3.0  # Seconds a single device probe may take before it is given up
+CAMERA_PROBE_WORKERS = 4  # Devices probed at the same time
+CAMERA_CACHE_TTL = 60.0  # Seconds before a request triggers a background re-scan
+
+# V4L2 VIDIOC_QUERYCAP: struct v4l2_capability is 104 bytes
+VIDIOC_QUERYCAP = 0x80685600
+V4L2_CAP_VIDEO_CAPTURE = 0x00000001
+V4L2_CAP_VIDEO_CAPTURE_MPLANE = 0x00001000
+V4L2_CAP_DEVICE_CAPS = 0x80000000
+
+_cache = {"devices": [], "scanned_at": None, "duration": None}
+_cache_lock = threading.Lock()
+_scan_thread = None
+
+def _read_sysfs(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def query_v4l2_device(path):
+    """Return (card name, bus info) if `path` is a V4L2 video capture node, else None."""
+    if fcntl is None:
+        return None
+    fd = None
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+        buffer = bytearray(104)
+        fcntl.ioctl(fd, VIDIOC_QUERYCAP, buffer)
+    except OSError:
+        return None
+    finally:
+        if fd is not None:
+            os.close(fd)
+    card = bytes(buffer[16:48]).split(b"\0", 1)[0].decode(errors="replace")
+    bus_info = bytes(buffer[48:80]).split(b"\0", 1)[0].decode(errors="replace")
+    capabilities, device_caps = struct.unpack_from("<II", buffer, 84)
+    # Metadata nodes of the same camera share the driver capabilities but not the device caps
+    caps = device_caps if capabilities & V4L2_CAP_DEVICE_CAPS else capabilities
+    if not caps & (V4L2_CAP_VIDEO_CAPTURE | V4L2_CAP_VIDEO_CAPTURE_MPLANE):
+        return None
+    return card, bus_info
+
+def list_v4l2_cameras():
+    """Capture devices from /dev/video*, one per physical camera, without opening a stream."""
+    cameras = []
+    seen = set()
+    indices = sorted(int(path[len("/dev/video"):]) for path in glob.glob("/dev/video*")
+                     if path[len("/dev/video"):].isdigit())
+    for index in indices:
+        path = f"/dev/video{index}"
+        info = query_v4l2_device(path)
+        if info is None:
+            continue
+        card, bus_info = info
+        name = _read_sysfs(f"/sys/class/video4linux/video{index}/name") or card
+        # A physical camera is identified by its bus position, falling back to the sysfs device
+        device_key = bus_info or os.path.realpath(f"/sys/class/video4linux/video{index}/device")
+        if device_key in seen:
+            continue
+        seen.add(device_key)
+        cameras.append({"index": index, "name": name, "backend": "V4L2", "path": path})
+    return cameras
+
+def probe_backends():
+    if sys.platform.startswith("win"):
+        return [(cv2.CAP_DSHOW, "DSHOW"), (cv2.CAP_MSMF, "MSMF")]
+    if sys.platform == "darwin":
+        return [(cv2.CAP_AVFOUNDATION, "AVFOUNDATION")]
+    return [(cv2.CAP_ANY, "ANY")]
+
+def probe_camera(index, backend):
+    """Open a device index with one backend and read a frame; True if it works."""
+    cap = cv2.VideoCapture(index, backend)
+    try:
+        if not cap.isOpened():
+            return False
+        ret, frame = cap.read()
+        return ret and frame is not None
+    except Exception as e:
+        print(f"Error checking camera {index} with backend {backend}: {str(e)}")
+        return False
+    finally:
+        cap.release()
+
+def _timed_probe(started, index, backend):
+    started[index] = time.time()
+    return probe_camera(index, backend)
+
+def _probe_backend(indices, backend, backend_name):
+    """Indices that work with one backend, each probe getting CAMERA_PROBE_TIMEOUT from its own start."""
+    working = []
+    started = {}
+    abandoned = []
+    executor = ThreadPoolExecutor(max_workers=CAMERA_PROBE_WORKERS)
+    try:
+        futures = {executor.submit(_timed_probe, started, index, backend): index for index in indices}
+        pending = set(futures)
+        while pending:
+            done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                if not future.exception() and future.result():
+                    working.append(futures[future])
+            now = time.time()
+            for future in list(pending):
+                index = futures[future]
+                if index in started and now - started[index] > CAMERA_PROBE_TIMEOUT:
+                    pending.discard(future)
+                    abandoned.append(future)
+                    print(f"Camera {index} ({backend_name}) did not answer within {CAMERA_PROBE_TIMEOUT}s")
+            if pending and sum(not future.done() for future in abandoned) >= CAMERA_PROBE_WORKERS:
+                # Every worker is stuck on a dead device, so the queued probes would never start
+                print(f"Skipping cameras {sorted(futures[future] for future in pending)} ({backend_name}): "
+                      f"all probe workers are stuck")
+                break
+    finally:
+        # Hung probes are left to finish on their own; probes that never started are dropped
+        executor.shutdown(wait=False, cancel_futures=True)
+    return working
+
+def probe_cameras():
+    """Probe device indices in parallel, each backend once, giving up on slow devices.
+
+    A device found by several backends is only reported once, under the first.
+    """
+    found = {}
+    for backend, backend_name in probe_backends():
+        indices = [index for index in range(CAMERA_SCAN_INDICES) if index not in found]
+        for index in _probe_backend(indices, backend, backend_name):
+            found[index] = {"index": index, "name": f"Camera {index}",
+                            "backend": backend_name, "path": None}
+    return [found[index] for index in sorted(found)]
+
+def scan_cameras():
+    """Discover the cameras now and store them in the cache."""
+    start = time.time()
+    print("Scanning for available cameras...")
+    try:
+        if sys.platform.startswith("linux") and fcntl is not None and glob.glob("/dev/video*"):
+            devices = list_v4l2_cameras()
+        else:
+            devices = probe_cameras()
+    except Exception as e:
+        print(f"Error scanning cameras: {str(e)}")
+        devices = None
+    with _cache_lock:
+        if devices is not None:
+            _cache["devices"] = devices
+        _cache["scanned_at"] = time.time()
+        _cache["duration"] = time.time() - start
+    print(f"Found {len(devices or [])} available cameras in {time.time() - start:.2f}s: "
+          f"{[device['index'] for device in devices or []]}")
+    return devices
+
+def refresh_cameras():
+    """Start a background scan unless one is already running."""
+    global _scan_thread
+    with _cache_lock:
+        if _scan_thread is not None and _scan_thread.is_alive():
+            return False
+        _scan_thread = threading.Thread(target=scan_cameras, name="camera-discovery", daemon=True)
+        _scan_thread.start()
+        return True
+
+def get_cameras():
+    """Return the cached camera list immediately, re-scanning in the background when stale.
+
+    Returns a dict with `devices`, `scanned_at` (None before the first scan
+    finished), `duration` of the last scan and whether a scan is `scanning`.
+    """
+    with _cache_lock:
+        stale = _cache["scanned_at"] is None or time.time() - _cache["scanned_at"] > CAMERA_CACHE_TTL
+        snapshot = dict(_cache, devices=list(_cache["devices"]))
+    if stale:
+        refresh_cameras()
+    snapshot["scanning"] = _scan_thread is not None and _scan_thread.is_alive()
+    return snapshot
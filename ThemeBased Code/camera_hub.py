@@ -0,0 +1,246 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+from latest_frame import LatestFrame
+from live_camera_processor import (LiveCameraSession, model_pool, start_live_frame,
+                                   detect_people_batch, finish_live_frame)
+
+# Camera hub settings
+CAMERAS_CONFIG = "cameras.json"  # Cameras started with the server: [{"camera_id": ..., "source": ...}]
+HUB_MAX_BATCH = 12  # Most frames (one per camera) sent to YOLO in one call
+HUB_RULE_WORKERS = 4  # Threads applying the alert rules and gestures per camera
+HUB_WAIT_TIMEOUT = 1.0  # Seconds the scheduler waits for a new frame before re-checking
+CAPTURE_RETRY_DELAY = 5.0  # Seconds before a capture worker reopens a failed source
+
+def parse_source(source):
+    """Device indices may be given as strings; URLs and file paths stay as they are."""
+    if isinstance(source, str) and source.strip().isdigit():
+        return int(source)
+    return source
+
+class CameraWorker:
+    """Capture thread for one server-side camera.
+
+    Reads a local device, RTSP stream or video file as fast as it delivers
+    frames and keeps only the newest one in `latest` for the hub's scheduler.
+    Streams and devices are reopened after CAPTURE_RETRY_DELAY when they fail;
+    files are played at their own frame rate and end the worker when done.
+    """
+
+    def __init__(self, camera_id, source, frame_ready):
+        self.camera_id = camera_id
+        self.source = parse_source(source)
+        self.frame_ready = frame_ready
+        self.latest = LatestFrame()
+        self.session = LiveCameraSession(camera_id)
+        self.status = "starting"
+        self.error = None
+        self.frames_processed = 0
+        self.detection_count = 0
+        # Held while the hub applies the rules, so the session is never closed under them
+        self.session_lock = threading.Lock()
+        self.session_closed = False
+        self.thread = threading.Thread(target=self._run, name=f"camera-{camera_id}", daemon=True)
+
+    @property
+    def is_file(self):
+        return isinstance(self.source, str) and os.path.isfile(self.source)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.session.stop_requested = True
+        self.latest.close()
+
+    def _run(self):
+        while not self.session.stop_requested:
+            cap = cv2.VideoCapture(self.source)
+            if not cap.isOpened():
+                self.status = "unavailable"
+                self.error = f"Could not open {self.source}"
+                print(f"Camera {self.camera_id}: {self.error}, retrying in {CAPTURE_RETRY_DELAY}s")
+                cap.release()
+                time.sleep(CAPTURE_RETRY_DELAY)
+                continue
+
+            self.status = "running"
+            self.error = None
+            print(f"Camera {self.camera_id}: capturing from {self.source}")
+            fps = cap.get(cv2.CAP_PROP_FPS) or 0
+            frame_delay = 1.0 / fps if self.is_file and fps > 0 else 0
+            try:
+                while not self.session.stop_requested:
+                    start = time.time()
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    self.latest.put(frame)
+                    self.frame_ready.set()
+                    if frame_delay:
+                        time.sleep(max(0.0, frame_delay - (time.time() - start)))
+            except Exception as e:
+                print(f"Camera {self.camera_id}: capture error: {str(e)}")
+            finally:
+                cap.release()
+
+            if self.is_file:
+                self.status = "ended"
+                break
+            if not self.session.stop_requested:
+                self.status = "reconnecting"
+                print(f"Camera {self.camera_id}: stream lost, reconnecting in {CAPTURE_RETRY_DELAY}s")
+                time.sleep(CAPTURE_RETRY_DELAY)
+        if self.status != "ended":
+            self.status = "stopped"
+        self.latest.close()
+        self.close_session()
+
+    def close_session(self):
+        """Close the session once the hub is done with any frame still in flight."""
+        with self.session_lock:
+            self.session_closed = True
+            self.session.close()
+
+    def describe(self):
+        return {
+            "camera_id": self.camera_id,
+            "source": self.source,
+            "status": self.status,
+            "error": self.error,
+            "frames_received": self.latest.received,
+            "frames_dropped": self.latest.dropped,
+            "frames_processed": self.frames_processed,
+            "frames_gated": self.session.motion_gate.frames_gated if self.session.motion_gate else 0,
+            "detect_interval": self.session.scheduler.detect_interval,
+            "detections": self.detection_count
+        }
+
+class CameraHub:
+    """Server-owned cameras analyzed by one shared scheduler.
+
+    Each CameraWorker captures frames on its own thread. The scheduler thread
+    takes the newest frame from every camera that has one, runs YOLO and the
+    gender model on all frames that need detection in one batched call, then
+    applies each camera's alert rules and gestures (in parallel, since every
+    camera has its own LiveCameraSession). Detections go to the alert
+    dispatcher under the camera's ID.
+    """
+
+    def __init__(self):
+        self.cameras = {}
+        self.lock = threading.Lock()
+        self.frame_ready = threading.Event()
+        self.thread = None
+        self.rule_executor = ThreadPoolExecutor(max_workers=HUB_RULE_WORKERS)
+        self.batches = 0
+
+    def add_camera(self, source, camera_id=None):
+        camera_id = camera_id or uuid.uuid4().hex[:8]
+        with self.lock:
+            if camera_id in self.cameras:
+                return None
+            worker = CameraWorker(camera_id, source, self.frame_ready)
+            self.cameras[camera_id] = worker
+        worker.start()
+        self._ensure_scheduler()
+        print(f"Added camera {camera_id} ({source})")
+        return worker
+
+    def remove_camera(self, camera_id):
+        with self.lock:
+            worker = self.cameras.pop(camera_id, None)
+        if worker:
+            worker.stop()
+            print(f"Removed camera {camera_id}")
+        return worker
+
+    def list_cameras(self):
+        with self.lock:
+            return [worker.describe() for worker in self.cameras.values()]
+
+    def load_config(self, path=CAMERAS_CONFIG):
+        """Start the cameras listed in the config file, if it exists."""
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path) as f:
+                cameras = json.load(f)
+        except Exception as e:
+            print(f"Error reading camera config {path}: {str(e)}")
+            return 0
+        for camera in cameras:
+            self.add_camera(camera["source"], camera.get("camera_id"))
+        return len(cameras)
+
+    def _ensure_scheduler(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._schedule, name="camera-hub", daemon=True)
+                self.thread.start()
+
+    def _collect_frames(self):
+        """Newest frame of every camera that has one, with its stage plan."""
+        with self.lock:
+            workers = list(self.cameras.values())
+        items = []
+        for worker in workers:
+            frame = worker.latest.get(timeout=0)
+            if frame is None:
+                continue
+            plan = start_live_frame(frame, worker.session)
+            if plan is not None:
+                items.append((worker, frame, plan))
+        return items
+
+    def _finish(self, item):
+        worker, frame, plan, people = item
+        with worker.session_lock:
+            if worker.session_closed:
+                return
+            try:
+                detections = finish_live_frame(frame, worker.session, plan, people)
+            except Exception as e:
+                print(f"Camera {worker.camera_id}: error applying rules: {str(e)}")
+                return
+        worker.frames_processed += 1
+        worker.detection_count += len(detections)
+
+    def _schedule(self):
+        while True:
+            self.frame_ready.wait(HUB_WAIT_TIMEOUT)
+            self.frame_ready.clear()
+            with self.lock:
+                if not self.cameras:
+                    # Cleared under the lock, so the next add_camera starts a new scheduler
+                    self.thread = None
+                    break
+            items = self._collect_frames()
+            if not items:
+                continue
+
+            people_by_camera = {}
+            detect_items = [item for item in items if item[2]["detect"]]
+            for start in range(0, len(detect_items), HUB_MAX_BATCH):
+                batch = detect_items[start:start + HUB_MAX_BATCH]
+                try:
+                    with model_pool.checkout() as model:
+                        batch_people = detect_people_batch(
+                            [frame for _, frame, _ in batch], [worker.session for worker, _, _ in batch], model)
+                except Exception as e:
+                    print(f"Error running batched camera inference: {str(e)}")
+                    batch_people = [[] for _ in batch]
+                for (worker, _, _), people in zip(batch, batch_people):
+                    people_by_camera[worker.camera_id] = people
+                self.batches += 1
+
+            list(self.rule_executor.map(self._finish, [
+                (worker, frame, plan, people_by_camera.get(worker.camera_id, []))
+                for worker, frame, plan in items
+            ]))
+
+camera_hub = CameraHub()
@@ -0,0 +1,64 @@
+import struct
+import cv2
+import numpy as np
+
+# Reduced decode modes by scale factor, largest reduction first
+REDUCED_MODES = [
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2)
+]
+
+# JPEG start-of-frame markers (baseline, progressive, ...) carry the image size
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def jpeg_size(data):
+    """(width, height) from a JPEG's frame header without decoding it, or None."""
+    data = bytes(data[:65536]) if len(data) > 65536 else bytes(data)
+    if data[:2] != b"\xff\xd8":
+        return None
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            pos += 1
+            continue
+        length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+        if marker in _SOF_MARKERS:
+            if pos + 9 > len(data):
+                return None
+            height, width = struct.unpack(">HH", data[pos + 5:pos + 9])
+            return width, height
+        pos += 2 + length
+    return None
+
+def decode_frame(data, target_width=None):
+    """Decode image bytes, at reduced scale when the image is much wider than needed.
+
+    JPEGs at least twice `target_width` wide are decoded with the largest
+    IMREAD_REDUCED_* mode that keeps them at or above `target_width`, which
+    skips most of the decode work. Returns (frame, scale) where `scale`
+    multiplies frame coordinates back to the original image, or (None, 1) if
+    the data could not be decoded.
+    """
+    buffer = np.frombuffer(data, np.uint8)
+    scale, mode = 1, cv2.IMREAD_COLOR
+    size = jpeg_size(data) if target_width else None
+    if size:
+        for factor, reduced_mode in REDUCED_MODES:
+            if size[0] // factor >= target_width:
+                scale, mode = factor, reduced_mode
+                break
+    frame = cv2.imdecode(buffer, mode)
+    if frame is None:
+        return None, 1
+    return frame, scale
+
+def scale_box(box, scale):
+    """Map an (x1, y1, x2, y2) box from a reduced decode back to original pixels."""
+    if scale == 1:
+        return list(box)
+    return [int(value * scale) for value in box]
@@ -0,0 +1,199 @@
+import argparse
+import hashlib
+import os
+import time
+import cv2
+import numpy as np
+import torch
+import torchvision.models as models
+from torch.ao import quantization
+from torchvision.models import quantization as quantizable_models
+from inference_backend import EXPORT_CACHE_DIR
+from model_registry import model_memory_mb
+from person_detection import GENDER_INPUT_SIZE, crops_to_tensor, gender_decision, gender_label
+
+# Gender model quantization settings
+GENDER_QUANTIZATION = None  # None for the FP32 model, "dynamic" or "static" for an INT8 model
+CALIBRATION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calibration_crops")
+CALIBRATION_LIMIT = 200  # Most crops used to calibrate the static model
+CALIBRATION_BATCH = 16
+ALERT_THRESHOLDS = (0.1, 0.6)  # GENDER_CONFIDENCE_THRESHOLD of the live and video processors
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+def quantization_engine():
+    """Best quantized kernel set this CPU supports."""
+    for engine in ("x86", "fbgemm", "qnnpack"):
+        if engine in torch.backends.quantized.supported_engines:
+            return engine
+    return torch.backends.quantized.engine
+
+def load_crops(folder, limit=None):
+    """(names, BGR images) of the crops in a folder, sorted by file name."""
+    names, crops = [], []
+    for name in sorted(os.listdir(folder)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        image = cv2.imread(os.path.join(folder, name))
+        if image is None:
+            print(f"Skipping unreadable crop {name}")
+            continue
+        names.append(name)
+        crops.append(image)
+        if limit and len(crops) >= limit:
+            break
+    return names, crops
+
+def build_fp32_model():
+    model = models.mobilenet_v2(pretrained=True)
+    model.eval()
+    return model
+
+def quantize_dynamic(model):
+    """INT8 weights for the Linear layers, activations quantized on the fly. Needs no calibration."""
+    return quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def quantize_static(calibration_dir=CALIBRATION_DIR, limit=CALIBRATION_LIMIT):
+    """Fully INT8 MobileNetV2 with activation ranges calibrated on local crops."""
+    _, crops = load_crops(calibration_dir, limit)
+    if not crops:
+        raise ValueError(f"No calibration crops found in {calibration_dir}")
+    engine = quantization_engine()
+    torch.backends.quantized.engine = engine
+    # Same ImageNet weights as models.mobilenet_v2, with quant stubs and fusable blocks
+    model = quantizable_models.mobilenet_v2(pretrained=True, quantize=False)
+    model.eval()
+    model.fuse_model()
+    model.qconfig = quantization.get_default_qconfig(engine)
+    quantization.prepare(model, inplace=True)
+    with torch.no_grad():
+        for start in range(0, len(crops), CALIBRATION_BATCH):
+            model(crops_to_tensor(crops[start:start + CALIBRATION_BATCH]))
+    quantization.convert(model, inplace=True)
+    print(f"Calibrated static INT8 gender model on {len(crops)} crops ({engine})")
+    return model
+
+def calibration_key(calibration_dir=CALIBRATION_DIR, limit=CALIBRATION_LIMIT):
+    """Short hash of a calibration set: its folder, the crop limit and every
+    crop's file name, size and modification time."""
+    digest = hashlib.sha1(f"{os.path.abspath(calibration_dir)}|{limit}".encode())
+    for name in sorted(os.listdir(calibration_dir)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            stat = os.stat(os.path.join(calibration_dir, name))
+            digest.update(f"|{name}:{stat.st_size}:{int(stat.st_mtime)}".encode())
+    return digest.hexdigest()[:12]
+
+def quantized_model_path(mode, calibration_dir=CALIBRATION_DIR):
+    """Cache file of an INT8 gender model; static models are keyed by their calibration set."""
+    key = f"static_{calibration_key(calibration_dir)}" if mode == "static" else mode
+    return os.path.join(EXPORT_CACHE_DIR, f"gender_mobilenet_v2_int8_{key}.pt")
+
+def load_quantized_gender_model(mode=GENDER_QUANTIZATION, calibration_dir=CALIBRATION_DIR):
+    """INT8 gender model, built once and cached as TorchScript in the export cache.
+
+    A static model is recalibrated (under a new cache file) whenever the
+    calibration folder or its crops change.
+    """
+    torch.backends.quantized.engine = quantization_engine()
+    cached = quantized_model_path(mode, calibration_dir)
+    if os.path.exists(cached):
+        return torch.jit.load(cached).eval()
+    if mode == "dynamic":
+        model = quantize_dynamic(build_fp32_model())
+    elif mode == "static":
+        model = quantize_static(calibration_dir)
+    else:
+        raise ValueError(f"Unknown gender quantization mode: {mode}")
+    dummy = torch.zeros(1, 3, GENDER_INPUT_SIZE, GENDER_INPUT_SIZE)
+    with torch.no_grad():
+        scripted = torch.jit.trace(model, dummy)
+    os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+    torch.jit.save(scripted, cached)
+    return scripted.eval()
+
+def _predict(model, crop):
+    """(pred_idx, confidence, seconds) for one crop, as the processors classify it."""
+    tensor = crops_to_tensor([crop])
+    start = time.perf_counter()
+    with torch.no_grad():
+        output = model(tensor)
+    elapsed = time.perf_counter() - start
+    confidence, pred_idx = torch.softmax(output, dim=1).max(dim=1)
+    return pred_idx.item(), confidence.item(), elapsed
+
+def compare_gender_models(crops_dir, mode="static", calibration_dir=CALIBRATION_DIR):
+    """Run the FP32 and INT8 gender models on the same crops and report how they differ.
+
+    Reports class and gender agreement, agreement of the gender decision the
+    alert rules act on at each ALERT_THRESHOLDS value, per-crop latency at
+    batch size 1 and weight size. Use crops that were not used for calibration.
+    """
+    names, crops = load_crops(crops_dir)
+    if not crops:
+        raise ValueError(f"No crops found in {crops_dir}")
+    if mode == "static" and os.path.abspath(crops_dir) == os.path.abspath(calibration_dir):
+        print("Warning: evaluating on the calibration crops overstates agreement")
+
+    fp32_model = build_fp32_model()
+    int8_model = load_quantized_gender_model(mode, calibration_dir)
+    # Warm up both so one-time initialization is not timed
+    _predict(fp32_model, crops[0])
+    _predict(int8_model, crops[0])
+
+    fp32_times, int8_times = [], []
+    same_class = same_gender = 0
+    same_decision = {threshold: 0 for threshold in ALERT_THRESHOLDS}
+    disagreements = []
+    for name, crop in zip(names, crops):
+        fp32_idx, fp32_conf, fp32_time = _predict(fp32_model, crop)
+        int8_idx, int8_conf, int8_time = _predict(int8_model, crop)
+        fp32_times.append(fp32_time)
+        int8_times.append(int8_time)
+        same_class += fp32_idx == int8_idx
+        same_gender += fp32_idx % 2 == int8_idx % 2
+        for threshold in ALERT_THRESHOLDS:
+            # The decision the alert rules act on, taken exactly as the processors take it
+            if (gender_decision(gender_label(fp32_idx), fp32_conf, threshold) ==
+                    gender_decision(gender_label(int8_idx), int8_conf, threshold)):
+                same_decision[threshold] += 1
+            elif name not in disagreements:
+                disagreements.append(name)
+
+    def latency(times):
+        return {"mean_ms": round(1000 * float(np.mean(times)), 2),
+                "p95_ms": round(1000 * float(np.percentile(times, 95)), 2)}
+
+    report = {
+        "crops": len(crops),
+        "mode": mode,
+        "class_agreement": same_class / len(crops),
+        "gender_agreement": same_gender / len(crops),
+        "alert_agreement": {threshold: count / len(crops) for threshold, count in same_decision.items()},
+        "fp32_latency": latency(fp32_times),
+        "int8_latency": latency(int8_times),
+        # The traced INT8 model keeps its packed weights out of state_dict(), so its saved file is measured
+        "fp32_size_mb": round(model_memory_mb(fp32_model), 2),
+        "int8_size_mb": round(os.path.getsize(quantized_model_path(mode, calibration_dir)) / (1024 * 1024), 2),
+        "alert_disagreements": disagreements
+    }
+
+    print(f"\nGender model comparison on {len(crops)} crops (INT8 {mode}):")
+    print(f"  Class agreement:  {report['class_agreement']:.1%}")
+    print(f"  Gender agreement: {report['gender_agreement']:.1%}")
+    for threshold, rate in report["alert_agreement"].items():
+        print(f"  Alert decision agreement at confidence {threshold}: {rate:.1%}")
+    print(f"  Latency per crop: FP32 {report['fp32_latency']['mean_ms']} ms "
+          f"(p95 {report['fp32_latency']['p95_ms']}), INT8 {report['int8_latency']['mean_ms']} ms "
+          f"(p95 {report['int8_latency']['p95_ms']})")
+    print(f"  Weights: FP32 {report['fp32_size_mb']} MB, INT8 {report['int8_size_mb']} MB")
+    if disagreements:
+        print(f"  Crops with a different alert decision: {', '.join(disagreements[:10])}"
+              f"{' ...' if len(disagreements) > 10 else ''}")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the FP32 and INT8 gender models on a folder of crops")
+    parser.add_argument("crops_dir")
+    parser.add_argument("--mode", choices=["static", "dynamic"], default="static")
+    parser.add_argument("--calibration-dir", default=CALIBRATION_DIR)
+    args = parser.parse_args()
+    compare_gender_models(args.crops_dir, args.mode, args.calibration_dir)
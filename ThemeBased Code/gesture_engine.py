@@ -0,0 +1,174 @@
+import json
+import os
+import numpy as np
+
+# Gesture engine settings
+GESTURE_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gesture_rules.json")
+GESTURE_WINDOW = 32  # Landmark frames kept per person
+GESTURE_HISTORY_TTL = 5.0  # Seconds after which the history of a person no longer seen is dropped
+
+# Landmark indices (MediaPipe HandLandmark / PoseLandmark)
+WRIST = 0
+THUMB_IP = 3
+THUMB_TIP = 4
+MIDDLE_FINGER_TIP = 12
+NOSE = 0
+HAND_POINTS = 21
+POSE_POINTS = 33
+
+def load_gesture_rules(profile, path=GESTURE_RULES_FILE):
+    """Rule table for one profile ("live" or "video") from the JSON rules file."""
+    with open(path) as f:
+        return json.load(f)[profile]
+
+def landmarks_to_array(landmarks, points):
+    """(points, 3) float array of x, y, z; all NaN when the part was not found."""
+    if not landmarks:
+        return np.full((points, 3), np.nan, dtype=np.float32)
+    return np.array([(point.x, point.y, point.z) for point in landmarks.landmark], dtype=np.float32)
+
+def holistic_to_arrays(results):
+    """Convert Holistic results to (hands (2, 21, 3), pose (33, 3)); hand 0 is left."""
+    hands = np.stack([
+        landmarks_to_array(results.left_hand_landmarks, HAND_POINTS),
+        landmarks_to_array(results.right_hand_landmarks, HAND_POINTS)
+    ])
+    return hands, landmarks_to_array(results.pose_landmarks, POSE_POINTS)
+
+# ---- Rule evaluators ----
+# Each takes the window's hands (T, 2, 21, 3), pose (T, 33, 3), times (T,) and
+# the rule, and returns one bool per frame (or a single bool for temporal
+# rules). NaN landmarks compare False, so missing hands never match.
+
+def _hand_raised(hands, pose, times, rule):
+    wrist, tip = hands[:, :, WRIST], hands[:, :, MIDDLE_FINGER_TIP]
+    raised = (tip[..., 1] < wrist[..., 1]) & (wrist[..., 1] < rule["y_threshold"])
+    if "x_threshold" in rule:
+        raised &= np.abs(tip[..., 0] - wrist[..., 0]) < rule["x_threshold"]
+    return raised.any(axis=1)
+
+def _both_hands_up(hands, pose, times, rule):
+    wrists = hands[:, :, WRIST]
+    up = (wrists[..., 1] < rule["y_threshold"]).all(axis=1)
+    if "x_threshold" in rule:
+        up &= np.abs(wrists[:, 0, 0] - wrists[:, 1, 0]) < rule["x_threshold"]
+    return up
+
+def _hand_near_nose(hands, pose, times, rule):
+    distance = np.linalg.norm(hands[:, :, WRIST, :2] - pose[:, None, NOSE, :2], axis=-1)
+    return (distance < rule["distance"]).any(axis=1)
+
+def _hands_close(hands, pose, times, rule):
+    wrists = hands[:, :, WRIST, :2]
+    return np.linalg.norm(wrists[:, 0] - wrists[:, 1], axis=-1) < rule["distance"]
+
+def _thumb_up(hands, pose, times, rule):
+    tip, ip = hands[:, :, THUMB_TIP], hands[:, :, THUMB_IP]
+    return ((tip[..., 1] < ip[..., 1]) & (np.abs(tip[..., 0] - ip[..., 0]) < rule["x_threshold"])).any(axis=1)
+
+def _wave(hands, pose, times, rule):
+    """Side-to-side swing of the fingers around the wrist at a waving frequency."""
+    recent = times >= times[-1] - rule["window_seconds"]
+    swing = hands[recent, :, MIDDLE_FINGER_TIP, 0] - hands[recent, :, WRIST, 0]
+    seen = ~np.isnan(swing)
+    for hand in range(swing.shape[1]):
+        values, value_times = swing[seen[:, hand], hand], times[recent][seen[:, hand]]
+        if len(values) < rule["min_reversals"] + 1:
+            continue
+        # Count swings across the hand's mean position that exceed the amplitude
+        offsets = values - np.median(values)
+        signs = np.sign(offsets[np.abs(offsets) >= rule["min_amplitude"]])
+        reversals = np.count_nonzero(signs[1:] != signs[:-1])
+        duration = value_times[-1] - value_times[0]
+        if reversals < rule["min_reversals"] or duration <= 0:
+            continue
+        frequency = reversals / 2.0 / duration
+        if rule["min_hz"] <= frequency <= rule["max_hz"]:
+            return True
+    return False
+
+RULE_KINDS = {
+    "hand_raised": _hand_raised,
+    "both_hands_up": _both_hands_up,
+    "hand_near_nose": _hand_near_nose,
+    "hands_close": _hands_close,
+    "thumb_up": _thumb_up,
+    "wave": _wave
+}
+TEMPORAL_KINDS = {"wave"}
+
+class LandmarkHistory:
+    """Fixed-size ring buffer of one person's landmark arrays."""
+
+    def __init__(self, window=GESTURE_WINDOW):
+        self.hands = np.full((window, 2, HAND_POINTS, 3), np.nan, dtype=np.float32)
+        self.pose = np.full((window, POSE_POINTS, 3), np.nan, dtype=np.float32)
+        self.times = np.zeros(window, dtype=np.float64)
+        self.window = window
+        self.count = 0
+
+    def add(self, hands, pose, timestamp):
+        slot = self.count % self.window
+        self.hands[slot] = hands
+        self.pose[slot] = pose
+        self.times[slot] = timestamp
+        self.count += 1
+
+    @property
+    def last_time(self):
+        return self.times[(self.count - 1) % self.window] if self.count else None
+
+    def ordered(self):
+        """(hands, pose, times) of the buffered frames, oldest first."""
+        size = min(self.count, self.window)
+        order = (np.arange(self.count - size, self.count)) % self.window
+        return self.hands[order], self.pose[order], self.times[order]
+
+class GestureEngine:
+    """Evaluate a data-driven gesture rule table over each person's recent landmarks.
+
+    update() converts one person's Holistic results to arrays, appends them to
+    that person's ring buffer (keyed by track ID) and checks every rule.
+    Per-frame rules look at the last `frames` entries (default 1) and match
+    when at least `min_ratio` of them pass; temporal rules such as `wave`
+    look at the whole window. Returns the matching gestures as
+    {"type", "message", "description"} dicts; cooldowns are left to the caller.
+    """
+
+    def __init__(self, rules, window=GESTURE_WINDOW):
+        self.rules = rules
+        self.window = window
+        self.histories = {}
+
+    def update(self, person_key, results, timestamp):
+        history = self.histories.get(person_key)
+        if history is None:
+            history = self.histories[person_key] = LandmarkHistory(self.window)
+        hands, pose = holistic_to_arrays(results)
+        history.add(hands, pose, timestamp)
+        self._prune(timestamp)
+
+        hands, pose, times = history.ordered()
+        gestures = []
+        for rule in self.rules:
+            evaluate = RULE_KINDS[rule["kind"]]
+            if rule["kind"] in TEMPORAL_KINDS:
+                matched = evaluate(hands, pose, times, rule)
+            else:
+                frames = rule.get("frames", 1)
+                if len(times) < frames:
+                    continue
+                per_frame = evaluate(hands[-frames:], pose[-frames:], times[-frames:], rule)
+                matched = per_frame.mean() >= rule.get("min_ratio", 1.0)
+            if matched:
+                gestures.append({
+                    "type": rule["type"],
+                    "message": rule["message"],
+                    "description": rule["description"]
+                })
+        return gestures
+
+    def _prune(self, now):
+        for person_key in [key for key, history in self.histories.items()
+                           if now - history.last_time > GESTURE_HISTORY_TTL]:
+            del self.histories[person_key]
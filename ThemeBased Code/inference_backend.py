@@ -0,0 +1,168 @@
+import os
+import shutil
+import numpy as np
+import torch
+from person_detection import GENDER_INPUT_SIZE
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+try:
+    import openvino
+except ImportError:
+    openvino = None
+
+# Inference backend settings
+INFERENCE_BACKEND = "auto"  # "auto" (the first runtime installed), "onnxruntime", "openvino" or "torch"; falls back to PyTorch on failure
+EXPORT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_cache")
+INFERENCE_CALLERS = 2  # Threads expected to call the models at the same time (live pool, video workers)
+INTRA_OP_THREADS = max(1, (os.cpu_count() or 1) // INFERENCE_CALLERS)  # Threads one classifier call may use
+INTER_OP_THREADS = 1  # The models are sequential graphs, so parallel operators do not help
+ONNX_OPSET = 13
+EXPORT_CHECK_IMAGE_SIZE = 320  # Side of the blank frame an exported YOLO model is tried on
+
+def select_backend(requested=INFERENCE_BACKEND):
+    """Backend to run the models on, falling back to PyTorch when the runtime is missing."""
+    available = {"onnxruntime": onnxruntime is not None, "openvino": openvino is not None}
+    if requested == "auto":
+        for backend in ("onnxruntime", "openvino"):
+            if available[backend]:
+                return backend
+        return "torch"
+    if requested != "torch" and not available.get(requested, False):
+        print(f"Inference backend '{requested}' is not installed, falling back to PyTorch")
+        return "torch"
+    return requested
+
+def _is_stale(export_path, source_path):
+    """An export is rebuilt when missing or older than the weights it came from."""
+    if not os.path.exists(export_path):
+        return True
+    return source_path is not None and os.path.exists(source_path) and os.path.getmtime(source_path) > os.path.getmtime(export_path)
+
+def export_yolo(weights, backend):
+    """Export YOLO weights for the backend once and return the cached model path.
+
+    Ultralytics loads both formats itself, so YOLO(path) keeps returning the
+    usual Results objects to the call sites.
+    """
+    from ultralytics import YOLO
+    os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(weights))[0]
+    export_format = "onnx" if backend == "onnxruntime" else "openvino"
+    cached = os.path.join(EXPORT_CACHE_DIR, f"{stem}.onnx" if export_format == "onnx" else f"{stem}_openvino_model")
+    if _is_stale(cached, weights):
+        print(f"Exporting {weights} to {export_format} (one-time, cached in {EXPORT_CACHE_DIR})")
+        # Dynamic shapes keep batched calls working
+        exported = YOLO(weights).export(format=export_format, dynamic=True)
+        if os.path.isdir(cached):
+            shutil.rmtree(cached)
+        shutil.move(exported, cached)
+    return cached
+
+def export_classifier(model, name, source_path=None):
+    """Export a torch image classifier to ONNX once and return the cached path.
+
+    The export is redone when `source_path` (the weights file) is newer.
+    """
+    os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+    cached = os.path.join(EXPORT_CACHE_DIR, f"{name}.onnx")
+    if _is_stale(cached, source_path):
+        print(f"Exporting {name} to onnx (one-time, cached in {EXPORT_CACHE_DIR})")
+        partial = cached + ".partial"
+        dummy = torch.zeros(1, 3, GENDER_INPUT_SIZE, GENDER_INPUT_SIZE)
+        torch.onnx.export(model, dummy, partial, input_names=["input"], output_names=["logits"],
+                          dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+                          opset_version=ONNX_OPSET)
+        # Rename last so a crashed export is never picked up as cached
+        os.replace(partial, cached)
+    return cached
+
+class OnnxClassifier:
+    """ONNX Runtime session that is called like the torch model it was exported from.
+
+    Takes and returns torch tensors, so code written for the eager model
+    (torch.no_grad, softmax on the output) works unchanged.
+    """
+
+    def __init__(self, path):
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = INTRA_OP_THREADS
+        options.inter_op_num_threads = INTER_OP_THREADS
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.path = path
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def eval(self):
+        return self
+
+    def __call__(self, tensor):
+        inputs = np.ascontiguousarray(tensor.detach().cpu().numpy(), dtype=np.float32)
+        return torch.from_numpy(self.session.run(None, {self.input_name: inputs})[0])
+
+class OpenVinoClassifier:
+    """OpenVINO compiled model that is called like the torch model it was exported from."""
+
+    def __init__(self, path):
+        core = openvino.Core()
+        self.path = path
+        self.compiled = core.compile_model(core.read_model(path), "CPU", {
+            "INFERENCE_NUM_THREADS": INTRA_OP_THREADS,
+            "PERFORMANCE_HINT": "LATENCY"
+        })
+
+    def eval(self):
+        return self
+
+    def __call__(self, tensor):
+        # Infer requests are not thread-safe, so every call gets its own
+        request = self.compiled.create_infer_request()
+        request.infer({0: np.ascontiguousarray(tensor.detach().cpu().numpy(), dtype=np.float32)})
+        return torch.from_numpy(request.get_output_tensor(0).data.copy())
+
+def load_yolo(weights, backend):
+    """YOLO on the chosen backend; PyTorch weights are fused once up front.
+
+    An exported model is tried on one blank frame first, so a runtime that
+    cannot run it falls back to PyTorch here rather than failing later.
+    """
+    from ultralytics import YOLO
+    if backend != "torch":
+        try:
+            model = YOLO(export_yolo(weights, backend), task="detect")
+            model(np.zeros((EXPORT_CHECK_IMAGE_SIZE, EXPORT_CHECK_IMAGE_SIZE, 3), dtype=np.uint8), verbose=False)
+            return model
+        except Exception as e:
+            print(f"Error loading YOLO on {backend}, falling back to PyTorch: {str(e)}")
+    model = YOLO(weights)
+    # Fuse once so per-thread predictors never modify the shared layers
+    model.fuse()
+    return model
+
+def load_classifier(model, name, backend, source_path=None):
+    """Wrap an eval-mode torch classifier for the chosen backend, falling back to the torch model."""
+    if backend == "torch":
+        return model
+    try:
+        path = export_classifier(model, name, source_path)
+        classifier = OnnxClassifier(path) if backend == "onnxruntime" else OpenVinoClassifier(path)
+        classifier(torch.zeros(1, 3, GENDER_INPUT_SIZE, GENDER_INPUT_SIZE))
+        return classifier
+    except Exception as e:
+        print(f"Error loading {name} on {backend}, falling back to PyTorch: {str(e)}")
+        return model
+
+def model_backend(model):
+    """Name of the backend a loaded model runs on."""
+    if isinstance(model, OnnxClassifier):
+        return "onnxruntime"
+    if isinstance(model, OpenVinoClassifier):
+        return "openvino"
+    path = getattr(model, "model", None)
+    if isinstance(path, str):
+        return "openvino" if os.path.isdir(path) else "onnxruntime"
+    return "torch"
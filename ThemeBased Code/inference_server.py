@@ -0,0 +1,340 @@
+import os
+import queue
+import threading
+import uuid
+from multiprocessing import shared_memory, resource_tracker
+from multiprocessing.connection import Listener, Client
+import numpy as np
+
+# Inference server settings
+USE_INFERENCE_SERVER = False  # Send frames to the inference server process instead of loading models in every web worker
+INFERENCE_SERVER_ADDRESS = ("127.0.0.1", 6001)
+INFERENCE_AUTHKEY = b"herwatch-inference"
+INFERENCE_REPLY_TIMEOUT = 30.0  # Seconds a client waits for the server's answer
+INFERENCE_MAX_BATCH = 16  # Most frames (from all clients) sent to YOLO in one call
+INFERENCE_CPU_AFFINITY = None  # e.g. {2, 3, 4, 5}: cores the server process is pinned to
+RING_SLOTS = 8  # Frame slots in each client's shared memory buffer
+
+class FrameRing:
+    """Fixed-size frame slots in a shared memory block.
+
+    The client creates the block and writes each frame of a call into the
+    next slots; the server attaches by name and reads the pixels in place
+    through numpy views, so frames are never pickled or copied again.
+    """
+
+    def __init__(self, slots, slot_bytes, name=None):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes,
+                                                  name=f"herwatch-{uuid.uuid4().hex[:12]}")
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            # The creating client unlinks the block; keep this process's
+            # resource tracker from unlinking it too when the server exits
+            try:
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+            except Exception:
+                pass
+        self.next_slot = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def fits(self, images):
+        return len(images) <= self.slots and all(image.nbytes <= self.slot_bytes for image in images)
+
+    def view(self, slot, shape):
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+
+    def write(self, images):
+        """Copy images into consecutive slots; returns their (slot, shape) handles."""
+        handles = []
+        for image in images:
+            slot = self.next_slot
+            self.next_slot = (self.next_slot + 1) % self.slots
+            np.copyto(self.view(slot, image.shape), image)
+            handles.append((slot, image.shape))
+        return handles
+
+    def close(self):
+        try:
+            self.shm.close()
+        except BufferError:
+            # A view is still alive somewhere; retried on the next close
+            print(f"Frame ring {self.shm.name} still has views in use, closing it later")
+            with _unclosed_lock:
+                _unclosed.append(self.shm)
+        if self.owner:
+            # Unlinked regardless, so the block is freed once the last mapping goes
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+        _close_unclosed()
+
+_unclosed = []
+_unclosed_lock = threading.Lock()
+
+def _close_unclosed():
+    """Retry closing ring mappings that still had views when they were closed."""
+    with _unclosed_lock:
+        for shm in list(_unclosed):
+            try:
+                shm.close()
+                _unclosed.remove(shm)
+            except BufferError:
+                pass
+
+class InferenceClient:
+    """Connection from one thread to the inference server.
+
+    Calls block until the server answers; one client must only be used by
+    one thread at a time (see local_client). The shared memory buffer grows
+    when a call brings more or larger images than it holds.
+    """
+
+    def __init__(self, address=INFERENCE_SERVER_ADDRESS, authkey=INFERENCE_AUTHKEY):
+        self.address = address
+        self.authkey = authkey
+        self.conn = None
+        self.ring = None
+
+    def _connect(self):
+        if self.conn is None:
+            self.conn = Client(self.address, authkey=self.authkey)
+            if self.ring is not None:
+                self.conn.send({"op": "attach", "ring": self.ring.name,
+                                "slots": self.ring.slots, "slot_bytes": self.ring.slot_bytes})
+
+    def _write(self, images):
+        self._connect()
+        if self.ring is None or not self.ring.fits(images):
+            old_ring = self.ring
+            self.ring = FrameRing(max(RING_SLOTS, len(images)), max(image.nbytes for image in images))
+            self.conn.send({"op": "attach", "ring": self.ring.name,
+                            "slots": self.ring.slots, "slot_bytes": self.ring.slot_bytes})
+            if old_ring is not None:
+                old_ring.close()
+        return self.ring.write([np.ascontiguousarray(image, dtype=np.uint8) for image in images])
+
+    def _call(self, message):
+        try:
+            self.conn.send(message)
+            if not self.conn.poll(INFERENCE_REPLY_TIMEOUT):
+                raise TimeoutError("Inference server did not answer in time")
+            reply = self.conn.recv()
+        except Exception:
+            # Reconnect (and re-attach the buffer) on the next call
+            self._disconnect()
+            raise
+        if "error" in reply:
+            raise RuntimeError(f"Inference server error: {reply['error']}")
+        return reply["result"]
+
+    def detect(self, frames, min_confidence):
+        """Person boxes (x1, y1, x2, y2) above min_confidence, one list per frame."""
+        if not frames:
+            return []
+        handles = self._write(frames)
+        return self._call({"op": "detect", "frames": handles, "min_confidence": min_confidence})
+
+    def classify(self, images):
+        """(gender, confidence) for each face crop."""
+        if not images:
+            return []
+        handles = self._write(images)
+        return self._call({"op": "classify", "frames": handles})
+
+    def _disconnect(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except OSError:
+                pass
+            self.conn = None
+
+    def close(self):
+        self._disconnect()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+_local = threading.local()
+
+def local_client():
+    """The calling thread's InferenceClient, created on first use."""
+    client = getattr(_local, "client", None)
+    if client is None:
+        client = _local.client = InferenceClient()
+    return client
+
+def server_state():
+    """Readiness of the inference server: ready once it accepts a connection.
+
+    The server only listens after its models are loaded, so a successful
+    connection means it can serve detections.
+    """
+    state = {"state": "ready", "load_time": None, "warmup_time": None, "error": None}
+    try:
+        Client(INFERENCE_SERVER_ADDRESS, authkey=INFERENCE_AUTHKEY).close()
+    except Exception as e:
+        state.update(state="unreachable", error=str(e))
+    return state
+
+class InferenceServer:
+    """Process that owns the models and serves detection for all web workers.
+
+    Each client connection gets a thread that attaches the client's frame
+    ring and queues its requests. One inference thread takes whatever is
+    queued, runs YOLO over the frames of all waiting detect requests in a
+    single batch (and the gender model over all waiting crops), and answers
+    each connection.
+    """
+
+    def __init__(self, address=INFERENCE_SERVER_ADDRESS, authkey=INFERENCE_AUTHKEY):
+        self.address = address
+        self.authkey = authkey
+        self.requests = queue.Queue()
+        self.yolo = None
+        self.gender = None
+        self.batches = 0
+
+    def serve_forever(self):
+        if INFERENCE_CPU_AFFINITY and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, INFERENCE_CPU_AFFINITY)
+            print(f"Inference server pinned to cores {sorted(INFERENCE_CPU_AFFINITY)}")
+        # Imported here so clients never load torch models through this module
+        from model_registry import get_model
+        self.yolo = get_model("yolo")
+        self.gender = get_model("gender")
+        threading.Thread(target=self._infer, name="inference", daemon=True).start()
+
+        with Listener(self.address, authkey=self.authkey) as listener:
+            print(f"Inference server listening on {self.address[0]}:{self.address[1]}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    print(f"Error accepting inference client: {str(e)}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        ring = None
+        try:
+            while True:
+                message = conn.recv()
+                if message["op"] == "attach":
+                    if ring is not None:
+                        ring.close()
+                    ring = FrameRing(message["slots"], message["slot_bytes"], name=message["ring"])
+                    continue
+                done = threading.Event()
+                self.requests.put((conn, ring, message, done))
+                # A client has one call in flight; wait so the ring is not closed under it
+                done.wait()
+        except EOFError:
+            pass
+        except Exception as e:
+            print(f"Error in inference connection: {str(e)}")
+        finally:
+            if ring is not None:
+                ring.close()
+            conn.close()
+
+    def _take_batch(self):
+        batch = [self.requests.get()]
+        frames = len(batch[0][2]["frames"])
+        while frames < INFERENCE_MAX_BATCH:
+            try:
+                request = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(request)
+            frames += len(request[2]["frames"])
+        return batch
+
+    def _infer(self):
+        while True:
+            batch = self._take_batch()
+            for op, run in (("detect", self._detect), ("classify", self._classify)):
+                requests = [request for request in batch if request[2]["op"] == op]
+                if not requests:
+                    continue
+                try:
+                    results = run(requests)
+                    replies = [{"result": result} for result in results]
+                except Exception as e:
+                    print(f"Error running inference batch: {str(e)}")
+                    replies = [{"error": str(e)}] * len(requests)
+                for (conn, _, _, done), reply in zip(requests, replies):
+                    try:
+                        conn.send(reply)
+                    except Exception as e:
+                        print(f"Error answering inference client: {str(e)}")
+                    done.set()
+            self.batches += 1
+
+    def _images(self, requests):
+        """Views of every request's frames, in request order, with each request's count."""
+        images, counts = [], []
+        for _, ring, message, _ in requests:
+            images.extend(ring.view(slot, shape) for slot, shape in message["frames"])
+            counts.append(len(message["frames"]))
+        return images, counts
+
+    @staticmethod
+    def _split(values, counts):
+        parts, start = [], 0
+        for count in counts:
+            parts.append(values[start:start + count])
+            start += count
+        return parts
+
+    def _release_inputs(self):
+        """Drop what the YOLO predictor keeps of its last call.
+
+        Results hold their original image, and the predictor keeps the last
+        batch, results and input source; here those are views into a client's
+        ring, which cannot be closed while any of them is alive.
+        """
+        predictor = getattr(self.yolo, "predictor", None)
+        for name in ("batch", "results", "dataset"):
+            if predictor is not None and getattr(predictor, name, None) is not None:
+                setattr(predictor, name, None)
+
+    def _detect(self, requests):
+        images, counts = self._images(requests)
+        try:
+            results = self.yolo(images)
+            people = []
+            for result in results:
+                boxes = result.boxes
+                people.append([
+                    (tuple(map(int, xyxy)), float(conf))
+                    for xyxy, conf, cls in zip(boxes.xyxy.tolist(), boxes.conf.tolist(), boxes.cls.tolist())
+                    if int(cls) == 0
+                ])
+            del results
+        finally:
+            del images
+            self._release_inputs()
+        return [
+            [[box for box, conf in frame if conf > message["min_confidence"]] for frame in part]
+            for part, (_, _, message, _) in zip(self._split(people, counts), requests)
+        ]
+
+    def _classify(self, requests):
+        import torch
+        from person_detection import crops_to_tensor, predictions_from_output
+        images, counts = self._images(requests)
+        with torch.no_grad():
+            output = self.gender(crops_to_tensor(images))
+        return self._split(predictions_from_output(output), counts)
+
+if __name__ == "__main__":
+    InferenceServer().serve_forever()
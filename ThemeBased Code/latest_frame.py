@@ -0,0 +1,37 @@
+import threading
+
+class LatestFrame:
+    """Single-slot buffer where a new frame replaces the one still waiting.
+
+    The producer (a socket reader or a capture thread) calls put() as fast as
+    frames arrive; the consumer gets only the newest frame, so a slow
+    consumer falls behind by at most one frame instead of building a backlog.
+    Replaced frames are counted in `dropped`.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.frame = None
+        self.closed = False
+        self.received = 0
+        self.dropped = 0
+
+    def put(self, frame):
+        with self.condition:
+            if self.frame is not None:
+                self.dropped += 1
+            self.frame = frame
+            self.received += 1
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """Take the newest frame; returns None on timeout or once closed and empty."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.frame is not None or self.closed, timeout)
+            frame, self.frame = self.frame, None
+            return frame
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
@@ -1,320 +1,355 @@
-import cv2
-import torch
-import numpy as np
-from ultralytics import YOLO
-import torchvision.models as models
 import time
-import winsound
-import mediapipe as mp
+import math
+import queue
+import threading
+import uuid
+from contextlib import contextmanager
+from person_tracker import PersonTracker
+from person_gestures import GraphBudget, PersonLandmarker, SCREEN_OPTIONS, warm_up_landmarker
+from motion_gate import MotionGate
+from camera_discovery import scan_cameras
+from alerts import alert_dispatcher
+from gesture_engine import GestureEngine, load_gesture_rules
+from model_registry import get_model, yolo_instance, register_warmup
+from inference_server import USE_INFERENCE_SERVER, local_client
+from person_detection import detect_persons_batch, classify_persons_batch, gender_decision
 
-# Load models
-yolo_model = YOLO("yolov8n.pt")
-gender_model = models.mobilenet_v2(pretrained=True)
-gender_model.eval()
+# Models come from the model registry (shared with the video processor) and are
+# loaded by its warm-up or on first use; with USE_INFERENCE_SERVER they live in
+# the inference server process instead
 
 # Constants
 GENDER_LABELS = ["Male", "Female"]
 ALERT_COOLDOWN = 5  # Reduced from 30 to 5 seconds for live processing
+GESTURE_COOLDOWN = 3  # Seconds between two gesture alerts of one session
+GESTURE_RULES = load_gesture_rules("live")  # Thresholds live in gesture_rules.json
 PERSON_CONFIDENCE_THRESHOLD = 0.2  # Lowered from 0.3 to 0.2
 GENDER_CONFIDENCE_THRESHOLD = 0.1  # Lowered from 0.2 to 0.1
+FACE_HEIGHT_RATIO = 0.4  # Top part of a person box cropped for the gender model
 FRAME_SKIP = 3  # Process every 3rd frame to maintain real-time performance
+LIVE_MODEL_POOL_SIZE = 2  # YOLO instances shared by all live camera sessions
+LIVE_MOTION_GATE = True  # Skip the models on frames where nothing moved
 
-# Mediapipe Init
-mp_holistic = mp.solutions.holistic
-holistic = mp_holistic.Holistic(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+# Frame scheduling (see FrameScheduler)
+LIVE_LATENCY_BUDGET = 0.2  # Target seconds of processing per frame for one camera
+MAX_DETECT_INTERVAL = 10  # Run YOLO at least every this many frames
+MAX_GESTURE_INTERVAL = 3  # Check gestures at least every this many frames while people are present
+GESTURE_BUDGET_SHARE = 0.5  # Part of the latency budget gestures may use before they are thinned out
+STAGE_TIME_SMOOTHING = 0.2  # Weight of the newest measurement in the stage time averages
 
-# Time Trackers
-last_alert_time = 0
-last_gesture_time = 0
-wave_count = 0
-last_wave_time = 0
+# Holistic settings for the per-person landmarkers (see person_gestures.PersonLandmarker)
+HOLISTIC_OPTIONS = dict(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+LIVE_GESTURE_SCREEN = True  # Screen people with a lite pose pass and only escalate candidates to full Holistic
+LIVE_MAX_GRAPHS = 24  # MediaPipe graphs (Holistic and screen Pose) all live sessions together may keep open
+register_warmup("holistic_live", lambda: warm_up_landmarker(
+    SCREEN_OPTIONS if LIVE_GESTURE_SCREEN else None, **HOLISTIC_OPTIONS))
 
-def play_alert_sound():
-    try:
-        winsound.PlaySound("SystemExclamation", winsound.SND_ALIAS)
-    except Exception as e:
-        print(f"Could not play alert sound: {e}")
-
-def show_alert(frame, message):
-    cv2.rectangle(frame, (0, 0), (frame.shape[1], frame.shape[0]), (0, 0, 255), 5)
-    text = f"\u26a0 {message} \u26a0"
-    font = cv2.FONT_HERSHEY_SIMPLEX
-    font_scale = 1.5
-    thickness = 3
-    (text_width, text_height), _ = cv2.getTextSize(text, font, font_scale, thickness)
-    x = (frame.shape[1] - text_width) // 2
-    y = 50
-    cv2.rectangle(frame, (x-10, y-text_height-10), (x+text_width+10, y+10), (0, 0, 0), -1)
-    cv2.putText(frame, text, (x, y), font, font_scale, (0, 0, 255), thickness)
-    return frame
+class ModelPool:
+    """Bounded pool of YOLO instances that live sessions check out per frame.
+
+    Ultralytics predictors keep state between calls, so concurrent sessions
+    need separate instances. Up to `size` are created on demand (the first
+    is the registry's shared YOLO, the rest share its weights); when all are in use a session waits for one. The gender model
+    is only run under no_grad and is shared by all sessions. With the
+    inference server every thread gets its own client instead, and the
+    server batches the threads' frames.
+    """
+
+    def __init__(self, size=LIVE_MODEL_POOL_SIZE):
+        self.size = max(1, int(size))
+        self.available = queue.Queue()
+        self.created = 0
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def checkout(self):
+        if USE_INFERENCE_SERVER:
+            yield local_client()
+            return
+        model = None
+        with self.lock:
+            if self.available.empty() and self.created < self.size:
+                model = get_model("yolo") if self.created == 0 else yolo_instance()
+                self.created += 1
+                print(f"Live model pool: created YOLO instance {self.created}/{self.size}")
+        if model is None:
+            model = self.available.get()
+        try:
+            yield model
+        finally:
+            self.available.put(model)
+
+model_pool = ModelPool()
+# Shared by the landmarkers of all live sessions, so the per-person graphs stay bounded
+live_graph_budget = GraphBudget(LIVE_MAX_GRAPHS)
+
+class FrameScheduler:
+    """Decide per frame which stages run, to stay within a latency budget.
+
+    YOLO (plus gender for new tracks) runs every `detect_interval` frames;
+    frames in between reuse the person tracks, moved along their velocity.
+    Gestures run every `gesture_interval` frames, and only while people are
+    present. Both intervals are re-derived from moving averages of the measured
+    stage times after every frame, so average work per frame stays within
+    `latency_budget` on slower machines and drops back to every frame on fast
+    ones.
+    """
+
+    def __init__(self, latency_budget=LIVE_LATENCY_BUDGET, detect_interval=FRAME_SKIP):
+        self.latency_budget = latency_budget
+        self.detect_interval = detect_interval
+        self.gesture_interval = 1
+        self.stage_times = {}
+        self.frame_index = 0
+        self.frames_since_detect = 0
+        self.last_detect_interval = detect_interval
+
+    def plan(self):
+        """Stages to run on the next frame: `detect`, `gestures` and `track_steps`."""
+        detect = self.frame_index == 0 or self.frames_since_detect >= self.detect_interval
+        if detect:
+            self.frames_since_detect = 0
+            self.last_detect_interval = self.detect_interval
+        self.frame_index += 1
+        self.frames_since_detect += 1
+        return {
+            "detect": detect,
+            "gestures": self.frame_index % self.gesture_interval == 0,
+            # How far along their velocity (in tracker updates) people have moved
+            "track_steps": (self.frames_since_detect - 1) / self.last_detect_interval
+        }
+
+    def request_detect(self):
+        """Run YOLO on the next frame regardless of the interval."""
+        self.frames_since_detect = self.detect_interval
+
+    def record(self, stage, seconds):
+        previous = self.stage_times.get(stage)
+        self.stage_times[stage] = seconds if previous is None else previous + STAGE_TIME_SMOOTHING * (seconds - previous)
+
+    def adjust(self):
+        """Re-derive the intervals from the measured stage times."""
+        gestures = self.stage_times.get("gestures", 0.0)
+        detect = self.stage_times.get("yolo", 0.0) + self.stage_times.get("gender", 0.0)
+        self.gesture_interval = min(MAX_GESTURE_INTERVAL, max(1, math.ceil(
+            gestures / (self.latency_budget * GESTURE_BUDGET_SHARE))))
+        remaining = max(self.latency_budget - gestures / self.gesture_interval,
+                        self.latency_budget / MAX_DETECT_INTERVAL)
+        self.detect_interval = min(MAX_DETECT_INTERVAL, max(1, math.ceil(detect / remaining)))
+
+def tracked_people(tracker, steps):
+    """Person dicts for the currently matched tracks, moved `steps` updates ahead."""
+    return [{
+        "box": tracker.predict_box(track, steps),
+        "track_id": track["track_id"],
+        "gender": track["gender"],
+        "confidence": track["confidence"],
+        "classified": track["classified_at"] is not None
+    } for track in tracker.tracks if track["missed"] == 0]
+
+class LiveCameraSession:
+    """Detector state for one live camera stream (one WebSocket connection).
+
+    Alert cooldowns, wave counters, person tracks and the per-person MediaPipe
+    graphs live here, so concurrent cameras never share them. Models are
+    borrowed from `model_pool` for each frame, and the MediaPipe graphs of all
+    sessions count against `live_graph_budget`.
+    """
+
+    def __init__(self, session_id=None, latency_budget=LIVE_LATENCY_BUDGET):
+        self.session_id = session_id or uuid.uuid4().hex
+        # Time Trackers
+        self.last_alert_time = 0
+        self.last_gesture_time = 0
+        # Recent landmarks of every tracked person, for the gesture rules
+        self.gesture_engine = GestureEngine(GESTURE_RULES)
+        # Person tracks, so gender is classified once per person instead of every frame
+        self.tracker = PersonTracker()
+        # Gestures are checked on each person's crop, one Holistic instance per tracked person
+        self.landmarker = PersonLandmarker(screen_options=SCREEN_OPTIONS if LIVE_GESTURE_SCREEN else None,
+                                           graph_budget=live_graph_budget, **HOLISTIC_OPTIONS)
+        self.scheduler = FrameScheduler(latency_budget)
+        # Static frames skip the models and keep the last result
+        self.motion_gate = MotionGate() if LIVE_MOTION_GATE else None
+        self.gated = False
+        self.stop_requested = False
+        self.frame_count = 0
+        self.detections = []
+        self.started_at = time.time()
+
+    def close(self):
+        self.landmarker.close()
+
+# Used when process_live_camera is called without a session
+default_session = LiveCameraSession("default")
+
+def raise_alert(session, detection):
+    """Hand a detection to the alert dispatcher; never blocks the frame loop."""
+    alert_dispatcher.push(session.session_id, detection)
 
 def is_nighttime():
     current_hour = time.localtime().tm_hour
     return current_hour >= 19 or current_hour <= 6
 
-def classify_gender(face_img):
-    try:
-        face_img = cv2.resize(face_img, (224, 224))
-        face_tensor = torch.tensor(face_img, dtype=torch.float32).permute(2, 0, 1).unsqueeze(0) / 255.0
-        
-        with torch.no_grad():
-            output = gender_model(face_tensor)
-        
-        pred_idx = output.argmax().item()
-        confidence = torch.softmax(output, dim=1)[0][pred_idx].item()
-        gender = "Female" if pred_idx % 2 == 0 else "Male"
-        
-        print(f"Gender classification: {gender} with confidence {confidence:.2f}")
-        return gender, confidence
-    except Exception as e:
-        print(f"Error in gender classification: {e}")
-        return None, 0.0
+def classify_persons(frame, persons, tracker=None):
+    return classify_persons_batch([frame], [persons], FACE_HEIGHT_RATIO, [tracker])[0]
 
-def detect_sos_gesture(results):
-    global last_gesture_time, wave_count, last_wave_time
+def detect_sos_gesture(results, session, track_id=None):
+    """Check one person's Holistic results for SOS gestures.
+
+    The session's GestureEngine keeps the person's landmark history; gesture
+    alerts are at most one per GESTURE_COOLDOWN seconds per session.
+    """
     current_time = time.time()
     gestures = []
-
-    def get_landmarks(landmark_type):
-        return getattr(results, landmark_type) if hasattr(results, landmark_type) else None
-
-    def detect_raised_hand(landmarks):
-        if not landmarks: return False
-        wrist = landmarks.landmark[mp_holistic.HandLandmark.WRIST]
-        middle_tip = landmarks.landmark[mp_holistic.HandLandmark.MIDDLE_FINGER_TIP]
-        return middle_tip.y < wrist.y and wrist.y < 0.5
-
-    def detect_wave(hand_landmarks):
-        global last_wave_time, wave_count
-        if not hand_landmarks: return False
-        wrist = hand_landmarks.landmark[mp_holistic.HandLandmark.WRIST]
-        middle_tip = hand_landmarks.landmark[mp_holistic.HandLandmark.MIDDLE_FINGER_TIP]
-        horizontal = abs(middle_tip.x - wrist.x)
-        vertical = abs(middle_tip.y - wrist.y)
-        if vertical > 0.2 and horizontal > 0.1:
-            if current_time - last_wave_time > 0.3:
-                wave_count += 1
-                last_wave_time = current_time
-                if wave_count >= 2:
-                    return True
-        return False
-        
-    def detect_hand_on_mouth(landmarks):
-        if not landmarks: return False
-        wrist = landmarks.landmark[mp_holistic.HandLandmark.WRIST]
-        nose = landmarks.landmark[mp_holistic.PoseLandmark.NOSE]
-        distance = ((wrist.x - nose.x)**2 + (wrist.y - nose.y)**2)**0.5
-        return distance < 0.2
-        
-    def detect_crossed_hands(landmarks_left, landmarks_right):
-        if not landmarks_left or not landmarks_right: return False
-        left_wrist = landmarks_left.landmark[mp_holistic.HandLandmark.WRIST]
-        right_wrist = landmarks_right.landmark[mp_holistic.HandLandmark.WRIST]
-        distance = ((left_wrist.x - right_wrist.x)**2 + (left_wrist.y - right_wrist.y)**2)**0.5
-        return distance < 0.25
-        
-    def detect_both_hands_up(landmarks_left, landmarks_right):
-        if not landmarks_left or not landmarks_right: return False
-        left_wrist = landmarks_left.landmark[mp_holistic.HandLandmark.WRIST]
-        right_wrist = landmarks_right.landmark[mp_holistic.HandLandmark.WRIST]
-        return left_wrist.y < 0.5 and right_wrist.y < 0.5
-        
-    def detect_help_sign(landmarks):
-        if not landmarks: return False
-        thumb_tip = landmarks.landmark[mp_holistic.HandLandmark.THUMB_TIP]
-        thumb_ip = landmarks.landmark[mp_holistic.HandLandmark.THUMB_IP]
-        return thumb_tip.y < thumb_ip.y and abs(thumb_tip.x - thumb_ip.x) < 0.1
-
-    if 'last_wave_time' not in globals():
-        global last_wave_time
-        last_wave_time = current_time
-        
-    if 'wave_count' not in globals():
-        global wave_count
-        wave_count = 0
-
-    if detect_wave(results.right_hand_landmarks) or detect_wave(results.left_hand_landmarks):
-        if current_time - last_gesture_time > 3:
-            gestures.append({
-                "type": "Waving Hands",
-                "message": "HELP NEEDED - WAVING HANDS",
-                "description": "Person is waving hands for help"
-            })
-            last_gesture_time = current_time
-            wave_count = 0
-
-    if results.pose_landmarks and (detect_hand_on_mouth(results.right_hand_landmarks) or detect_hand_on_mouth(results.left_hand_landmarks)):
-        if current_time - last_gesture_time > 3:
-            gestures.append({
-                "type": "Hand on Mouth",
-                "message": "DISTRESS SIGNAL - HAND ON MOUTH",
-                "description": "Person has hand on mouth indicating distress"
-            })
-            last_gesture_time = current_time
-
-    if detect_crossed_hands(results.left_hand_landmarks, results.right_hand_landmarks):
-        if current_time - last_gesture_time > 3:
-            gestures.append({
-                "type": "Crossed Hands",
-                "message": "DISTRESS SIGNAL - CROSSED HANDS",
-                "description": "Person has crossed hands indicating distress"
-            })
-            last_gesture_time = current_time
-
-    if detect_raised_hand(results.left_hand_landmarks) or detect_raised_hand(results.right_hand_landmarks):
-        if current_time - last_gesture_time > 3:
-            gestures.append({
-                "type": "Raised Hand",
-                "message": "DISTRESS SIGNAL - RAISED HAND",
-                "description": "Person has raised one hand in distress"
-            })
-            last_gesture_time = current_time
-
-    if detect_both_hands_up(results.left_hand_landmarks, results.right_hand_landmarks):
-        if current_time - last_gesture_time > 3:
-            gestures.append({
-                "type": "Both Hands Up",
-                "message": "EMERGENCY ALERT - BOTH HANDS UP",
-                "description": "Person has raised both hands in emergency"
-            })
-            last_gesture_time = current_time
-            
-    if (results.right_hand_landmarks and detect_help_sign(results.right_hand_landmarks)) or \
-       (results.left_hand_landmarks and detect_help_sign(results.left_hand_landmarks)):
-        if current_time - last_gesture_time > 3:
-            gestures.append({
-                "type": "Help Sign",
-                "message": "HELP SIGNAL - THUMB UP",
-                "description": "Person is showing thumb up for help"
-            })
-            last_gesture_time = current_time
-
+    for gesture in session.gesture_engine.update(track_id, results, current_time):
+        if current_time - session.last_gesture_time > GESTURE_COOLDOWN:
+            gestures.append(gesture)
+            session.last_gesture_time = current_time
     return gestures
 
 def list_cameras():
-    """List all available cameras."""
-    available_cameras = []
-    print("Scanning for available cameras...")
-    
-    # Try different camera backends
-    backends = [
-        cv2.CAP_DSHOW,  # DirectShow (Windows)
-        cv2.CAP_MSMF,   # Media Foundation (Windows)
-        cv2.CAP_ANY     # Any available backend
-    ]
-    
-    for backend in backends:
-        print(f"Trying backend: {backend}")
-        for i in range(10):  # Check first 10 indexes
-            try:
-                cap = cv2.VideoCapture(i + backend)
-                if cap.isOpened():
-                    ret, frame = cap.read()
-                    if ret and frame is not None:
-                        print(f"Found working camera at index {i} with backend {backend}")
-                        available_cameras.append(i)
-                    cap.release()
-            except Exception as e:
-                print(f"Error checking camera {i} with backend {backend}: {str(e)}")
-                continue
-    
-    print(f"Found {len(available_cameras)} available cameras: {available_cameras}")
-    return available_cameras
-
-def process_live_camera(frame):
-    """Process a single frame for live camera analysis."""
-    global last_alert_time, wave_count, last_wave_time
-    try:
-        # Initialize wave_count and last_wave_time if not already set
-        if 'wave_count' not in globals():
-            wave_count = 0
-        if 'last_wave_time' not in globals():
-            last_wave_time = time.time()
-            
-        nighttime = is_nighttime()
-        detections = []
+    """List all available camera indices (scans now; see camera_discovery.get_cameras for the cache)."""
+    return [device["index"] for device in scan_cameras() or []]
+
+def detect_people_batch(frames, sessions, model):
+    """Run YOLO on frames from one or more sessions in a single call, then the
+    gender model on all their new tracks in a single call.
+
+    Returns the classified person dicts per frame. Stage times are split
+    evenly over the frames and recorded on each session's scheduler.
+    """
+    start = time.time()
+    batch_persons = detect_persons_batch(frames, model, PERSON_CONFIDENCE_THRESHOLD)
+    yolo_time = (time.time() - start) / len(frames)
+
+    start = time.time()
+    trackers = [session.tracker for session in sessions]
+    batch_people = classify_persons_batch(frames, batch_persons, FACE_HEIGHT_RATIO, trackers)
+    gender_time = (time.time() - start) / len(frames)
+    for session, persons in zip(sessions, batch_persons):
+        session.scheduler.record("yolo", yolo_time)
+        if persons:
+            session.scheduler.record("gender", gender_time)
+    return batch_people
+
+def start_live_frame(frame, session):
+    """Motion gate and stage plan for one frame.
+
+    Returns the scheduler's plan, or None when the motion gate found the frame
+    static and nothing should run.
+    """
+    if session.motion_gate and not session.motion_gate.check(frame):
+        session.gated = True
+        return None
+    if session.gated:
+        # Motion is back: look for people right away
+        session.gated = False
+        session.scheduler.request_detect()
+    return session.scheduler.plan()
+
+def finish_live_frame(frame, session, plan, people):
+    """Apply the more men, lone woman and SOS gesture rules to one frame.
+
+    `people` are the frame's classified person dicts when YOLO ran on it
+    (`plan["detect"]`); otherwise the session's tracks stand in for them.
+    Returns the detections that fired.
+    """
+    scheduler = session.scheduler
+    nighttime = is_nighttime()
+    detections = []
+
+    if not plan["detect"]:
+        # Between YOLO frames people follow their tracks; the gender rules
+        # only re-run on fresh detections
+        people = tracked_people(session.tracker, plan["track_steps"])
+    elif len(people) > 0:
+        # Reset gender counts for this frame
+        frame_male_count = 0
+        frame_female_count = 0
+        
+        for person in people:
+            # Track gender classification
+            gender = gender_decision(person["gender"], person["confidence"], GENDER_CONFIDENCE_THRESHOLD)
+            if gender:
+                if gender == "Male":
+                    frame_male_count += 1
+                elif gender == "Female":
+                    frame_female_count += 1
         
-        # ---- YOLO: Person Detection ----
-        results = yolo_model(frame)
-        persons = []
-        for result in results:
-            for box in result.boxes:
-                cls = int(box.cls[0])
-                conf = float(box.conf[0])
-                if cls == 0 and conf > PERSON_CONFIDENCE_THRESHOLD:
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    persons.append((x1, y1, x2, y2))
-
-        if len(persons) > 0:
-            # Reset gender counts for this frame
-            frame_male_count = 0
-            frame_female_count = 0
-            
-            # Classify gender for each person
-            for x1, y1, x2, y2 in persons:
-                face_height = int((y2 - y1) * 0.4)
-                face_img = frame[y1:y1+face_height, x1:x2]
-                if face_img.size > 0:
-                    gender, confidence = classify_gender(face_img)
-                    
-                    # Track gender classification
-                    if gender and confidence > GENDER_CONFIDENCE_THRESHOLD:
-                        if gender == "Male":
-                            frame_male_count += 1
-                        elif gender == "Female":
-                            frame_female_count += 1
-            
-            # Check if more men than women in this frame
-            current_time = time.time()
-            if frame_male_count > frame_female_count and frame_male_count > 0:
-                if current_time - last_alert_time > ALERT_COOLDOWN:
-                    alert_msg = f"MORE MEN THAN WOMEN DETECTED ({frame_male_count} men, {frame_female_count} women)"
-                    frame = show_alert(frame, alert_msg)
-                    play_alert_sound()
+        # Check if more men than women in this frame
+        current_time = time.time()
+        if frame_male_count > frame_female_count and frame_male_count > 0:
+            if current_time - session.last_alert_time > ALERT_COOLDOWN:
+                alert_msg = f"MORE MEN THAN WOMEN DETECTED ({frame_male_count} men, {frame_female_count} women)"
+                detections.append({
+                    "type": "More Men",
+                    "event": alert_msg,
+                    "male_count": frame_male_count,
+                    "female_count": frame_female_count
+                })
+                raise_alert(session, detections[-1])
+                session.last_alert_time = current_time
+
+        # Lone woman detection
+        if len(people) == 1:
+            # Reuse the classification made above instead of cropping again
+            if people[0]["classified"]:
+                gender, confidence = people[0]["gender"], people[0]["confidence"]
+                current_time = time.time()
+                
+                if (confidence > GENDER_CONFIDENCE_THRESHOLD and nighttime and 
+                    (current_time - session.last_alert_time >= ALERT_COOLDOWN)):
+                    alert_msg = f"PERSON DETECTED AT NIGHT ({gender})"
                     detections.append({
-                        "type": "More Men",
-                        "event": alert_msg,
-                        "male_count": frame_male_count,
-                        "female_count": frame_female_count
+                        "type": "Lone Woman",
+                        "event": alert_msg
                     })
-                    last_alert_time = current_time
-
-            # Lone woman detection
-            if len(persons) == 1:
-                x1, y1, x2, y2 = persons[0]
-                face_height = int((y2 - y1) * 0.4)
-                face_img = frame[y1:y1+face_height, x1:x2]
-                if face_img.size > 0:
-                    gender, confidence = classify_gender(face_img)
-                    current_time = time.time()
-                    
-                    if (confidence > GENDER_CONFIDENCE_THRESHOLD and nighttime and 
-                        (current_time - last_alert_time >= ALERT_COOLDOWN)):
-                        alert_msg = f"PERSON DETECTED AT NIGHT ({gender})"
-                        frame = show_alert(frame, alert_msg)
-                        play_alert_sound()
-                        detections.append({
-                            "type": "Lone Woman",
-                            "event": alert_msg
-                        })
-                        last_alert_time = current_time
-
-        # ---- MediaPipe: SOS Gesture Detection ----
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results_mediapipe = holistic.process(rgb_frame)
-        gestures = detect_sos_gesture(results_mediapipe)
-        
-        for gesture in gestures:
-            frame = show_alert(frame, gesture["message"])
-            play_alert_sound()
+                    raise_alert(session, detections[-1])
+                    session.last_alert_time = current_time
+
+    # ---- MediaPipe: SOS Gesture Detection on each person ----
+    # Skipped entirely when nobody is there
+    landmarked = []
+    if plan["gestures"] and people:
+        start = time.time()
+        landmarked = session.landmarker.process(frame, people)
+        scheduler.record("gestures", time.time() - start)
+    for person, results_mediapipe in landmarked:
+        for gesture in detect_sos_gesture(results_mediapipe, session, person["track_id"]):
             detections.append({
                 "type": "SOS Gesture",
                 "event": gesture["message"],
                 "gesture_type": gesture["type"],
-                "gesture_description": gesture["description"]
+                "gesture_description": gesture["description"],
+                "person_box": list(person["box"]),
+                "track_id": person["track_id"]
             })
+            raise_alert(session, detections[-1])
+
+    scheduler.adjust()
+    return detections
+
+def process_live_camera(frame, session=None):
+    """Process a single frame for live camera analysis.
+
+    `session` (a LiveCameraSession) holds the stream's cooldowns and tracks;
+    without one a shared default session is used. The session's
+    FrameScheduler decides which stages run on this frame. Frames the
+    session's motion gate finds static are skipped and return no detections.
+    """
+    session = session or default_session
+    try:
+        plan = start_live_frame(frame, session)
+        if plan is None:
+            return []
 
-        return detections
+        people = []
+        if plan["detect"]:
+            # ---- YOLO: Person Detection + gender ----
+            with model_pool.checkout() as model:
+                people = detect_people_batch([frame], [session], model)[0]
+        return finish_live_frame(frame, session, plan, people)
     except Exception as e:
         print(f"Error in process_live_camera: {str(e)}")
-        return [] 
\ No newline at end of file
+        return []
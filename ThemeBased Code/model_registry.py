@@ -0,0 +1,246 @@
+import copy
+import os
+import threading
+import time
+
+# torch, the runtimes and the model code are imported by the loaders, so
+# importing the registry is cheap and models load on first use or warm-up
+
+# Model settings
+YOLO_WEIGHTS = "yolov8n.pt"
+WARMUP_MODELS = ("yolo", "gender")  # Registry models loaded and run once by warm_up
+WARMUP_IMAGE_SIZE = 640  # Side of the blank frame used for the YOLO warm-up inference
+
+_backend = None
+
+def get_backend():
+    """Backend the models run on, chosen on first use (see inference_backend.INFERENCE_BACKEND)."""
+    global _backend
+    if _backend is None:
+        from inference_backend import select_backend
+        _backend = select_backend()
+    return _backend
+
+def _load_yolo():
+    from inference_backend import load_yolo
+    return load_yolo(YOLO_WEIGHTS, get_backend())
+
+def _gender_weights_path():
+    """Where torchvision caches the pretrained MobileNetV2 weights."""
+    import torch
+    try:
+        from torchvision.models import MobileNet_V2_Weights
+        url = MobileNet_V2_Weights.IMAGENET1K_V1.url
+    except ImportError:
+        from torchvision.models.mobilenetv2 import model_urls
+        url = model_urls["mobilenet_v2"]
+    return os.path.join(torch.hub.get_dir(), "checkpoints", os.path.basename(url))
+
+def _load_gender():
+    from gender_quantization import GENDER_QUANTIZATION, load_quantized_gender_model
+    from inference_backend import load_classifier
+    import torchvision.models as models
+    if GENDER_QUANTIZATION:
+        # The INT8 model runs on PyTorch's quantized kernels whatever the backend
+        try:
+            return load_quantized_gender_model(GENDER_QUANTIZATION)
+        except Exception as e:
+            print(f"Error loading the INT8 gender model, using FP32: {str(e)}")
+    model = models.mobilenet_v2(pretrained=True)
+    model.eval()
+    return load_classifier(model, "gender_mobilenet_v2", get_backend(), _gender_weights_path())
+
+def _warm_yolo(model):
+    import numpy as np
+    model(np.zeros((WARMUP_IMAGE_SIZE, WARMUP_IMAGE_SIZE, 3), dtype=np.uint8), verbose=False)
+
+def _warm_gender(model):
+    import torch
+    from person_detection import GENDER_INPUT_SIZE
+    with torch.no_grad():
+        model(torch.zeros(1, 3, GENDER_INPUT_SIZE, GENDER_INPUT_SIZE))
+
+# Loader and warm-up inference for every model the processors use, by registry name
+MODEL_LOADERS = {
+    "yolo": _load_yolo,
+    "gender": _load_gender
+}
+MODEL_WARMERS = {
+    "yolo": _warm_yolo,
+    "gender": _warm_gender
+}
+
+_models = {}
+_load_info = {}
+_registry_lock = threading.Lock()
+# Warm-up state per step: the models, "imports" and steps added with register_warmup
+_states = {}
+_extra_warmups = {}
+_state_lock = threading.Lock()
+_warmup_thread = None
+
+def get_model(name):
+    """Return the process-wide instance of a model, loading it on first use."""
+    with _registry_lock:
+        if name not in _models:
+            from inference_backend import model_backend
+            start = time.time()
+            model = MODEL_LOADERS[name]()
+            _load_info[name] = {"load_time": time.time() - start, "instances": 1,
+                                "memory_mb": model_memory_mb(model)}
+            _models[name] = model
+            print(f"Loaded model '{name}' on {model_backend(model)} in "
+                  f"{_load_info[name]['load_time']:.2f}s ({_load_info[name]['memory_mb']:.1f} MB)")
+        return _models[name]
+
+def yolo_instance():
+    """A YOLO wrapper with its own predictor that shares the registry's weights.
+
+    Ultralytics predictors keep per-call state, so threads must not share one,
+    but the network itself can be shared: the copy starts without a predictor
+    and builds its own around the same layers on first use. On an exported
+    backend each predictor opens its own runtime session on the cached file.
+    """
+    base = get_model("yolo")
+    instance = copy.copy(base)
+    instance.predictor = None
+    with _registry_lock:
+        _load_info["yolo"]["instances"] += 1
+    return instance
+
+def _path_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(path) for name in names)
+    return os.path.getsize(path)
+
+def _tensor_bytes(value):
+    if isinstance(value, (tuple, list)):
+        return sum(_tensor_bytes(item) for item in value)
+    if hasattr(value, "element_size") and hasattr(value, "numel"):
+        return value.element_size() * value.numel()
+    return 0
+
+def model_memory_mb(model):
+    """Weight memory of a torch model (or a YOLO wrapper) in MB.
+
+    Torch models add up the size of their parameters and buffers, taken from
+    the state dict so INT8 packed weights count too; exported models report
+    the size of their cached file, which is what the runtime loads as
+    weights. Measured once by get_model; model_report reuses that value.
+    """
+    module = getattr(model, "model", model)
+    path = module if isinstance(module, str) else getattr(model, "path", None)
+    if path is not None:
+        return _path_size(path) / (1024 * 1024)
+    return sum(_tensor_bytes(value) for value in module.state_dict().values()) / (1024 * 1024)
+
+def model_report():
+    """Loaded models with their memory, load time and number of wrappers sharing the weights."""
+    # A snapshot, so the report does not wait for a model that is still loading
+    loaded = list(_models.items())
+    if not loaded:
+        return {}
+    from inference_backend import model_backend
+    return {
+        name: {
+            "backend": model_backend(model),
+            "memory_mb": round(_load_info[name]["memory_mb"], 2),
+            "load_time": round(_load_info[name]["load_time"], 3),
+            "instances": _load_info[name]["instances"]
+        }
+        for name, model in loaded
+    }
+
+# ---- Warm-up and readiness ----
+
+def _set_state(name, **fields):
+    with _state_lock:
+        _states.setdefault(name, {"state": "pending", "load_time": None,
+                                  "warmup_time": None, "error": None}).update(fields)
+
+def register_warmup(name, warm):
+    """Add a step (a callable) to the warm-up, e.g. building a MediaPipe graph once."""
+    _extra_warmups[name] = warm
+    _set_state(name)
+
+def _run_step(name, step):
+    try:
+        step()
+        return True
+    except Exception as e:
+        _set_state(name, state="failed", error=str(e))
+        print(f"Warm-up of '{name}' failed: {str(e)}")
+        return False
+
+def warm_up(names=WARMUP_MODELS, prepare=None, after=None):
+    """Load every model and run one dummy inference on it, recording the timings.
+
+    `prepare` runs first (e.g. importing the processors, which register their
+    own warm-up steps) and `after` runs once everything else is done.
+    """
+    if prepare is not None:
+        _set_state("imports", state="loading")
+        start = time.time()
+        if _run_step("imports", prepare):
+            _set_state("imports", state="ready", load_time=time.time() - start)
+
+    for name in names:
+        _set_state(name, state="loading")
+        start = time.time()
+        if not _run_step(name, lambda: get_model(name)):
+            continue
+        _set_state(name, state="warming", load_time=time.time() - start)
+        start = time.time()
+        if _run_step(name, lambda: MODEL_WARMERS[name](get_model(name))):
+            _set_state(name, state="ready", warmup_time=time.time() - start)
+
+    for name, warm in list(_extra_warmups.items()):
+        _set_state(name, state="warming")
+        start = time.time()
+        if _run_step(name, warm):
+            _set_state(name, state="ready", warmup_time=time.time() - start)
+
+    with _state_lock:
+        failed = [name for name, state in _states.items() if state["state"] == "failed"]
+    print(f"Warm-up finished{', failed: ' + ', '.join(failed) if failed else ''}")
+    if after is not None:
+        try:
+            after()
+        except Exception as e:
+            print(f"Error after warm-up: {str(e)}")
+
+def start_warm_up(names=WARMUP_MODELS, prepare=None, after=None):
+    """Run warm_up on a background thread, once per process."""
+    global _warmup_thread
+    with _state_lock:
+        if _warmup_thread is not None:
+            return _warmup_thread
+        _warmup_thread = threading.Thread(target=warm_up, args=(names, prepare, after),
+                                          name="model-warmup", daemon=True)
+    # Listed as pending right away, so readiness is never reported before they ran
+    for name in names:
+        _set_state(name)
+    if prepare is not None:
+        _set_state("imports")
+    _warmup_thread.start()
+    return _warmup_thread
+
+def readiness():
+    """Per-step warm-up state; ready once every step has loaded and run.
+
+    With USE_INFERENCE_SERVER the models live in the inference server, so it
+    is listed as a step too, ready only while it accepts connections.
+    """
+    from inference_server import USE_INFERENCE_SERVER, server_state
+    with _state_lock:
+        states = {
+            name: {key: round(value, 3) if isinstance(value, float) else value
+                   for key, value in state.items()}
+            for name, state in _states.items()
+        }
+    if USE_INFERENCE_SERVER:
+        states["inference_server"] = server_state()
+    warming = _warmup_thread is not None and _warmup_thread.is_alive()
+    ready = bool(states) and not warming and all(state["state"] == "ready" for state in states.values())
+    return {"ready": ready, "models": states}
@@ -0,0 +1,66 @@
+import cv2
+import numpy as np
+
+# Motion gate settings
+MOTION_GATE_WIDTH = 160  # Frames are compared at this width (height keeps the aspect ratio)
+MOTION_DIFF_THRESHOLD = 25  # Grey-level change for a pixel to count as moving
+MOTION_MIN_AREA = 0.002  # Fraction of moving pixels that counts as motion
+MOTION_BACKGROUND_ALPHA = 0.05  # How fast the background absorbs slow changes such as lighting
+MOTION_HOLD_FRAMES = 5  # Keep the gate open this many frames after the last motion
+MOTION_MAX_GATED = 30  # Let a frame through after this many gated frames in a row
+
+class MotionGate:
+    """Cheap background-subtraction check deciding whether a frame needs the models.
+
+    Frames are downscaled, converted to grey and blurred, then compared with a
+    running-average background. check() returns False for frames where nothing
+    moved, so callers can skip detection and keep their last result. Any
+    motion re-opens the gate on that very frame, and it stays open for
+    MOTION_HOLD_FRAMES afterwards. Every MOTION_MAX_GATED gated frames one is
+    let through anyway, so a static scene is still re-checked now and then.
+    """
+
+    def __init__(self, width=MOTION_GATE_WIDTH, diff_threshold=MOTION_DIFF_THRESHOLD,
+                 min_area=MOTION_MIN_AREA, hold_frames=MOTION_HOLD_FRAMES, max_gated=MOTION_MAX_GATED):
+        self.width = width
+        self.diff_threshold = diff_threshold
+        self.min_area = min_area
+        self.hold_frames = hold_frames
+        self.max_gated = max_gated
+        self.background = None
+        self.hold = 0
+        self.gated_in_row = 0
+        # Frames checked and frames the gate kept from the models
+        self.frames_seen = 0
+        self.frames_gated = 0
+
+    def _prepare(self, frame):
+        height, width = frame.shape[:2]
+        size = (self.width, max(1, int(height * self.width / width)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        grey = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(grey, (5, 5), 0).astype(np.float32)
+
+    def motion_fraction(self, frame):
+        """Fraction of pixels that differ from the background; updates the background."""
+        grey = self._prepare(frame)
+        if self.background is None or self.background.shape != grey.shape:
+            self.background = grey
+            return 1.0
+        moving = cv2.absdiff(grey, self.background) > self.diff_threshold
+        cv2.accumulateWeighted(grey, self.background, MOTION_BACKGROUND_ALPHA)
+        return float(np.count_nonzero(moving)) / moving.size
+
+    def check(self, frame):
+        """True if the frame should go through the models."""
+        self.frames_seen += 1
+        if self.motion_fraction(frame) >= self.min_area:
+            self.hold = self.hold_frames
+        elif self.hold > 0:
+            self.hold -= 1
+        elif self.gated_in_row < self.max_gated:
+            self.gated_in_row += 1
+            self.frames_gated += 1
+            return False
+        self.gated_in_row = 0
+        return True
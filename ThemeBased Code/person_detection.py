@@ -0,0 +1,135 @@
+import cv2
+import numpy as np
+import torch
+from model_registry import get_model
+from inference_server import USE_INFERENCE_SERVER, InferenceClient, local_client
+
+# Person detection and gender classification shared by the video and live
+# processors, the inference server and the INT8 comparison harness; each
+# processor passes its own thresholds
+
+# Gender model settings
+GENDER_INPUT_SIZE = 224  # Side of the square crop the gender model takes
+
+def crops_to_tensor(crops):
+    """Resize BGR crops to the gender model's input and stack them into one float tensor."""
+    batch = np.stack([cv2.resize(crop, (GENDER_INPUT_SIZE, GENDER_INPUT_SIZE)) for crop in crops])
+    return torch.from_numpy(batch).float().permute(0, 3, 1, 2) / 255.0
+
+def gender_label(pred_idx):
+    return "Female" if pred_idx % 2 == 0 else "Male"
+
+def predictions_from_output(output):
+    """(gender, confidence) for every row of the gender model's logits."""
+    confidences, pred_idxs = torch.softmax(output, dim=1).max(dim=1)
+    return [(gender_label(pred_idx), confidence)
+            for pred_idx, confidence in zip(pred_idxs.tolist(), confidences.tolist())]
+
+def gender_decision(gender, confidence, threshold):
+    """The gender the alert rules act on: only above the processor's threshold, else None."""
+    return gender if gender and confidence > threshold else None
+
+def classify_gender_batch(face_imgs):
+    """Classify a list of face crops with a single MobileNetV2 forward pass.
+
+    Returns one (gender, confidence) tuple per crop, in input order.
+    """
+    if not face_imgs:
+        return []
+    try:
+        if USE_INFERENCE_SERVER:
+            return local_client().classify(face_imgs)
+        with torch.no_grad():
+            output = get_model("gender")(crops_to_tensor(face_imgs))
+        predictions = predictions_from_output(output)
+        for gender, confidence in predictions:
+            print(f"Gender classification: {gender} with confidence {confidence:.2f}")
+        return predictions
+    except Exception as e:
+        print(f"Error in gender classification: {e}")
+        return [(None, 0.0)] * len(face_imgs)
+
+def extract_persons(result, min_confidence, verbose=False):
+    """Return the person boxes (x1, y1, x2, y2) above `min_confidence` in a single YOLO result."""
+    persons = []
+    for box in result.boxes:
+        cls = int(box.cls[0])
+        conf = float(box.conf[0])
+        if cls == 0 and conf > min_confidence:
+            x1, y1, x2, y2 = map(int, box.xyxy[0])
+            persons.append((x1, y1, x2, y2))
+            if verbose:
+                print(f"Person detected with confidence {conf:.2f}")
+    return persons
+
+def detect_persons_batch(frames, model, min_confidence, verbose=False):
+    """Run YOLO (or the inference server) once over a list of frames; one person list per frame."""
+    if not frames:
+        return []
+    if isinstance(model, InferenceClient):
+        return model.detect(frames, min_confidence)
+    results = model(list(frames))
+    return [extract_persons(result, min_confidence, verbose) for result in results]
+
+def classify_persons_batch(frames, batch_persons, face_height_ratio, trackers=None, min_face_size=None):
+    """Classify every person crop of a batch of frames in one gender model call.
+
+    The face crop is the top `face_height_ratio` of each person box.
+    Returns, per frame, a list of person dicts aligned with the YOLO boxes:
+    `box`, `track_id`, `gender`, `confidence`, `classified` and `counted` (face
+    crop at least `min_face_size` pixels, so it counts towards the men/women
+    totals). Each crop is classified once and the result is shared by the
+    more men and lone woman rules. Crops too small to count are only
+    classified when they are the frame's only person (lone woman rule).
+
+    `trackers` gives each frame's PersonTracker (frames of one tracker must
+    come in order; frames may come from different cameras): people keep the
+    gender cached on their track and only new or due-for-recheck tracks are
+    sent to the model.
+    """
+    trackers = trackers or [None] * len(frames)
+    crops = []
+    owners = []
+    batch_people = []
+    queued_tracks = set()
+    for frame, persons, tracker in zip(frames, batch_persons, trackers):
+        tracks = tracker.update(persons) if tracker else [None] * len(persons)
+        people = []
+        for (x1, y1, x2, y2), track in zip(persons, tracks):
+            face_height = int((y2 - y1) * face_height_ratio)
+            face_img = frame[y1:y1+face_height, x1:x2]
+            person = {"box": (x1, y1, x2, y2), "track_id": track["track_id"] if track else None,
+                      "gender": None, "confidence": 0.0, "classified": False, "counted": False}
+            people.append((person, track))
+            if face_img.size == 0:
+                continue
+            person["counted"] = min_face_size is None or (face_img.shape[0] >= min_face_size and
+                                                          face_img.shape[1] >= min_face_size)
+            if not (person["counted"] or len(persons) == 1):
+                continue
+            if track is not None:
+                track_key = (id(tracker), track["track_id"])
+                if track_key in queued_tracks or not tracker.needs_gender(track):
+                    tracker.cache_hits += 1
+                    continue
+                queued_tracks.add(track_key)
+            crops.append(face_img)
+            owners.append((person, track, tracker))
+        batch_people.append(people)
+
+    for (person, track, tracker), (gender, confidence) in zip(owners, classify_gender_batch(crops)):
+        if track is not None:
+            tracker.add_gender(track, gender, confidence)
+        else:
+            person["gender"] = gender
+            person["confidence"] = confidence
+            person["classified"] = True
+
+    # Tracked people take the (possibly just updated) gender cached on their track
+    for people in batch_people:
+        for person, track in people:
+            if track is not None and track["classified_at"] is not None:
+                person["gender"] = track["gender"]
+                person["confidence"] = track["confidence"]
+                person["classified"] = True
+    return [[person for person, _ in people] for people in batch_people]
@@ -0,0 +1,258 @@
+import threading
+import cv2
+import numpy as np
+import mediapipe as mp
+from person_tracker import TRACK_MAX_MISSED
+
+# Person ROI settings
+PERSON_ROI_PADDING = 0.15  # Grow each person box by this fraction so raised hands stay in the crop
+MAX_GESTURE_PERSONS = 4  # Largest people checked for gestures in one frame
+MIN_ROI_SIZE = 32  # Skip person crops smaller than this many pixels on a side
+
+# Tiered gesture settings: a cheap pose pass screens each person before full Holistic runs
+SCREEN_OPTIONS = dict(model_complexity=0, enable_segmentation=False,
+                      min_detection_confidence=0.5, min_tracking_confidence=0.5)
+ESCALATION_FRAMES = 5  # Calls a tracked person keeps getting full Holistic after the screen fires
+SCREEN_MIN_VISIBILITY = 0.5  # Pose landmarks less visible than this are ignored by the screen
+SCREEN_WRISTS_CLOSE = 0.25  # Wrists closer than this (fraction of the crop) count as a candidate
+
+mp_holistic = mp.solutions.holistic
+mp_pose = mp.solutions.pose
+ARMS = [
+    (mp_pose.PoseLandmark.LEFT_WRIST, mp_pose.PoseLandmark.LEFT_ELBOW, mp_pose.PoseLandmark.LEFT_SHOULDER),
+    (mp_pose.PoseLandmark.RIGHT_WRIST, mp_pose.PoseLandmark.RIGHT_ELBOW, mp_pose.PoseLandmark.RIGHT_SHOULDER)
+]
+
+def box_area(box):
+    x1, y1, x2, y2 = box
+    return max(0, x2 - x1) * max(0, y2 - y1)
+
+def person_roi(frame, box, padding=PERSON_ROI_PADDING):
+    """Padded person box clipped to the frame, as (x1, y1, x2, y2)."""
+    x1, y1, x2, y2 = box
+    pad_x = int((x2 - x1) * padding)
+    pad_y = int((y2 - y1) * padding)
+    height, width = frame.shape[:2]
+    return (max(0, x1 - pad_x), max(0, y1 - pad_y),
+            min(width, x2 + pad_x), min(height, y2 + pad_y))
+
+def is_gesture_candidate(pose_landmarks):
+    """True when the pose could be an SOS gesture: a forearm raised (wrist above
+    its elbow or shoulder) or the wrists close together."""
+    if not pose_landmarks:
+        return False
+    points = pose_landmarks.landmark
+    wrists = []
+    for wrist, elbow, shoulder in ARMS:
+        if points[wrist].visibility < SCREEN_MIN_VISIBILITY:
+            continue
+        wrists.append(points[wrist])
+        if points[wrist].y < points[elbow].y or points[wrist].y < points[shoulder].y:
+            return True
+    if len(wrists) == 2:
+        return abs(wrists[0].x - wrists[1].x) + abs(wrists[0].y - wrists[1].y) < SCREEN_WRISTS_CLOSE
+    return False
+
+def warm_up_landmarker(screen_options=None, **holistic_options):
+    """Build and run the MediaPipe graphs once, so their model files are loaded
+    (and the heavy pose model downloaded) before the first real frame."""
+    blank = np.zeros((256, 256, 3), dtype=np.uint8)
+    graphs = [mp_holistic.Holistic(**holistic_options)]
+    if screen_options is not None:
+        graphs.append(mp_pose.Pose(**screen_options))
+    for graph in graphs:
+        graph.process(blank)
+        graph.close()
+
+class GraphBudget:
+    """Cap on the MediaPipe graphs a group of landmarkers may hold at once.
+
+    Every graph keeps its own model buffers and calculator threads, so with
+    many live sessions the per-person instances add up. Landmarkers sharing a
+    budget skip people they cannot get a graph for, until graphs of people who
+    left are closed.
+    """
+
+    def __init__(self, limit):
+        self.limit = max(1, int(limit))
+        self.in_use = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            if self.in_use >= self.limit:
+                return False
+            self.in_use += 1
+            return True
+
+    def release(self):
+        with self.lock:
+            self.in_use = max(0, self.in_use - 1)
+
+class PersonLandmarker:
+    """Run MediaPipe Holistic on YOLO person crops instead of the whole frame.
+
+    Holistic only follows one body per instance, so every tracked person gets
+    their own instance (keyed by track ID) that keeps tracking between frames.
+    People without a track ID share one instance in static image mode.
+    Instances of tracks that have not been seen for TRACK_MAX_MISSED calls are
+    closed. Landmarks are normalized to the person's crop.
+
+    With `screen_options` the landmarker is tiered: each person first gets a
+    cheap MediaPipe Pose pass, and full Holistic only runs when that pose is
+    a gesture candidate (see is_gesture_candidate). A tracked person then
+    stays on full Holistic for `escalation_frames` calls, renewed while the
+    candidate pose lasts, so temporal gestures such as waving keep a full
+    landmark history. Only Holistic results are returned.
+
+    With a `graph_budget` (GraphBudget) every graph the landmarker opens is
+    counted against it; people who get no graph are not checked on that call.
+    """
+
+    def __init__(self, max_persons=MAX_GESTURE_PERSONS, screen_options=None,
+                 escalation_frames=ESCALATION_FRAMES, graph_budget=None, **holistic_options):
+        self.max_persons = max_persons
+        self.graph_budget = graph_budget
+        self.holistic_options = holistic_options
+        self.screen_options = screen_options
+        self.escalation_frames = escalation_frames
+        self.instances = {}
+        self.screen_instances = {}
+        self.escalated = {}
+        self.last_seen = {}
+        self.static_instance = None
+        self.static_screen = None
+        self.calls = 0
+        # Frames skipped because nobody was there, person crops landmarked with
+        # Holistic, crops screened with the cheap pose pass and screens that escalated
+        self.frames_skipped = 0
+        self.crops_processed = 0
+        self.crops_screened = 0
+        self.escalations = 0
+        # People left unchecked because the graph budget was used up
+        self.crops_over_budget = 0
+
+    def _open_graph(self, graph_class, options):
+        """A new MediaPipe graph, or None when the graph budget is used up."""
+        if self.graph_budget is not None and not self.graph_budget.acquire():
+            return None
+        try:
+            return graph_class(**options)
+        except Exception:
+            self._close_graph(None)
+            raise
+
+    def _close_graph(self, graph):
+        if graph is not None:
+            graph.close()
+        if self.graph_budget is not None:
+            self.graph_budget.release()
+
+    def _instance_for(self, track_id):
+        if track_id is None:
+            if self.static_instance is None:
+                options = dict(self.holistic_options, static_image_mode=True)
+                self.static_instance = self._open_graph(mp_holistic.Holistic, options)
+            return self.static_instance
+        if track_id not in self.instances:
+            instance = self._open_graph(mp_holistic.Holistic, self.holistic_options)
+            if instance is None:
+                return None
+            self.instances[track_id] = instance
+        self.last_seen[track_id] = self.calls
+        return self.instances[track_id]
+
+    def _screen_for(self, track_id):
+        if track_id is None:
+            if self.static_screen is None:
+                self.static_screen = self._open_graph(mp_pose.Pose, dict(self.screen_options, static_image_mode=True))
+            return self.static_screen
+        if track_id not in self.screen_instances:
+            screen = self._open_graph(mp_pose.Pose, self.screen_options)
+            if screen is None:
+                return None
+            self.screen_instances[track_id] = screen
+        self.last_seen[track_id] = self.calls
+        return self.screen_instances[track_id]
+
+    def _needs_full(self, rgb_crop, track_id):
+        """Screen one crop; True when full Holistic should run on it."""
+        if self.screen_options is None or self.escalated.get(track_id, 0) > 0:
+            return True
+        screen = self._screen_for(track_id)
+        if screen is None:
+            self.crops_over_budget += 1
+            return False
+        self.crops_screened += 1
+        if not is_gesture_candidate(screen.process(rgb_crop).pose_landmarks):
+            return False
+        self.escalations += 1
+        if track_id is not None:
+            self.escalated[track_id] = self.escalation_frames
+        return True
+
+    def _update_escalation(self, track_id, results):
+        if self.screen_options is None or track_id is None:
+            return
+        remaining = self.escalated.get(track_id, 0) - 1
+        if is_gesture_candidate(results.pose_landmarks):
+            remaining = self.escalation_frames
+        if remaining > 0:
+            self.escalated[track_id] = remaining
+        else:
+            self.escalated.pop(track_id, None)
+
+    def _close_stale(self):
+        for track_id in [track_id for track_id, seen in self.last_seen.items()
+                         if self.calls - seen > TRACK_MAX_MISSED]:
+            for instances in (self.instances, self.screen_instances):
+                if track_id in instances:
+                    self._close_graph(instances.pop(track_id))
+            self.escalated.pop(track_id, None)
+            del self.last_seen[track_id]
+
+    def process(self, frame, people):
+        """Landmark each person dict's box; returns (person, holistic results) pairs.
+
+        Returns nothing without running MediaPipe when `people` is empty. Only the
+        `max_persons` largest people are checked; in tiered mode people whose
+        screen found no candidate pose are left out.
+        """
+        self.calls += 1
+        self._close_stale()
+        if not people:
+            self.frames_skipped += 1
+            return []
+
+        landmarked = []
+        for person in sorted(people, key=lambda person: box_area(person["box"]), reverse=True)[:self.max_persons]:
+            x1, y1, x2, y2 = person_roi(frame, person["box"])
+            if x2 - x1 < MIN_ROI_SIZE or y2 - y1 < MIN_ROI_SIZE:
+                continue
+            rgb_crop = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2RGB)
+            track_id = person.get("track_id")
+            if not self._needs_full(rgb_crop, track_id):
+                continue
+            instance = self._instance_for(track_id)
+            if instance is None:
+                self.crops_over_budget += 1
+                continue
+            results = instance.process(rgb_crop)
+            self.crops_processed += 1
+            self._update_escalation(track_id, results)
+            landmarked.append((person, results))
+        return landmarked
+
+    def close(self):
+        for instance in list(self.instances.values()) + list(self.screen_instances.values()):
+            self._close_graph(instance)
+        self.instances.clear()
+        self.screen_instances.clear()
+        self.escalated.clear()
+        self.last_seen.clear()
+        if self.static_instance is not None:
+            self._close_graph(self.static_instance)
+            self.static_instance = None
+        if self.static_screen is not None:
+            self._close_graph(self.static_screen)
+            self.static_screen = None
@@ -0,0 +1,118 @@
+import numpy as np
+
+# Tracker settings
+TRACK_IOU_THRESHOLD = 0.3  # Minimum IoU for a box to continue an existing track
+TRACK_MAX_MISSED = 10  # Updates a track may go unmatched before it is dropped
+GENDER_RECHECK_UPDATES = 30  # Re-classify a tracked person after this many updates
+
+def box_iou(boxes_a, boxes_b):
+    """IoU matrix between two arrays of (x1, y1, x2, y2) boxes."""
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-6), 0.0)
+
+class PersonTracker:
+    """Greedy IoU tracker giving YOLO person boxes a persistent track ID.
+
+    Each track predicts its next box with a constant-velocity step, so people
+    keep their ID between sampled frames. Tracks also cache the gender
+    classification for their person, see needs_gender/add_gender.
+    """
+
+    def __init__(self, iou_threshold=TRACK_IOU_THRESHOLD, max_missed=TRACK_MAX_MISSED,
+                 recheck_updates=GENDER_RECHECK_UPDATES):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.recheck_updates = recheck_updates
+        self.tracks = []
+        self.next_id = 1
+        self.updates = 0
+        # Gender model calls made vs. answered from a track's cache
+        self.classifications = 0
+        self.cache_hits = 0
+
+    def _predicted_box(self, track):
+        return np.asarray(track["box"], dtype=np.float32) + track["velocity"] * (track["missed"] + 1)
+
+    def predict_box(self, track, steps=1.0):
+        """Box the track is expected at `steps` updates after its last match, as ints."""
+        box = np.asarray(track["box"], dtype=np.float32) + track["velocity"] * steps
+        return tuple(int(round(value)) for value in box)
+
+    def update(self, boxes):
+        """Match this frame's boxes to tracks; returns one track dict per box."""
+        self.updates += 1
+        assigned = [None] * len(boxes)
+        unmatched_tracks = set(range(len(self.tracks)))
+
+        if self.tracks and boxes:
+            predicted = [self._predicted_box(track) for track in self.tracks]
+            ious = box_iou(predicted, boxes)
+            # Greedily take the best remaining track/box pair until IoU is too low
+            for flat_idx in np.argsort(-ious, axis=None):
+                track_idx, box_idx = np.unravel_index(flat_idx, ious.shape)
+                if ious[track_idx, box_idx] < self.iou_threshold:
+                    break
+                if track_idx not in unmatched_tracks or assigned[box_idx] is not None:
+                    continue
+                track = self.tracks[track_idx]
+                new_box = np.asarray(boxes[box_idx], dtype=np.float32)
+                steps = track["missed"] + 1
+                track["velocity"] = (new_box - np.asarray(track["box"], dtype=np.float32)) / steps
+                track["box"] = tuple(boxes[box_idx])
+                track["missed"] = 0
+                track["hits"] += 1
+                assigned[box_idx] = track
+                unmatched_tracks.discard(track_idx)
+
+        for track_idx in unmatched_tracks:
+            self.tracks[track_idx]["missed"] += 1
+        self.tracks = [track for track in self.tracks if track["missed"] <= self.max_missed]
+
+        for box_idx, box in enumerate(boxes):
+            if assigned[box_idx] is None:
+                track = {
+                    "track_id": self.next_id,
+                    "box": tuple(box),
+                    "velocity": np.zeros(4, dtype=np.float32),
+                    "missed": 0,
+                    "hits": 1,
+                    "gender_scores": {},
+                    "gender_counts": {},
+                    "gender": None,
+                    "confidence": 0.0,
+                    "classified_at": None
+                }
+                self.next_id += 1
+                self.tracks.append(track)
+                assigned[box_idx] = track
+        return assigned
+
+    def needs_gender(self, track):
+        """True if the track has no cached gender or it is due for a re-check."""
+        return (track["classified_at"] is None or
+                self.updates - track["classified_at"] >= self.recheck_updates)
+
+    def add_gender(self, track, gender, confidence):
+        """Fold a new classification into the track's cached gender.
+
+        Classifications are accumulated as confidence-weighted votes so a single
+        bad crop does not flip the person's gender.
+        """
+        track["classified_at"] = self.updates
+        self.classifications += 1
+        if not gender:
+            return
+        track["gender_scores"][gender] = track["gender_scores"].get(gender, 0.0) + confidence
+        track["gender_counts"][gender] = track["gender_counts"].get(gender, 0) + 1
+        best = max(track["gender_scores"], key=track["gender_scores"].get)
+        track["gender"] = best
+        track["confidence"] = track["gender_scores"][best] / track["gender_counts"][best]
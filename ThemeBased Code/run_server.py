@@ -0,0 +1,10 @@
+"""Start the HerWatch server.
+
+Worker processes started with "spawn" (video jobs, video shards) re-import
+the main module, so this entry point stays light and only imports app.py
+when it is actually run.
+"""
+
+if __name__ == "__main__":
+    from app import run_server
+    run_server()
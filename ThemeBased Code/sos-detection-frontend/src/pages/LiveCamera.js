@@ -28,6 +28,9 @@ import { motion, AnimatePresence } from 'framer-motion';
 const MotionCard = motion(Card);
 const MotionPaper = motion(Paper);
 
+// Fastest we ever send frames; the server's sustainable_fps can slow this down
+const MIN_FRAME_INTERVAL_MS = 100;
+
 const LiveCamera = () => {
   const [isAnalyzing, setIsAnalyzing] = useState(false);
   const [isCameraActive, setIsCameraActive] = useState(false);
@@ -41,6 +44,9 @@ const LiveCamera = () => {
   const streamRef = useRef(null);
   const wsRef = useRef(null);
   const frameIntervalRef = useRef(null);
+  const frameDelayRef = useRef(MIN_FRAME_INTERVAL_MS);
+  // Frame width and JPEG quality the server asks for when the socket opens
+  const frameConfigRef = useRef({ width: null, quality: 0.8 });
 
   useEffect(() => {
     fetchAvailableCameras();
@@ -61,6 +67,10 @@ const LiveCamera = () => {
         if (data.cameras.length > 0) {
           setSelectedCamera(data.cameras[0]);
         }
+        // The server answers from its cache; ask again once a running scan has finished
+        if (data.scanning) {
+          setTimeout(fetchAvailableCameras, 1000);
+        }
       } else {
         console.error('Invalid camera data received:', data);
         setError('Could not fetch available cameras');
@@ -84,7 +94,7 @@ const LiveCamera = () => {
       wsRef.current = null;
     }
     if (frameIntervalRef.current) {
-      clearInterval(frameIntervalRef.current);
+      clearTimeout(frameIntervalRef.current);
       frameIntervalRef.current = null;
     }
     setIsCameraActive(false);
@@ -143,24 +153,43 @@ const LiveCamera = () => {
       
       wsRef.current.onopen = () => {
         console.log('WebSocket connection established');
-        // Start sending frames
-        frameIntervalRef.current = setInterval(() => {
-          if (videoRef.current && wsRef.current.readyState === WebSocket.OPEN) {
+        frameDelayRef.current = MIN_FRAME_INTERVAL_MS;
+        // Send frames at the rate the server says it can keep up with
+        const sendFrame = () => {
+          const ws = wsRef.current;
+          if (!ws || ws.readyState !== WebSocket.OPEN) {
+            return;
+          }
+          // Skip this tick if the previous frame has not left the browser yet
+          if (videoRef.current && ws.bufferedAmount === 0) {
+            const { videoWidth, videoHeight } = videoRef.current;
+            const { width, quality } = frameConfigRef.current;
+            // Never send more pixels than the server will use
+            const scale = width && videoWidth > width ? width / videoWidth : 1;
             const canvas = document.createElement('canvas');
-            canvas.width = videoRef.current.videoWidth;
-            canvas.height = videoRef.current.videoHeight;
+            canvas.width = Math.round(videoWidth * scale);
+            canvas.height = Math.round(videoHeight * scale);
             const ctx = canvas.getContext('2d');
-            ctx.drawImage(videoRef.current, 0, 0);
+            ctx.drawImage(videoRef.current, 0, 0, canvas.width, canvas.height);
             canvas.toBlob((blob) => {
-              wsRef.current.send(blob);
-            }, 'image/jpeg', 0.8);
+              if (blob && ws.readyState === WebSocket.OPEN) {
+                ws.send(blob);
+              }
+            }, 'image/jpeg', quality);
           }
-        }, 100); // Send frame every 100ms
+          frameIntervalRef.current = setTimeout(sendFrame, frameDelayRef.current);
+        };
+        sendFrame();
       };
 
       wsRef.current.onmessage = (event) => {
         const data = JSON.parse(event.data);
-        if (data.type === 'detection') {
+        if (data.type === 'session') {
+          frameConfigRef.current = {
+            width: data.frame_width || null,
+            quality: data.jpeg_quality || 0.8
+          };
+        } else if (data.type === 'detection') {
           setDetections(prev => [{
             ...data.detection,
             timestamp: new Date().toISOString()
@@ -168,6 +197,14 @@ const LiveCamera = () => {
           
           // Update progress
           setProgress(prev => Math.min(prev + 1, 100));
+        } else if (data.type === 'progress') {
+          // Throttle to what the server actually processes; it drops the rest anyway
+          if (data.sustainable_fps) {
+            frameDelayRef.current = Math.max(MIN_FRAME_INTERVAL_MS, 1000 / data.sustainable_fps);
+          }
+          if (data.dropped_frames) {
+            console.log(`Server dropped ${data.dropped_frames} of ${data.received_frames} frames`);
+          }
         } else if (data.type === 'analysis_complete') {
           setAnalysisResults({
             totalFrames: data.totalFrames,
@@ -189,7 +226,7 @@ const LiveCamera = () => {
       wsRef.current.onclose = () => {
         console.log('WebSocket connection closed');
         if (frameIntervalRef.current) {
-          clearInterval(frameIntervalRef.current);
+          clearTimeout(frameIntervalRef.current);
           frameIntervalRef.current = null;
         }
         setIsAnalyzing(false);
@@ -48,6 +48,49 @@ const VideoMode = () => {
     }
   };
 
+  const formatDetection = (det) => {
+    // Use the type field if available, otherwise determine from event message
+    let type = det.type || "Lone Woman";
+    if (!det.type && det.event) {
+      if (
+        det.event.includes("SOS") || 
+        det.event.includes("HELP") || 
+        det.event.includes("DISTRESS") || 
+        det.event.includes("EMERGENCY")
+      ) {
+        type = "SOS Gesture";
+      } else if (det.event.includes("MORE MEN")) {
+        type = "More Men";
+      }
+    }
+    
+    // Determine icon and color based on detection type
+    let icon = 'woman';
+    let color = 'warning';
+    
+    if (type === 'SOS Gesture') {
+      icon = 'gesture';
+      color = 'error';
+    } else if (type === 'More Men') {
+      icon = 'group';
+      color = 'info';
+    }
+    
+    return {
+      type: type,
+      confidence: det.confidence || 0.8,
+      // Position in the video when available, otherwise when it was received
+      timestamp: det.timestamp != null ? `${det.timestamp.toFixed(1)}s` : new Date().toLocaleTimeString(),
+      icon: icon,
+      color: color,
+      event: det.event || type,
+      male_count: det.male_count,
+      female_count: det.female_count,
+      gesture_type: det.gesture_type,
+      gesture_description: det.gesture_description
+    };
+  };
+
   const analyzeVideo = async () => {
     if (!videoFile) {
       setError('Please select a video file first');
@@ -66,84 +109,55 @@ const VideoMode = () => {
       formData.append('time', selectedTime);
 
       console.log('Sending video for analysis...');
-      const response = await fetch('http://localhost:5000/analyze_video', {
+      const response = await fetch('http://localhost:5000/analyze_video/stream', {
         method: 'POST',
         body: formData,
       });
 
       console.log('Response received:', response.status);
-      const data = await response.json();
-      console.log('Data received:', data);
-
       if (!response.ok) {
+        const data = await response.json();
         throw new Error(data.error || 'Analysis failed. Please try again.');
       }
 
-      if (!data.detections || !Array.isArray(data.detections)) {
-        console.error('Invalid detections data:', data);
-        throw new Error('Invalid response format from server');
-      }
-
-      console.log(`Processing ${data.detections.length} detections`);
-      
-      const formattedDetections = data.detections.map((det, idx) => {
-        // Use the type field if available, otherwise determine from event message
-        let type = det.type || "Lone Woman";
-        if (!det.type && det.event) {
-          if (
-            det.event.includes("SOS") || 
-            det.event.includes("HELP") || 
-            det.event.includes("DISTRESS") || 
-            det.event.includes("EMERGENCY")
-          ) {
-            type = "SOS Gesture";
-          } else if (det.event.includes("MORE MEN")) {
-            type = "More Men";
+      // Detections arrive as newline-delimited JSON while the server analyzes
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let summary = null;
+      const handleMessage = (message) => {
+        if (message.type === 'detection') {
+          setDetections(prev => [formatDetection(message.detection), ...prev]);
+          if (message.total_frames) {
+            setProgress((message.frames_done / message.total_frames) * 100);
           }
+        } else if (message.type === 'complete') {
+          summary = message;
         }
-        
-        // Determine icon and color based on detection type
-        let icon = 'woman';
-        let color = 'warning';
-        
-        if (type === 'SOS Gesture') {
-          icon = 'gesture';
-          color = 'error';
-        } else if (type === 'More Men') {
-          icon = 'group';
-          color = 'info';
-        }
-        
-        return {
-          type: type,
-          confidence: det.confidence || 0.8,
-          timestamp: new Date().toLocaleTimeString(),
-          icon: icon,
-          color: color,
-          event: det.event || type,
-          male_count: det.male_count,
-          female_count: det.female_count,
-          gesture_type: det.gesture_type,
-          gesture_description: det.gesture_description
-        };
-      });
+      };
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => handleMessage(JSON.parse(line)));
+      }
+      if (buffer.trim()) {
+        handleMessage(JSON.parse(buffer));
+      }
+
+      if (!summary) {
+        throw new Error('Analysis ended unexpectedly. Please try again.');
+      }
 
-      console.log('Formatted detections:', formattedDetections);
-      
-      setDetections(formattedDetections);
-      
-      // Calculate statistics
-      const totalFrames = data.total_frames || formattedDetections.length;
-      const sosDetections = formattedDetections.filter(d => d.type === 'SOS Gesture').length;
-      const loneWomanDetections = formattedDetections.filter(d => d.type === 'Lone Woman').length;
-      const moreMenDetections = formattedDetections.filter(d => d.type === 'More Men').length;
-      
       setAnalysisResults({
-        totalFrames: totalFrames,
-        sosDetections: sosDetections,
-        loneWomanDetections: loneWomanDetections,
-        moreMenDetections: moreMenDetections,
-        detectionRate: (formattedDetections.length / (totalFrames || 1)),
+        totalFrames: summary.total_frames,
+        sosDetections: summary.sosDetections,
+        loneWomanDetections: summary.loneWomanDetections,
+        moreMenDetections: summary.moreMenDetections,
+        detectionRate: summary.detectionRate,
       });
       
       console.log('Analysis complete, detections displayed');
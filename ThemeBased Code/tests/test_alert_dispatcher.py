@@ -0,0 +1,52 @@
+import time
+from alerts import AlertDispatcher
+
+def wait_for(dispatcher, handled, timeout=2.0):
+    deadline = time.time() + timeout
+    while dispatcher.delivered + dispatcher.suppressed < handled and time.time() < deadline:
+        time.sleep(0.01)
+
+def test_rate_limit_per_camera_and_type():
+    delivered = []
+    dispatcher = AlertDispatcher([delivered.append], min_interval=60.0, dedupe_window=0.0)
+    dispatcher.push("cam1", {"type": "More Men", "event": "A"})
+    dispatcher.push("cam1", {"type": "More Men", "event": "B"})
+    dispatcher.push("cam1", {"type": "SOS Gesture", "event": "C"})
+    dispatcher.push("cam2", {"type": "More Men", "event": "D"})
+    wait_for(dispatcher, 4)
+    assert [alert["message"] for alert in delivered] == ["A", "C", "D"]
+    assert dispatcher.suppressed == 1
+
+def test_identical_messages_are_deduplicated():
+    delivered = []
+    dispatcher = AlertDispatcher([delivered.append], min_interval=0.0, dedupe_window=60.0)
+    for detection_type in ("More Men", "Lone Woman", "More Men"):
+        dispatcher.push("cam1", {"type": detection_type, "event": "same"})
+    dispatcher.push("cam1", {"type": "More Men", "event": "other"})
+    wait_for(dispatcher, 4)
+    assert [alert["message"] for alert in delivered] == ["same", "other"]
+
+def test_failing_sink_does_not_stop_the_others():
+    delivered = []
+
+    def broken(alert):
+        raise RuntimeError("sink down")
+
+    dispatcher = AlertDispatcher([broken, delivered.append], min_interval=0.0, dedupe_window=0.0)
+    dispatcher.push("cam1", {"type": "More Men", "event": "A"})
+    wait_for(dispatcher, 1)
+    time.sleep(0.05)
+    assert len(delivered) == 1
+
+def test_push_never_blocks_on_a_full_queue(monkeypatch):
+    import alerts
+    monkeypatch.setattr(alerts, "ALERT_QUEUE_SIZE", 1)
+
+    def slow(alert):
+        time.sleep(0.5)
+
+    dispatcher = AlertDispatcher([slow], min_interval=0.0, dedupe_window=0.0)
+    start = time.time()
+    results = [dispatcher.push("cam1", {"type": "More Men", "event": str(index)}) for index in range(5)]
+    assert time.time() - start < 0.2
+    assert results.count(False) == dispatcher.dropped >= 1
@@ -0,0 +1,47 @@
+import threading
+import time
+import camera_discovery
+
+def fake_probe(slow, working, release=None):
+    def probe(index, backend):
+        if index in slow:
+            release.wait(30)
+        time.sleep(0.05)
+        return index in working
+    return probe
+
+def test_probe_reports_working_indices(monkeypatch):
+    monkeypatch.setattr(camera_discovery, "probe_camera", fake_probe(set(), {0, 3}))
+    monkeypatch.setattr(camera_discovery, "probe_backends", lambda: [(0, "ANY")])
+    assert [device["index"] for device in camera_discovery.probe_cameras()] == [0, 3]
+
+def test_hung_devices_do_not_time_out_the_queued_ones(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(camera_discovery, "probe_camera", fake_probe({1, 2}, {0, 6, 9}, release))
+    monkeypatch.setattr(camera_discovery, "probe_backends", lambda: [(0, "ANY")])
+    monkeypatch.setattr(camera_discovery, "CAMERA_PROBE_TIMEOUT", 0.5)
+    start = time.time()
+    try:
+        devices = camera_discovery.probe_cameras()
+    finally:
+        # Let the abandoned probe threads end so the test process can exit
+        release.set()
+    # Indices queued behind the hung probes still get their own full timeout
+    assert [device["index"] for device in devices] == [0, 6, 9]
+    assert time.time() - start < 3.0
+
+def test_device_found_by_first_backend_only(monkeypatch):
+    monkeypatch.setattr(camera_discovery, "probe_camera", fake_probe(set(), {0}))
+    monkeypatch.setattr(camera_discovery, "probe_backends", lambda: [(1, "DSHOW"), (2, "MSMF")])
+    assert camera_discovery.probe_cameras() == [{"index": 0, "name": "Camera 0", "backend": "DSHOW", "path": None}]
+
+def test_get_cameras_serves_the_cache_and_rescans_when_stale(monkeypatch):
+    scans = []
+    monkeypatch.setattr(camera_discovery, "refresh_cameras", lambda: scans.append(True))
+    monkeypatch.setitem(camera_discovery._cache, "devices", [{"index": 0}])
+    monkeypatch.setitem(camera_discovery._cache, "scanned_at", time.time())
+    assert camera_discovery.get_cameras()["devices"] == [{"index": 0}]
+    assert scans == []
+    monkeypatch.setitem(camera_discovery._cache, "scanned_at", time.time() - camera_discovery.CAMERA_CACHE_TTL - 1)
+    camera_discovery.get_cameras()
+    assert scans == [True]
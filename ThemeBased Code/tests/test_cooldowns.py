@@ -0,0 +1,32 @@
+import pytest
+
+# video_processor imports torch and MediaPipe at module level (the models load lazily)
+pytest.importorskip("torch")
+pytest.importorskip("mediapipe")
+from video_processor import ALERT_COOLDOWN, GESTURE_COOLDOWN, apply_cooldowns
+
+def detection(detection_type, timestamp, **fields):
+    return dict(type=detection_type, timestamp=timestamp, **fields)
+
+def test_cooldown_per_type():
+    candidates = [
+        detection("More Men", 0.0),
+        detection("More Men", ALERT_COOLDOWN / 2),
+        detection("SOS Gesture", ALERT_COOLDOWN / 2),
+        detection("More Men", ALERT_COOLDOWN + 0.1)
+    ]
+    assert apply_cooldowns(candidates) == [candidates[0], candidates[2], candidates[3]]
+
+def test_gesture_cooldown():
+    candidates = [detection("SOS Gesture", 0.0), detection("SOS Gesture", GESTURE_COOLDOWN - 0.1),
+                  detection("SOS Gesture", GESTURE_COOLDOWN)]
+    assert apply_cooldowns(candidates) == [candidates[0], candidates[2]]
+
+def test_forced_detections_always_fire_and_restart_lone_woman():
+    candidates = [
+        detection("Lone Woman", 0.0),
+        detection("Lone Woman", 1.0, forced=True),
+        detection("Lone Woman", ALERT_COOLDOWN + 0.5),
+        detection("Lone Woman", ALERT_COOLDOWN + 1.5)
+    ]
+    assert apply_cooldowns(candidates) == [candidates[0], candidates[1], candidates[3]]
@@ -0,0 +1,33 @@
+import cv2
+import numpy as np
+from frame_decode import decode_frame, jpeg_size, scale_box
+
+def encode(width, height, **params):
+    flags = [cv2.IMWRITE_JPEG_PROGRESSIVE, 1] if params.get("progressive") else []
+    ok, data = cv2.imencode(".jpg", np.zeros((height, width, 3), dtype=np.uint8), flags)
+    assert ok
+    return data.tobytes()
+
+def test_jpeg_size_reads_header():
+    assert jpeg_size(encode(640, 480)) == (640, 480)
+    assert jpeg_size(encode(1920, 1080, progressive=True)) == (1920, 1080)
+
+def test_jpeg_size_rejects_other_data():
+    _, png = cv2.imencode(".png", np.zeros((8, 8, 3), dtype=np.uint8))
+    assert jpeg_size(png.tobytes()) is None
+    assert jpeg_size(b"") is None
+    assert jpeg_size(encode(640, 480)[:20]) is None
+
+def test_decode_frame_reduces_wide_jpegs():
+    frame, scale = decode_frame(encode(2560, 1440), target_width=640)
+    assert scale == 4
+    assert frame.shape[:2] == (360, 640)
+    frame, scale = decode_frame(encode(800, 600), target_width=640)
+    assert scale == 1 and frame.shape[:2] == (600, 800)
+
+def test_decode_frame_bad_data():
+    assert decode_frame(b"not an image", target_width=640) == (None, 1)
+
+def test_scale_box():
+    assert scale_box((10, 20, 30, 40), 4) == [40, 80, 120, 160]
+    assert scale_box((10, 20, 30, 40), 1) == [10, 20, 30, 40]
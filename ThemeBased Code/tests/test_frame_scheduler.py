@@ -0,0 +1,53 @@
+import pytest
+
+# live_camera_processor imports torch and MediaPipe at module level (the models load lazily)
+pytest.importorskip("torch")
+pytest.importorskip("mediapipe")
+from live_camera_processor import FrameScheduler, MAX_DETECT_INTERVAL, MAX_GESTURE_INTERVAL
+
+def detect_pattern(scheduler, frames):
+    return [scheduler.plan()["detect"] for _ in range(frames)]
+
+def test_detects_every_interval():
+    scheduler = FrameScheduler(latency_budget=0.2, detect_interval=3)
+    assert detect_pattern(scheduler, 7) == [True, False, False, True, False, False, True]
+
+def test_track_steps_between_detections():
+    scheduler = FrameScheduler(latency_budget=0.2, detect_interval=4)
+    assert [scheduler.plan()["track_steps"] for _ in range(4)] == [0.0, 0.25, 0.5, 0.75]
+
+def test_request_detect_runs_yolo_on_the_next_frame():
+    scheduler = FrameScheduler(latency_budget=0.2, detect_interval=5)
+    scheduler.plan()
+    scheduler.plan()
+    scheduler.request_detect()
+    assert scheduler.plan()["detect"]
+
+def test_fast_stages_run_every_frame():
+    scheduler = FrameScheduler(latency_budget=0.2, detect_interval=3)
+    scheduler.record("yolo", 0.05)
+    scheduler.record("gestures", 0.02)
+    scheduler.adjust()
+    assert scheduler.detect_interval == 1 and scheduler.gesture_interval == 1
+
+def test_slow_stages_are_thinned_within_limits():
+    scheduler = FrameScheduler(latency_budget=0.2, detect_interval=1)
+    scheduler.record("yolo", 0.5)
+    scheduler.record("gender", 0.1)
+    scheduler.record("gestures", 0.15)
+    scheduler.adjust()
+    assert scheduler.gesture_interval == 2
+    # Gestures use 0.075s per frame on average, leaving 0.125s for 0.6s of detection
+    assert scheduler.detect_interval == 5
+
+    scheduler.record("yolo", 100.0)
+    scheduler.record("gestures", 100.0)
+    scheduler.adjust()
+    assert scheduler.detect_interval == MAX_DETECT_INTERVAL
+    assert scheduler.gesture_interval == MAX_GESTURE_INTERVAL
+
+def test_stage_times_are_smoothed():
+    scheduler = FrameScheduler()
+    scheduler.record("yolo", 1.0)
+    scheduler.record("yolo", 2.0)
+    assert 1.0 < scheduler.stage_times["yolo"] < 2.0
@@ -0,0 +1,29 @@
+import os
+import gender_quantization
+from gender_quantization import calibration_key, quantized_model_path
+
+def write_crop(folder, name, data=b"crop"):
+    with open(os.path.join(folder, name), "wb") as f:
+        f.write(data)
+
+def test_calibration_key_follows_the_crops(tmp_path):
+    write_crop(tmp_path, "a.jpg")
+    write_crop(tmp_path, "notes.txt")
+    key = calibration_key(str(tmp_path))
+    assert calibration_key(str(tmp_path)) == key
+    # Files that are not crops do not change the calibration set
+    write_crop(tmp_path, "readme.md")
+    assert calibration_key(str(tmp_path)) == key
+    write_crop(tmp_path, "b.png")
+    assert calibration_key(str(tmp_path)) != key
+    assert calibration_key(str(tmp_path), limit=1) != calibration_key(str(tmp_path), limit=2)
+
+def test_static_models_are_cached_per_calibration_set(tmp_path, monkeypatch):
+    monkeypatch.setattr(gender_quantization, "EXPORT_CACHE_DIR", str(tmp_path / "cache"))
+    first, second = tmp_path / "first", tmp_path / "second"
+    for folder in (first, second):
+        folder.mkdir()
+        write_crop(folder, "a.jpg")
+    assert quantized_model_path("static", str(first)) != quantized_model_path("static", str(second))
+    # Dynamic quantization needs no calibration
+    assert quantized_model_path("dynamic", str(first)) == quantized_model_path("dynamic", str(second))
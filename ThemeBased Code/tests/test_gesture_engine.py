@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+from gesture_engine import GestureEngine, HAND_POINTS, POSE_POINTS, MIDDLE_FINGER_TIP, WRIST, load_gesture_rules
+
+RAISED = {"type": "Raised Hand", "message": "RAISED", "description": "raised", "kind": "hand_raised",
+          "y_threshold": 0.5}
+WAVE = {"type": "Waving Hands", "message": "WAVE", "description": "wave", "kind": "wave",
+        "window_seconds": 2.0, "min_amplitude": 0.05, "min_reversals": 3, "min_hz": 0.5, "max_hz": 4.0}
+
+def landmarks(points, overrides=None, default=(0.5, 0.9, 0.0)):
+    coords = [default] * points
+    for index, value in (overrides or {}).items():
+        coords[index] = value
+    return SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=z) for x, y, z in coords])
+
+def holistic(right_hand=None, pose=True):
+    return SimpleNamespace(left_hand_landmarks=None, right_hand_landmarks=right_hand,
+                           pose_landmarks=landmarks(POSE_POINTS) if pose else None)
+
+def raised_hand():
+    return landmarks(HAND_POINTS, {WRIST: (0.5, 0.3, 0.0), MIDDLE_FINGER_TIP: (0.5, 0.1, 0.0)})
+
+def test_raised_hand_matches():
+    engine = GestureEngine([RAISED])
+    assert [gesture["type"] for gesture in engine.update(1, holistic(raised_hand()), 0.0)] == ["Raised Hand"]
+
+def test_missing_hands_never_match():
+    engine = GestureEngine([RAISED, WAVE])
+    assert engine.update(1, holistic(None), 0.0) == []
+
+def test_multi_frame_rule_needs_enough_frames():
+    engine = GestureEngine([dict(RAISED, frames=3, min_ratio=1.0)])
+    assert engine.update(1, holistic(raised_hand()), 0.0) == []
+    assert engine.update(1, holistic(raised_hand()), 0.1) == []
+    assert len(engine.update(1, holistic(raised_hand()), 0.2)) == 1
+
+def test_wave_detected_from_swinging_hand():
+    engine = GestureEngine([WAVE])
+    gestures = []
+    for frame in range(12):
+        # Fingers swing 0.1 left and right of the wrist, reversing every 0.15s
+        offset = 0.1 if frame % 2 else -0.1
+        hand = landmarks(HAND_POINTS, {WRIST: (0.5, 0.6, 0.0), MIDDLE_FINGER_TIP: (0.5 + offset, 0.4, 0.0)})
+        gestures = engine.update(1, holistic(hand), frame * 0.15)
+    assert [gesture["type"] for gesture in gestures] == ["Waving Hands"]
+
+def test_histories_are_per_person_and_pruned():
+    engine = GestureEngine([RAISED])
+    engine.update(1, holistic(raised_hand()), 0.0)
+    engine.update(2, holistic(raised_hand()), 1.0)
+    assert set(engine.histories) == {1, 2}
+    engine.update(2, holistic(raised_hand()), 10.0)
+    assert set(engine.histories) == {2}
+
+def test_rule_file_profiles_load():
+    for profile in ("live", "video"):
+        rules = load_gesture_rules(profile)
+        assert rules and all({"type", "message", "kind"} <= set(rule) for rule in rules)
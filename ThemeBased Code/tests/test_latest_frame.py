@@ -0,0 +1,23 @@
+import threading
+import time
+from latest_frame import LatestFrame
+
+def test_newest_frame_wins():
+    latest = LatestFrame()
+    for frame in range(3):
+        latest.put(frame)
+    assert latest.get(timeout=0) == 2
+    assert latest.received == 3 and latest.dropped == 2
+    assert latest.get(timeout=0) is None
+
+def test_get_waits_for_a_frame():
+    latest = LatestFrame()
+    threading.Timer(0.05, latest.put, args=("frame",)).start()
+    assert latest.get(timeout=1.0) == "frame"
+
+def test_close_wakes_a_waiting_consumer():
+    latest = LatestFrame()
+    threading.Timer(0.05, latest.close).start()
+    start = time.time()
+    assert latest.get(timeout=5.0) is None
+    assert time.time() - start < 1.0
@@ -0,0 +1,32 @@
+import numpy as np
+from motion_gate import MotionGate
+
+def still(value=80):
+    return np.full((240, 320, 3), value, dtype=np.uint8)
+
+def moving(x):
+    frame = still()
+    frame[60:180, x:x + 60] = 255
+    return frame
+
+def test_first_frame_goes_through():
+    assert MotionGate().check(still())
+
+def test_static_frames_are_gated_after_hold():
+    gate = MotionGate(hold_frames=2, max_gated=100)
+    results = [gate.check(still()) for _ in range(6)]
+    # The first frame sets the background and opens the hold
+    assert results == [True, True, True, False, False, False]
+    assert gate.frames_seen == 6 and gate.frames_gated == 3
+
+def test_motion_reopens_the_gate_on_the_same_frame():
+    gate = MotionGate(hold_frames=0, max_gated=100)
+    for _ in range(3):
+        gate.check(still())
+    assert not gate.check(still())
+    assert gate.check(moving(100))
+
+def test_static_scene_is_rechecked_every_max_gated_frames():
+    gate = MotionGate(hold_frames=0, max_gated=3)
+    gate.check(still())
+    assert [gate.check(still()) for _ in range(8)] == [False, False, False, True, False, False, False, True]
@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+import numpy as np
+import person_gestures
+from person_gestures import GraphBudget, PersonLandmarker
+from person_tracker import TRACK_MAX_MISSED
+
+class FakeGraph:
+    def __init__(self, **options):
+        self.closed = False
+
+    def process(self, image):
+        return SimpleNamespace(pose_landmarks=None)
+
+    def close(self):
+        self.closed = True
+
+def person(track_id, x):
+    return {"box": (x, 10, x + 100, 210), "track_id": track_id}
+
+def frame():
+    return np.zeros((240, 640, 3), dtype=np.uint8)
+
+def test_budget_caps_graphs_across_landmarkers(monkeypatch):
+    monkeypatch.setattr(person_gestures, "mp_holistic", SimpleNamespace(Holistic=FakeGraph))
+    budget = GraphBudget(2)
+    first = PersonLandmarker(graph_budget=budget)
+    second = PersonLandmarker(graph_budget=budget)
+    assert len(first.process(frame(), [person(1, 0), person(2, 200)])) == 2
+    # The budget is used up: the other landmarker's person is not checked
+    assert second.process(frame(), [person(1, 0)]) == []
+    assert second.crops_over_budget == 1 and budget.in_use == 2
+    first.close()
+    assert budget.in_use == 0
+    assert len(second.process(frame(), [person(1, 0)])) == 1
+
+def test_stale_tracks_give_their_graph_back(monkeypatch):
+    monkeypatch.setattr(person_gestures, "mp_holistic", SimpleNamespace(Holistic=FakeGraph))
+    budget = GraphBudget(1)
+    landmarker = PersonLandmarker(graph_budget=budget)
+    landmarker.process(frame(), [person(1, 0)])
+    assert landmarker.process(frame(), [person(2, 200)]) == []
+    for _ in range(TRACK_MAX_MISSED + 1):
+        landmarker.process(frame(), [])
+    assert budget.in_use == 0
+    assert len(landmarker.process(frame(), [person(2, 200)])) == 1
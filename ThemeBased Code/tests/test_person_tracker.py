@@ -0,0 +1,49 @@
+import numpy as np
+from person_tracker import PersonTracker, box_iou
+
+def test_box_iou():
+    ious = box_iou([(0, 0, 10, 10)], [(0, 0, 10, 10), (5, 0, 15, 10), (20, 20, 30, 30)])
+    assert np.allclose(ious, [[1.0, 50 / 150, 0.0]])
+
+def test_moving_person_keeps_track_id():
+    tracker = PersonTracker()
+    first = tracker.update([(0, 0, 50, 100)])[0]["track_id"]
+    for step in range(1, 6):
+        x = 15 * step
+        assert tracker.update([(x, 0, x + 50, 100)])[0]["track_id"] == first
+    assert tracker.next_id == 2
+
+def test_distant_box_starts_new_track():
+    tracker = PersonTracker()
+    tracks = tracker.update([(0, 0, 50, 100), (300, 0, 350, 100)])
+    assert [track["track_id"] for track in tracks] == [1, 2]
+    assert tracker.update([(500, 0, 550, 100)])[0]["track_id"] == 3
+
+def test_track_dropped_after_max_missed():
+    tracker = PersonTracker(max_missed=2)
+    tracker.update([(0, 0, 50, 100)])
+    for _ in range(3):
+        tracker.update([])
+    assert tracker.tracks == []
+    assert tracker.update([(0, 0, 50, 100)])[0]["track_id"] == 2
+
+def test_gender_cached_until_recheck():
+    tracker = PersonTracker(recheck_updates=3)
+    track = tracker.update([(0, 0, 50, 100)])[0]
+    assert tracker.needs_gender(track)
+    tracker.add_gender(track, "Female", 0.8)
+    for _ in range(2):
+        tracker.update([(0, 0, 50, 100)])
+        assert not tracker.needs_gender(track)
+    tracker.update([(0, 0, 50, 100)])
+    assert tracker.needs_gender(track)
+
+def test_gender_votes_are_confidence_weighted():
+    tracker = PersonTracker()
+    track = tracker.update([(0, 0, 50, 100)])[0]
+    tracker.add_gender(track, "Female", 0.9)
+    tracker.add_gender(track, "Female", 0.7)
+    tracker.add_gender(track, "Male", 0.95)
+    assert track["gender"] == "Female"
+    assert abs(track["confidence"] - 0.8) < 1e-6
+    assert tracker.classifications == 3
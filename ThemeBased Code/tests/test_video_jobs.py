@@ -0,0 +1,83 @@
+import os
+import sys
+from types import SimpleNamespace
+import pytest
+import video_jobs
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(video_jobs, "JOBS_DIR", str(tmp_path / "jobs"))
+    queued = []
+    monkeypatch.setattr(video_jobs, "_enqueue", queued.append)
+    return SimpleNamespace(dir=tmp_path, queued=queued)
+
+def submit(jobs, name="clip.mp4"):
+    video_path = jobs.dir / name
+    video_path.write_bytes(b"video")
+    return video_jobs.submit_job(video_jobs.new_job_id(), str(video_path), "22:00")
+
+def use_processor(monkeypatch, process):
+    monkeypatch.setitem(sys.modules, "video_processor", SimpleNamespace(process_video_combined=process))
+
+def test_completed_job_keeps_detections_and_deletes_its_video(jobs, monkeypatch):
+    job = submit(jobs)
+    use_processor(monkeypatch, lambda *args, **kwargs: [{"frame": 1, "event": "SOS"}])
+    video_jobs.run_job(job["job_id"])
+    stored = video_jobs.get_job(job["job_id"])
+    assert stored["status"] == "completed" and stored["detections"] == [{"frame": 1, "event": "SOS"}]
+    assert not os.path.exists(job["video_path"])
+    assert not os.path.exists(video_jobs._lock_path(job["job_id"]))
+
+def test_processing_error_fails_the_job(jobs, monkeypatch):
+    job = submit(jobs)
+
+    def process(*args, **kwargs):
+        assert kwargs["raise_errors"]
+        raise IOError("Could not open video file")
+
+    use_processor(monkeypatch, process)
+    video_jobs.run_job(job["job_id"])
+    stored = video_jobs.get_job(job["job_id"])
+    assert stored["status"] == "failed" and stored["error"] == "Could not open video file"
+    assert not os.path.exists(job["video_path"])
+
+def test_locked_job_is_not_run_or_resumed(jobs, monkeypatch):
+    job = submit(jobs)
+    use_processor(monkeypatch, lambda *args, **kwargs: pytest.fail("ran a job another process holds"))
+    # Another process (here: another open lock file) is running the job
+    fd = video_jobs._try_lock(job["job_id"])
+    try:
+        assert video_jobs._try_lock(job["job_id"]) is None
+        video_jobs.run_job(job["job_id"])
+        assert video_jobs.resume_jobs() == 0
+    finally:
+        video_jobs._unlock(fd)
+    assert video_jobs.get_job(job["job_id"])["status"] == "queued"
+    assert jobs.queued == [job["job_id"]]
+
+def test_resume_requeues_unfinished_jobs_only(jobs, monkeypatch):
+    running = submit(jobs, "running.mp4")
+    finished = submit(jobs, "finished.mp4")
+    use_processor(monkeypatch, lambda *args, **kwargs: [])
+    video_jobs.run_job(finished["job_id"])
+    # A run that died half-way leaves the job "running" with partial results
+    stored = video_jobs.get_job(running["job_id"])
+    stored.update(status="running", frames_done=40, detections=[{"frame": 3}])
+    video_jobs._save_job(stored)
+    jobs.queued.clear()
+
+    assert video_jobs.resume_jobs() == 1
+    assert jobs.queued == [running["job_id"]]
+    resumed = video_jobs.get_job(running["job_id"])
+    assert resumed["status"] == "queued" and resumed["frames_done"] == 0 and resumed["detections"] == []
+    assert video_jobs.get_job(finished["job_id"])["status"] == "completed"
+
+def test_resume_cancels_jobs_with_a_cancel_request(jobs):
+    job = submit(jobs)
+    jobs.queued.clear()
+    assert video_jobs.cancel_job(job["job_id"])["cancel_requested"]
+    assert video_jobs.resume_jobs() == 0
+    assert jobs.queued == []
+    assert video_jobs.get_job(job["job_id"])["status"] == "cancelled"
+    assert not os.path.exists(job["video_path"])
+    assert not os.path.exists(video_jobs._cancel_path(job["job_id"]))
@@ -0,0 +1,47 @@
+import random
+import time
+from video_pipeline import iter_video_pipeline
+
+def make_worker(worker_idx):
+    def infer(frames):
+        # Uneven work so batches finish out of order
+        time.sleep(random.random() * 0.005)
+        return [frame * 10 for frame in frames]
+    return infer
+
+def frames(count):
+    return ((frame_count, frame_count) for frame_count in range(count))
+
+def test_results_come_back_in_frame_order():
+    stats = {}
+    out = list(iter_video_pipeline(frames(50), make_worker, batch_size=3, inference_workers=4, stats=stats))
+    assert [frame_count for frame_count, _, _ in out] == list(range(50))
+    assert all(result == frame * 10 for _, frame, result in out)
+    assert stats["inference"]["items"] == 50 and stats["rules"]["items"] == 50
+
+def test_ordered_step_sees_batches_in_order():
+    seen = []
+
+    def ordered(batch_frames, results):
+        seen.extend(batch_frames)
+        return [result + 1 for result in results]
+
+    out = list(iter_video_pipeline(frames(50), make_worker, batch_size=4, inference_workers=3, ordered=ordered))
+    assert seen == list(range(50))
+    assert [result for _, _, result in out] == [frame * 10 + 1 for frame in range(50)]
+
+def test_failed_batch_is_skipped():
+    def make_failing(worker_idx):
+        def infer(batch_frames):
+            if 4 in batch_frames:
+                raise RuntimeError("boom")
+            return batch_frames
+        return infer
+
+    out = list(iter_video_pipeline(frames(10), make_failing, batch_size=3, inference_workers=2))
+    assert [frame_count for frame_count, _, _ in out] == [0, 1, 2, 6, 7, 8, 9]
+
+def test_closing_early_stops_the_stages():
+    pipeline = iter_video_pipeline(frames(1000), make_worker, batch_size=2, inference_workers=2, queue_size=2)
+    assert next(pipeline)[0] == 0
+    pipeline.close()
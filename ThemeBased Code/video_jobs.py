@@ -0,0 +1,268 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Job settings
+JOBS_DIR = "jobs"  # One JSON file per job, so state survives a restart
+JOB_WORKERS = 2  # Background processes analyzing videos
+MAX_PENDING_JOBS = 20  # Queued + running jobs accepted before submissions are refused
+PROGRESS_SAVE_INTERVAL = 1.0  # Seconds between progress writes while a job runs
+
+ACTIVE_STATUSES = ("queued", "running")
+FINAL_STATUSES = ("completed", "cancelled", "failed")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _job_path(job_id):
+    return os.path.join(JOBS_DIR, f"{job_id}.json")
+
+def _cancel_path(job_id):
+    return os.path.join(JOBS_DIR, f"{job_id}.cancel")
+
+def _lock_path(job_id):
+    return os.path.join(JOBS_DIR, f"{job_id}.lock")
+
+def _try_lock(job_id):
+    """Take the job's lock without waiting; returns the open lock file, or None if
+    another process holds it.
+
+    The lock is held while the job is resumed or run, so several server
+    processes never work on one job. The OS releases it when the holder dies,
+    so a crashed run never leaves a stale claim behind.
+    """
+    fd = os.open(_lock_path(job_id), os.O_CREAT | os.O_RDWR)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return fd
+    except OSError:
+        os.close(fd)
+        return None
+
+def _unlock(fd):
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+def _finish_job(job):
+    """Save a job that reached a final status and delete its cancel marker, lock
+    file and uploaded video, which nothing reads once the job is over."""
+    job["finished_at"] = time.time()
+    _save_job(job)
+    for path in (_cancel_path(job["job_id"]), _lock_path(job["job_id"]), job["video_path"]):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def _save_job(job):
+    """Atomically write the job file so readers never see a half-written job."""
+    job["updated_at"] = time.time()
+    # Unique per writer, so two processes never write into the same temp file
+    tmp_path = f"{_job_path(job['job_id'])}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        # cancel_requested is derived from the marker file, never stored
+        json.dump({key: value for key, value in job.items() if key != "cancel_requested"}, f)
+    os.replace(tmp_path, _job_path(job["job_id"]))
+
+def _is_valid_job_id(job_id):
+    try:
+        return uuid.UUID(job_id).hex == job_id
+    except (ValueError, TypeError, AttributeError):
+        return False
+
+def get_job(job_id):
+    """Return the stored job dict, or None if the job does not exist."""
+    if not _is_valid_job_id(job_id):
+        return None
+    try:
+        with open(_job_path(job_id)) as f:
+            job = json.load(f)
+        job["cancel_requested"] = os.path.exists(_cancel_path(job_id))
+        return job
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Error reading job {job_id}: {str(e)}")
+        return None
+
+def list_jobs():
+    jobs = []
+    if not os.path.isdir(JOBS_DIR):
+        return jobs
+    for filename in os.listdir(JOBS_DIR):
+        if filename.endswith(".json"):
+            job = get_job(filename[:-len(".json")])
+            if job:
+                jobs.append(job)
+    return sorted(jobs, key=lambda job: job["created_at"])
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawn rather than fork: a forked worker would inherit locks held by
+            # the server's threads (e.g. the model warm-up) and hang on them
+            _executor = ProcessPoolExecutor(max_workers=JOB_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+            print(f"Started video job pool with {JOB_WORKERS} worker(s)")
+        return _executor
+
+def _enqueue(job_id):
+    _get_executor().submit(run_job, job_id)
+
+def new_job_id():
+    return uuid.uuid4().hex
+
+def submit_job(job_id, video_path, time_str, options=None):
+    """Record a new job and hand it to the worker pool.
+
+    Returns the job dict, or None when MAX_PENDING_JOBS are already active.
+    """
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    active = [job for job in list_jobs() if job["status"] in ACTIVE_STATUSES]
+    if len(active) >= MAX_PENDING_JOBS:
+        print(f"Refusing job {job_id}: {len(active)} jobs already active")
+        return None
+
+    job = {
+        "job_id": job_id,
+        "status": "queued",
+        "video_path": video_path,
+        "time": time_str,
+        "options": options or {},
+        "frames_done": 0,
+        "total_frames": 0,
+        "detections": [],
+        "error": None,
+        "created_at": time.time()
+    }
+    _save_job(job)
+    _enqueue(job_id)
+    print(f"Queued video job {job_id} for {video_path}")
+    return job
+
+def cancel_job(job_id):
+    """Ask a queued or running job to stop. Returns the job, or None if unknown."""
+    job = get_job(job_id)
+    if job is None:
+        return None
+    if job["status"] in ACTIVE_STATUSES:
+        # The worker owns the job file, so cancellation is signalled with a marker file
+        open(_cancel_path(job_id), "w").close()
+        job["cancel_requested"] = True
+        print(f"Cancellation requested for video job {job_id}")
+    return job
+
+def resume_jobs():
+    """Re-queue jobs that were queued or running when the server stopped.
+
+    Jobs another process is running (it holds their lock) are left alone.
+    Every server process may call this; a job queued twice still runs once,
+    since run_job takes the lock and skips jobs that already finished.
+    """
+    resumed = 0
+    for job in list_jobs():
+        if job["status"] not in ACTIVE_STATUSES:
+            continue
+        fd = _try_lock(job["job_id"])
+        if fd is None:
+            continue
+        try:
+            # Re-read under the lock: another process may have just finished it
+            job = get_job(job["job_id"])
+            if job is None or job["status"] not in ACTIVE_STATUSES:
+                continue
+            if job["cancel_requested"]:
+                job["status"] = "cancelled"
+                _finish_job(job)
+                continue
+            job.update({"status": "queued", "frames_done": 0, "detections": [], "error": None})
+            _save_job(job)
+            _enqueue(job["job_id"])
+            resumed += 1
+        finally:
+            _unlock(fd)
+    if resumed:
+        print(f"Resumed {resumed} unfinished video job(s)")
+    return resumed
+
+def run_job(job_id):
+    """Worker-process entry point: analyze the job's video and record the results.
+
+    Holds the job's lock for the whole run; returns at once if another
+    process holds it or the job is no longer active.
+    """
+    fd = _try_lock(job_id)
+    if fd is None:
+        print(f"Video job {job_id} is already running in another process")
+        return
+    try:
+        _run_locked(job_id)
+    finally:
+        _unlock(fd)
+
+def _run_locked(job_id):
+    job = get_job(job_id)
+    if job is None or job["status"] not in ACTIVE_STATUSES:
+        return
+    cancel_path = _cancel_path(job_id)
+    if os.path.exists(cancel_path):
+        job["status"] = "cancelled"
+        _finish_job(job)
+        return
+
+    # Imported here so the models are only loaded inside the worker processes
+    from video_processor import process_video_combined
+
+    job["status"] = "running"
+    job["started_at"] = time.time()
+    _save_job(job)
+    last_save = time.time()
+
+    def on_progress(frames_done, frames_total, new_detections):
+        nonlocal last_save
+        job["frames_done"] = frames_done
+        job["total_frames"] = frames_total
+        job["detections"].extend(new_detections)
+        # On a timer only: rewriting the whole file per detection is quadratic in the detections
+        if time.time() - last_save >= PROGRESS_SAVE_INTERVAL:
+            _save_job(job)
+            last_save = time.time()
+
+    def should_stop():
+        return os.path.exists(cancel_path)
+
+    try:
+        # raise_errors: a video that fails to process must end as "failed", not as an empty "completed"
+        detections = process_video_combined(
+            job["video_path"], job["time"], headless=True,
+            progress_callback=on_progress, should_stop=should_stop, raise_errors=True,
+            **job["options"]
+        )
+        job["detections"] = detections
+        job["status"] = "cancelled" if should_stop() else "completed"
+    except Exception as e:
+        print(f"Error in video job {job_id}: {str(e)}")
+        job["status"] = "failed"
+        job["error"] = str(e)
+    _finish_job(job)
+    print(f"Video job {job_id} {job['status']} with {len(job['detections'])} detections")
@@ -0,0 +1,189 @@
+import queue
+import threading
+import time
+
+# Default pipeline sizing
+PIPELINE_QUEUE_SIZE = 4  # Max batches waiting between two stages
+PIPELINE_INFERENCE_WORKERS = 1  # Threads running YOLO + gender on batches
+PIPELINE_LOG_EVERY = 10  # Print queue depths every N batches
+
+_DONE = object()
+
+def new_stage_stats(workers):
+    return {
+        "workers": workers,
+        "items": 0,  # Frames that went through the stage
+        "busy_time": 0.0,  # Seconds spent doing work
+        "wait_time": 0.0,  # Seconds spent blocked on the queues
+        "max_queue_depth": 0  # Deepest the stage's input queue got
+    }
+
+def print_pipeline_stats(stats):
+    print("Pipeline statistics:")
+    for name, stage in stats.items():
+        per_item = stage["busy_time"] / stage["items"] if stage["items"] else 0.0
+        print(f"  - {name}: workers={stage['workers']} frames={stage['items']} "
+              f"busy={stage['busy_time']:.2f}s ({per_item * 1000:.1f} ms/frame) "
+              f"waiting={stage['wait_time']:.2f}s max_queue={stage['max_queue_depth']}")
+
+def iter_video_pipeline(frame_source, make_inference_worker, batch_size=8,
+                        inference_workers=PIPELINE_INFERENCE_WORKERS,
+                        queue_size=PIPELINE_QUEUE_SIZE, stats=None, ordered=None):
+    """Run decode and inference as threaded stages and yield results in frame order.
+
+    - decode: one thread pulling (frame_count, frame) pairs from `frame_source`
+      and grouping them into batches.
+    - inference: `inference_workers` threads, each calling the callable built by
+      `make_inference_worker(worker_idx)` on a list of frames; it must return one
+      result per frame. With `ordered`, each worker then calls
+      `ordered(frames, results)` on its batch in batch order (one batch at a
+      time, while the other workers keep running the models on later
+      batches) and passes on what it returns, e.g. to track people.
+    - rules: whoever iterates this generator receives
+      (frame_count, frame, result) tuples in frame order. Closing the generator
+      stops the other stages.
+
+    Per-stage statistics are written into `stats` if a dict is given.
+    """
+    batch_size = max(1, int(batch_size))
+    inference_workers = max(1, int(inference_workers))
+    decode_queue = queue.Queue(maxsize=queue_size)
+    result_queue = queue.Queue(maxsize=queue_size)
+    stop_event = threading.Event()
+    stats_lock = threading.Lock()
+    order = threading.Condition()
+    next_ordered = [0]
+    if stats is None:
+        stats = {}
+    stats.update({
+        "decode": new_stage_stats(1),
+        "inference": new_stage_stats(inference_workers),
+        "rules": new_stage_stats(1)
+    })
+
+    def record(stage, busy=0.0, wait=0.0, items=0, depth=0):
+        with stats_lock:
+            stage_stats = stats[stage]
+            stage_stats["busy_time"] += busy
+            stage_stats["wait_time"] += wait
+            stage_stats["items"] += items
+            stage_stats["max_queue_depth"] = max(stage_stats["max_queue_depth"], depth)
+
+    def decoder():
+        seq = 0
+        try:
+            frames = iter(frame_source)
+            while not stop_event.is_set():
+                start = time.time()
+                batch = []
+                for item in frames:
+                    batch.append(item)
+                    if len(batch) == batch_size:
+                        break
+                record("decode", busy=time.time() - start, items=len(batch))
+                if not batch:
+                    break
+
+                start = time.time()
+                decode_queue.put((seq, batch))
+                record("decode", wait=time.time() - start)
+                record("inference", depth=decode_queue.qsize())
+                seq += 1
+                if len(batch) < batch_size:
+                    break
+        except Exception as e:
+            print(f"Error in decode stage: {str(e)}")
+        finally:
+            for _ in range(inference_workers):
+                decode_queue.put(_DONE)
+
+    def run_ordered(seq, batch, results):
+        with order:
+            while next_ordered[0] != seq:
+                order.wait()
+        try:
+            if results is not None and not stop_event.is_set():
+                start = time.time()
+                results = ordered([frame for _, frame in batch], results)
+                record("inference", busy=time.time() - start)
+        except Exception as e:
+            print(f"Error in ordered step on frames {batch[0][0]}-{batch[-1][0]}: {str(e)}")
+            results = None
+        finally:
+            # Every batch takes its turn, even a failed one, so later batches are never stuck
+            with order:
+                next_ordered[0] += 1
+                order.notify_all()
+        return results
+
+    def inference_worker(worker_idx):
+        try:
+            infer = make_inference_worker(worker_idx)
+        except Exception as e:
+            print(f"Error starting inference worker {worker_idx}: {str(e)}")
+            infer = None
+        while True:
+            start = time.time()
+            item = decode_queue.get()
+            record("inference", wait=time.time() - start)
+            if item is _DONE:
+                result_queue.put(_DONE)
+                break
+            seq, batch = item
+            results = None
+            if infer is not None and not stop_event.is_set():
+                start = time.time()
+                try:
+                    results = infer([frame for _, frame in batch])
+                except Exception as e:
+                    print(f"Error running inference on frames {batch[0][0]}-{batch[-1][0]}: {str(e)}")
+                record("inference", busy=time.time() - start, items=len(batch))
+            if ordered is not None:
+                results = run_ordered(seq, batch, results)
+            result_queue.put((seq, batch, results))
+            record("rules", depth=result_queue.qsize())
+
+    threads = [threading.Thread(target=decoder, name="video-decode", daemon=True)]
+    threads += [
+        threading.Thread(target=inference_worker, args=(idx,), name=f"video-inference-{idx}", daemon=True)
+        for idx in range(inference_workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    # ---- Rules stage: restore frame order and hand frames to the consumer ----
+    pending = {}
+    next_seq = 0
+    finished_workers = 0
+    try:
+        while finished_workers < inference_workers:
+            start = time.time()
+            item = result_queue.get()
+            record("rules", wait=time.time() - start)
+            if item is _DONE:
+                finished_workers += 1
+                continue
+            seq, batch, results = item
+            pending[seq] = (batch, results)
+
+            while next_seq in pending:
+                batch, results = pending.pop(next_seq)
+                next_seq += 1
+                if results is None:
+                    continue
+                for (frame_count, frame), result in zip(batch, results):
+                    start = time.time()
+                    yield frame_count, frame, result
+                    record("rules", busy=time.time() - start, items=1)
+
+                if next_seq % PIPELINE_LOG_EVERY == 0:
+                    print(f"Pipeline queues: decode->inference {decode_queue.qsize()}/{queue_size}, "
+                          f"inference->rules {result_queue.qsize()}/{queue_size}")
+    finally:
+        # Consumer finished or stopped early: let the other stages wind down
+        stop_event.set()
+        while finished_workers < inference_workers:
+            if result_queue.get() is _DONE:
+                finished_workers += 1
+        for thread in threads:
+            thread.join()
@@ -1,16 +1,21 @@
 import cv2
 import torch
-import numpy as np
-from ultralytics import YOLO
-import torchvision.models as models
-import time
-import winsound
-import mediapipe as mp
-
-# Load models
-yolo_model = YOLO("yolov8n.pt")
-gender_model = models.mobilenet_v2(pretrained=True)
-gender_model.eval()
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from person_tracker import PersonTracker
+from person_gestures import PersonLandmarker, SCREEN_OPTIONS, warm_up_landmarker
+from motion_gate import MotionGate
+from alerts import alert_dispatcher
+from gesture_engine import GestureEngine, load_gesture_rules
+from video_pipeline import iter_video_pipeline, print_pipeline_stats, PIPELINE_INFERENCE_WORKERS
+from model_registry import get_model, yolo_instance, register_warmup
+from inference_server import USE_INFERENCE_SERVER, local_client
+from person_detection import detect_persons_batch, classify_persons_batch, gender_decision
+
+# Models come from the model registry (shared with the live processor) and are
+# loaded by its warm-up or on first use; with USE_INFERENCE_SERVER they live in
+# the inference server process instead
 
 # Constants
 GENDER_LABELS = ["Male", "Female"]
@@ -18,58 +23,32 @@ ALERT_COOLDOWN = 5  # Reduced from 30 to 5 seconds
 PERSON_CONFIDENCE_THRESHOLD = 0.4  # Increased from 0.2 to 0.4 for better accuracy
 GENDER_CONFIDENCE_THRESHOLD = 0.6  # Increased from 0.1 to 0.6 for better accuracy
 FRAME_SKIP = 3  # Process every 3rd frame to speed up processing
+SAMPLE_FPS = None  # Analyze this many frames per second of video instead of using FRAME_SKIP
+SEEK_MIN_GAP = 30  # Seek instead of grabbing when skipping at least this many frames
 MAX_FRAMES = 1000  # Limit the number of frames to process
+DEFAULT_VIDEO_FPS = 30.0  # Used for detection timestamps when the container has no fps
+SHARD_WORKERS = 4  # Most processes process_video_sharded may use (also capped by the core count)
+SHARD_OVERLAP_SECONDS = 3.0  # Video each shard analyzes before its range to rebuild tracks and gesture history
+TRACK_PEOPLE = True  # Track people across frames and classify gender once per track
+MOTION_GATE = True  # Skip the models on sampled frames where nothing moved
+YOLO_BATCH_SIZE = 8  # Number of sampled frames sent to YOLO in a single call
 FACE_HEIGHT_RATIO = 0.6  # Increased from 0.4 to 0.6 for better face detection
+MIN_FACE_SIZE = 50  # Minimum face size in pixels to count towards gender totals
 
-# Mediapipe Init
-mp_holistic = mp.solutions.holistic
-holistic = mp_holistic.Holistic(
+# Holistic settings for the per-person landmarkers (see person_gestures.PersonLandmarker)
+HOLISTIC_OPTIONS = dict(
     min_detection_confidence=0.7,
     min_tracking_confidence=0.7,
     model_complexity=2,
-    enable_segmentation=True,
     static_image_mode=False  # Added for better real-time tracking
 )
+GESTURE_SCREEN = True  # Screen people with a lite pose pass and only escalate candidates to full Holistic
+register_warmup("holistic_video", lambda: warm_up_landmarker(
+    SCREEN_OPTIONS if GESTURE_SCREEN else None, **HOLISTIC_OPTIONS))
 
 # Constants for gesture detection
 GESTURE_COOLDOWN = 2.0  # Reduced from 3.0 to 2.0 seconds
-WAVE_COOLDOWN = 0.2    # Reduced from 0.3 to 0.2 seconds
-MIN_WAVE_COUNT = 2     # Reduced from 3 to 2 for faster response
-GESTURE_THRESHOLDS = {
-    'raised_hand': {
-        'y_threshold': 0.4,
-        'x_threshold': 0.2
-    },
-    'wave': {
-        'vertical': 0.25,
-        'horizontal': 0.15
-    },
-    'hand_mouth': {
-        'distance': 0.15
-    },
-    'crossed_hands': {
-        'distance': 0.2
-    },
-    'both_hands': {
-        'y_threshold': 0.4,
-        'x_threshold': 0.3
-    },
-    'help_sign': {
-        'x_threshold': 0.05
-    }
-}
-
-# Time Trackers
-last_alert_time = 0
-last_gesture_time = 0
-wave_count = 0
-last_wave_time = 0
-
-def play_alert_sound():
-    try:
-        winsound.PlaySound("SystemExclamation", winsound.SND_ALIAS)
-    except Exception as e:
-        print(f"Could not play alert sound: {e}")
+GESTURE_RULES = load_gesture_rules("video")  # Thresholds live in gesture_rules.json
 
 def show_alert(frame, message):
     cv2.rectangle(frame, (0, 0), (frame.shape[1], frame.shape[0]), (0, 0, 255), 5)
@@ -84,6 +63,15 @@ def show_alert(frame, message):
     cv2.putText(frame, text, (x, y), font, font_scale, (0, 0, 255), thickness)
     return frame
 
+def raise_alert(frame, detection, state):
+    """Draw an alert and, unless headless, hand it to the alert dispatcher
+    (sound, log, WebSocket), which never blocks the frame loop."""
+    if state["draw"]:
+        frame = show_alert(frame, detection["event"])
+    if not state["headless"]:
+        alert_dispatcher.push(state["video_path"], detection)
+    return frame
+
 def is_nighttime_from_input(user_time_str):
     try:
         hour = int(user_time_str.split(":")[0])
@@ -94,414 +82,594 @@ def is_nighttime_from_input(user_time_str):
         print(f"Error parsing time: {e}")
         return False
 
-def classify_gender(face_img):
-    try:
-        face_img = cv2.resize(face_img, (224, 224))
-        face_tensor = torch.tensor(face_img, dtype=torch.float32).permute(2, 0, 1).unsqueeze(0) / 255.0
-        
-        with torch.no_grad():
-            output = gender_model(face_tensor)
-        
-        pred_idx = output.argmax().item()
-        confidence = torch.softmax(output, dim=1)[0][pred_idx].item()
-        gender = "Female" if pred_idx % 2 == 0 else "Male"
-        
-        print(f"Gender classification: {gender} with confidence {confidence:.2f}")
-        return gender, confidence
-    except Exception as e:
-        print(f"Error in gender classification: {e}")
-        return None, 0.0
-
-def detect_sos_gesture(results):
-    global last_gesture_time, wave_count, last_wave_time
-    current_time = time.time()
-    gestures = []
-
-    def get_landmarks(landmark_type):
-        return getattr(results, landmark_type) if hasattr(results, landmark_type) else None
-
-    def detect_raised_hand(landmarks):
-        if not landmarks: return False
-        wrist = landmarks.landmark[mp_holistic.HandLandmark.WRIST]
-        middle_tip = landmarks.landmark[mp_holistic.HandLandmark.MIDDLE_FINGER_TIP]
-        # More precise check for raised hand
-        return (middle_tip.y < wrist.y and 
-                wrist.y < GESTURE_THRESHOLDS['raised_hand']['y_threshold'] and 
-                abs(middle_tip.x - wrist.x) < GESTURE_THRESHOLDS['raised_hand']['x_threshold'])
-
-    def detect_wave(hand_landmarks):
-        global last_wave_time, wave_count
-        if not hand_landmarks: return False
-        wrist = hand_landmarks.landmark[mp_holistic.HandLandmark.WRIST]
-        middle_tip = hand_landmarks.landmark[mp_holistic.HandLandmark.MIDDLE_FINGER_TIP]
-        # More precise wave detection
-        horizontal = abs(middle_tip.x - wrist.x)
-        vertical = abs(middle_tip.y - wrist.y)
-        if (vertical > GESTURE_THRESHOLDS['wave']['vertical'] and 
-            horizontal > GESTURE_THRESHOLDS['wave']['horizontal']):
-            if current_time - last_wave_time > WAVE_COOLDOWN:
-                wave_count += 1
-                last_wave_time = current_time
-                if wave_count >= MIN_WAVE_COUNT:
-                    return True
+def classify_people(frames, batch_persons, tracker=None):
+    """classify_persons_batch with the video crop settings; one tracker follows all the frames."""
+    return classify_persons_batch(frames, batch_persons, FACE_HEIGHT_RATIO,
+                                  [tracker] * len(frames) if tracker else None, MIN_FACE_SIZE)
+
+FORCED_GESTURES = [
+    {
+        "type": "Waving Hands",
+        "message": "HELP NEEDED - WAVING HANDS",
+        "description": "Person is waving hands for help"
+    },
+    {
+        "type": "Hand on Mouth",
+        "message": "DISTRESS SIGNAL - HAND ON MOUTH",
+        "description": "Person has hand on mouth indicating distress"
+    },
+    {
+        "type": "Crossed Hands",
+        "message": "DISTRESS SIGNAL - CROSSED HANDS",
+        "description": "Person has crossed hands indicating distress"
+    },
+    {
+        "type": "Raised Hand",
+        "message": "DISTRESS SIGNAL - RAISED HAND",
+        "description": "Person has raised one hand in distress"
+    },
+    {
+        "type": "Both Hands Up",
+        "message": "EMERGENCY ALERT - BOTH HANDS UP",
+        "description": "Person has raised both hands in emergency"
+    }
+]
+
+# Seconds between two alerts of the same type, measured in video time
+ALERT_COOLDOWNS = {
+    "More Men": ALERT_COOLDOWN,
+    "Lone Woman": ALERT_COOLDOWN,
+    "SOS Gesture": GESTURE_COOLDOWN
+}
+
+def passes_cooldown(detection, last_alert_times):
+    """Decide whether a candidate detection fires, updating `last_alert_times`.
+
+    Cooldowns use the detection's video timestamp rather than wall-clock time,
+    so the result does not depend on how fast (or in how many pieces) the
+    video was processed. Forced test detections always fire.
+    """
+    detection_type = detection["type"]
+    if detection.get("forced"):
+        # The forced lone woman alert also restarted the lone woman cooldown
+        if detection_type == "Lone Woman":
+            last_alert_times[detection_type] = detection["timestamp"]
+        return True
+    last_time = last_alert_times.get(detection_type)
+    if last_time is not None and detection["timestamp"] - last_time < ALERT_COOLDOWNS[detection_type]:
         return False
+    last_alert_times[detection_type] = detection["timestamp"]
+    return True
+
+def apply_cooldowns(detections):
+    """Filter an ordered list of candidate detections through the alert cooldowns."""
+    last_alert_times = {}
+    return [detection for detection in detections if passes_cooldown(detection, last_alert_times)]
+
+def collect_frame_alerts(frame, frame_count, people, state, gated=False):
+    """Return the candidate detections for one sampled frame, before cooldowns.
+
+    `people` are the classified person dicts for this frame (see
+    classify_persons_batch) and `state` carries the per-video counters and
+    statistics. A `gated` frame (no motion) carries the people of the last
+    analyzed frame: the person rules run on them, but they are not counted
+    again and the gesture models are skipped.
+    """
+    stats = state["stats"]
+    timestamp = round(frame_count / state["fps"], 3)
+    candidates = []
+
+    if len(people) > 0:
+        if not gated:
+            stats["persons_detected"] += 1
         
-    def detect_hand_on_mouth(landmarks):
-        if not landmarks: return False
-        wrist = landmarks.landmark[mp_holistic.HandLandmark.WRIST]
-        nose = landmarks.landmark[mp_holistic.PoseLandmark.NOSE]
-        # More precise distance check
-        distance = ((wrist.x - nose.x)**2 + (wrist.y - nose.y)**2)**0.5
-        return distance < GESTURE_THRESHOLDS['hand_mouth']['distance']
-        
-    def detect_crossed_hands(landmarks_left, landmarks_right):
-        if not landmarks_left or not landmarks_right: return False
-        left_wrist = landmarks_left.landmark[mp_holistic.HandLandmark.WRIST]
-        right_wrist = landmarks_right.landmark[mp_holistic.HandLandmark.WRIST]
-        # More precise distance check
-        distance = ((left_wrist.x - right_wrist.x)**2 + (left_wrist.y - right_wrist.y)**2)**0.5
-        return distance < GESTURE_THRESHOLDS['crossed_hands']['distance']
+        # Reset gender counts for this frame
+        frame_male_count = 0
+        frame_female_count = 0
         
-    def detect_both_hands_up(landmarks_left, landmarks_right):
-        if not landmarks_left or not landmarks_right: return False
-        left_wrist = landmarks_left.landmark[mp_holistic.HandLandmark.WRIST]
-        right_wrist = landmarks_right.landmark[mp_holistic.HandLandmark.WRIST]
-        # More precise check for both hands up
-        return (left_wrist.y < GESTURE_THRESHOLDS['both_hands']['y_threshold'] and 
-                right_wrist.y < GESTURE_THRESHOLDS['both_hands']['y_threshold'] and 
-                abs(left_wrist.x - right_wrist.x) < GESTURE_THRESHOLDS['both_hands']['x_threshold'])
+        # Count the genders classified for this frame
+        for person in people:
+            if not person["counted"]:
+                continue
+            # Only count high confidence detections
+            gender = gender_decision(person["gender"], person["confidence"], GENDER_CONFIDENCE_THRESHOLD)
+            
+            # Track gender classification
+            if gender:
+                if gender == "Male":
+                    frame_male_count += 1
+                elif gender == "Female":
+                    frame_female_count += 1
+                # People on a gated frame were already counted on their own frame
+                if not gated:
+                    stats["gender_classifications"][gender] += 1
+                    state["male_count"] += gender == "Male"
+                    state["female_count"] += gender == "Female"
+            elif not gated:
+                stats["gender_classifications"]["Unknown"] += 1
         
-    def detect_help_sign(landmarks):
-        if not landmarks: return False
-        thumb_tip = landmarks.landmark[mp_holistic.HandLandmark.THUMB_TIP]
-        thumb_ip = landmarks.landmark[mp_holistic.HandLandmark.THUMB_IP]
-        # More precise check for help sign
-        return (thumb_tip.y < thumb_ip.y and 
-                abs(thumb_tip.x - thumb_ip.x) < GESTURE_THRESHOLDS['help_sign']['x_threshold'])
-
-    # Initialize wave tracking
-    if 'last_wave_time' not in globals():
-        global last_wave_time
-        last_wave_time = current_time
-    if 'wave_count' not in globals():
-        global wave_count
-        wave_count = 0
-
-    # Check for waving gesture with reduced cooldown
-    if detect_wave(results.right_hand_landmarks) or detect_wave(results.left_hand_landmarks):
-        if current_time - last_gesture_time > GESTURE_COOLDOWN:
-            gestures.append({
-                "type": "Waving Hands",
-                "message": "HELP NEEDED - WAVING HANDS",
-                "description": "Person is waving hands for help"
-            })
-            last_gesture_time = current_time
-            wave_count = 0
-
-    # Check for hand on mouth gesture
-    if results.pose_landmarks and (detect_hand_on_mouth(results.right_hand_landmarks) or detect_hand_on_mouth(results.left_hand_landmarks)):
-        if current_time - last_gesture_time > GESTURE_COOLDOWN:
-            gestures.append({
-                "type": "Hand on Mouth",
-                "message": "DISTRESS SIGNAL - HAND ON MOUTH",
-                "description": "Person has hand on mouth indicating distress"
-            })
-            last_gesture_time = current_time
-
-    # Check for crossed hands gesture
-    if detect_crossed_hands(results.left_hand_landmarks, results.right_hand_landmarks):
-        if current_time - last_gesture_time > GESTURE_COOLDOWN:
-            gestures.append({
-                "type": "Crossed Hands",
-                "message": "DISTRESS SIGNAL - CROSSED HANDS",
-                "description": "Person has crossed hands indicating distress"
-            })
-            last_gesture_time = current_time
-
-    # Check for raised hand gesture
-    if detect_raised_hand(results.left_hand_landmarks) or detect_raised_hand(results.right_hand_landmarks):
-        if current_time - last_gesture_time > GESTURE_COOLDOWN:
-            gestures.append({
-                "type": "Raised Hand",
-                "message": "DISTRESS SIGNAL - RAISED HAND",
-                "description": "Person has raised one hand in distress"
+        # Check if more men than women in this frame
+        if frame_male_count > frame_female_count and frame_male_count > 0:
+            candidates.append({
+                "frame": frame_count, 
+                "timestamp": timestamp,
+                "event": f"MORE MEN THAN WOMEN DETECTED ({frame_male_count} men, {frame_female_count} women)",
+                "type": "More Men",
+                "male_count": frame_male_count,
+                "female_count": frame_female_count
             })
-            last_gesture_time = current_time
-
-    # Check for both hands up gesture
-    if detect_both_hands_up(results.left_hand_landmarks, results.right_hand_landmarks):
-        if current_time - last_gesture_time > GESTURE_COOLDOWN:
-            gestures.append({
-                "type": "Both Hands Up",
-                "message": "EMERGENCY ALERT - BOTH HANDS UP",
-                "description": "Person has raised both hands in emergency"
+        
+        # Lone woman detection
+        if len(people) == 1:
+            print(f"Single person detected in frame {frame_count}")
+            # Reuse the classification made above instead of cropping again
+            if people[0]["classified"]:
+                gender, confidence = people[0]["gender"], people[0]["confidence"]
+                
+                # Force detection for testing - regardless of gender
+                if frame_count % 30 == 0:  # Every 30 frames, force a detection
+                    candidates.append({
+                        "frame": frame_count, 
+                        "timestamp": timestamp,
+                        "event": "LONE WOMAN DETECTED AT NIGHT (TEST)",
+                        "type": "Lone Woman",
+                        "forced": True
+                    })
+                
+                # Normal detection logic - modified to accept any gender for testing
+                elif confidence > GENDER_CONFIDENCE_THRESHOLD and state["nighttime"]:
+                    candidates.append({
+                        "frame": frame_count, 
+                        "timestamp": timestamp,
+                        "event": f"PERSON DETECTED AT NIGHT ({gender})",
+                        "type": "Lone Woman"
+                    })
+
+    # ---- MediaPipe: SOS Gesture Detection on each person ----
+    # Only process every 3rd frame for MediaPipe to save time
+    if frame_count % 3 == 0:
+        # Nothing moved on a gated frame, so there is no new gesture to look for
+        landmarked = [] if gated else state["landmarker"].process(frame, people)
+        
+        # Force SOS detection for testing - with specific gesture types
+        if frame_count % 45 == 0:  # Every 45 frames, force a detection
+            # Rotate through different gesture types for testing
+            gesture = FORCED_GESTURES[frame_count % len(FORCED_GESTURES)]
+            candidates.append({
+                "frame": frame_count, 
+                "timestamp": timestamp,
+                "event": gesture["message"],
+                "type": "SOS Gesture",
+                "gesture_type": gesture["type"],
+                "gesture_description": gesture["description"],
+                "forced": True
             })
-            last_gesture_time = current_time
+        
+        # Normal gesture detection, tied to the person who made the gesture
+        for person, results_mediapipe in landmarked:
+            # Cooldowns are applied afterwards on video time (see passes_cooldown)
+            for gesture in state["gesture_engine"].update(person["track_id"], results_mediapipe, timestamp):
+                candidates.append({
+                    "frame": frame_count, 
+                    "timestamp": timestamp,
+                    "event": gesture["message"],
+                    "type": "SOS Gesture",
+                    "gesture_type": gesture["type"],
+                    "gesture_description": gesture["description"],
+                    "person_box": list(person["box"]),
+                    "track_id": person["track_id"]
+                })
+
+    return candidates
+
+def record_detection(frame, detection, state):
+    """Count a detection that passed its cooldown and raise the alert for it."""
+    stats = state["stats"]
+    frame = raise_alert(frame, detection, state)
+    if detection["type"] == "More Men":
+        stats["more_men_detections"] += 1
+    elif detection["type"] == "SOS Gesture":
+        stats["sos_detections"] += 1
+    elif detection.get("forced"):
+        stats["forced_detections"] += 1
+    prefix = "Forced detection" if detection.get("forced") else f"{detection['type']} detected"
+    print(f"{prefix} at frame {detection['frame']} ({detection['timestamp']:.2f}s): {detection['event']}")
+    return frame
+
+def analyze_frame(frame, frame_count, people, state, gated=False):
+    """Apply the gender, lone woman and SOS gesture rules to one sampled frame.
+
+    Candidates go through the alert cooldowns unless `state["apply_cooldowns"]`
+    is off (sharded runs filter the merged list instead).
+    Returns the (possibly annotated) frame and the detections that fired.
+    """
+    detections = []
+    for detection in collect_frame_alerts(frame, frame_count, people, state, gated):
+        if state["apply_cooldowns"] and not passes_cooldown(detection, state["last_alert_times"]):
+            continue
+        frame = record_detection(frame, detection, state)
+        detections.append(detection)
+    return frame, detections
+
+def make_inference_worker(worker_idx, classify=True):
+    """Build the batch callable used by one pipeline inference worker.
+
+    It runs YOLO and, with `classify`, the batched gender model. Ultralytics
+    predictors keep state between calls, so every worker after the first gets
+    its own YOLO predictor over the shared weights; the gender model is shared
+    read-only. With the inference server each worker thread uses its own client.
+    """
+    if USE_INFERENCE_SERVER:
+        model = local_client()
+    else:
+        model = get_model("yolo") if worker_idx == 0 else yolo_instance()
+
+    def infer(frames):
+        # Gated frames skip the models; the rules stage reuses the last result for them
+        moving = [frame for frame in frames if not isinstance(frame, GatedFrame)]
+        batch_persons = detect_persons_batch(moving, model, PERSON_CONFIDENCE_THRESHOLD, verbose=True)
+        if classify:
+            batch_persons = classify_people(moving, batch_persons)
+        results = iter(batch_persons)
+        return [None if isinstance(frame, GatedFrame) else next(results) for frame in frames]
+
+    return infer
+
+def track_persons_batch(frames, batch_persons, tracker):
+    """classify_people with tracking for a pipeline batch; gated frames keep a None result."""
+    moving = [(frame, persons) for frame, persons in zip(frames, batch_persons)
+              if not isinstance(frame, GatedFrame)]
+    people = iter(classify_people([frame for frame, _ in moving],
+                                         [persons for _, persons in moving], tracker))
+    return [None if isinstance(frame, GatedFrame) else next(people) for frame in frames]
+
+def sampling_stride(cap, sample_fps=None):
+    """Return how many frames to advance between analyzed frames.
+
+    With `sample_fps` the stride follows the video's own frame rate, so a 60 fps
+    and a 15 fps upload cost about the same per second of footage.
+    """
+    if not sample_fps:
+        return FRAME_SKIP
+    video_fps = cap.get(cv2.CAP_PROP_FPS)
+    if not video_fps or video_fps <= 0:
+        print(f"Unknown video fps, falling back to FRAME_SKIP={FRAME_SKIP}")
+        return FRAME_SKIP
+    return max(1, int(round(video_fps / float(sample_fps))))
+
+def iter_sampled_frames(cap, max_frames_to_process, total_frames, stats, stride=FRAME_SKIP,
+                        start_frame=0, end_frame=None):
+    """Yield (frame_count, frame) for every `stride`-th frame of the capture.
+
+    Frames in between are only grabbed, which skips the color conversion and
+    copy into a numpy array, and gaps of SEEK_MIN_GAP frames or more are
+    crossed with a seek so the decoder restarts from the nearest keyframe.
+    Only frames numbered in (start_frame, end_frame] are read.
+    """
+    frame_count = start_frame
+    processed_frames = 0
+    if start_frame > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    while cap.isOpened() and processed_frames < max_frames_to_process:
+        # frame_count is 1-based, so the next sampled frame is the next multiple of stride
+        next_frame = (frame_count // stride + 1) * stride
+        if end_frame is not None and next_frame > end_frame:
+            break
+        gap = next_frame - frame_count - 1
+        if gap >= SEEK_MIN_GAP:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, next_frame - 1)
+            frame_count = next_frame - 1
+        else:
+            for _ in range(gap):
+                if not cap.grab():
+                    return
+                frame_count += 1
+
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame_count += 1
             
-    # Check for help sign (thumb up)
-    if (results.right_hand_landmarks and detect_help_sign(results.right_hand_landmarks)) or \
-       (results.left_hand_landmarks and detect_help_sign(results.left_hand_landmarks)):
-        if current_time - last_gesture_time > GESTURE_COOLDOWN:
-            gestures.append({
-                "type": "Help Sign",
-                "message": "HELP SIGNAL - THUMB UP",
-                "description": "Person is showing thumb up for help"
-            })
-            last_gesture_time = current_time
+        processed_frames += 1
+        stats["frames_processed"] += 1
+        
+        if processed_frames % 10 == 0:
+            print(f"Processing frame {processed_frames}/{max_frames_to_process} ({frame_count}/{total_frames})")
+        yield frame_count, frame
+
+class GatedFrame:
+    """A sampled frame the motion gate kept from the models."""
+    __slots__ = ("frame",)
+
+    def __init__(self, frame):
+        self.frame = frame
+
+def iter_motion_frames(frames, gate):
+    """Pass on every (frame_count, frame) pair, wrapping the frames the gate holds back in GatedFrame."""
+    for frame_count, frame in frames:
+        yield frame_count, frame if gate.check(frame) else GatedFrame(frame)
+
+def iter_video_detections(video_path, time_str, batch_size=YOLO_BATCH_SIZE,
+                          inference_workers=PIPELINE_INFERENCE_WORKERS, sample_fps=SAMPLE_FPS,
+                          headless=False, draw=None, progress_callback=None, should_stop=None,
+                          max_frames=MAX_FRAMES, start_frame=0, end_frame=None, apply_cooldowns=True,
+                          track_people=TRACK_PEOPLE, motion_gate=MOTION_GATE, raise_errors=False):
+    """Analyze a video file and yield each detection as soon as it is produced.
+
+    Every detection carries its `frame` number and video `timestamp` (seconds).
+    Nothing is accumulated here, so memory stays flat however long the video is;
+    closing the generator stops decoding and inference.
+
+    With `headless=True` no window is opened, no sound is played and frames are
+    not annotated (unless `draw=True` is passed explicitly), so server-side runs
+    only pay for decoding and inference.
 
-    return gestures
+    `progress_callback(frames_done, frames_total, new_detections)` is called
+    after every analyzed frame and `should_stop()` is polled at the same point;
+    returning True ends the run early.
 
-def process_video_combined(video_path, time_str):
-    global last_alert_time, wave_count, last_wave_time
+    `start_frame`/`end_frame` restrict the run to part of the video and
+    `max_frames=None` lifts the MAX_FRAMES cap; process_video_sharded uses
+    these together with `apply_cooldowns=False` to analyze pieces in parallel.
+
+    With `track_people` every person gets a track ID and their gender is
+    classified once per track (re-checked every GENDER_RECHECK_UPDATES
+    frames). Tracking runs in the inference workers one batch at a time in
+    frame order, and the crops of all new or due tracks in a batch go to the
+    gender model in one call.
+
+    With `motion_gate` sampled frames in which nothing moved skip YOLO, the
+    gender model and the gesture models (see motion_gate.MotionGate); the
+    person rules still run on them with the people of the last analyzed
+    frame, without counting those people again.
+
+    Errors that end the run (a video that cannot be opened, a failing
+    pipeline) are printed and end the detections early; with `raise_errors`
+    they are raised to the caller instead, so background jobs can report them.
+    """
+    cap = None
+    pipeline = None
+    state = None
     try:
-        # Initialize wave_count and last_wave_time if not already set
-        if 'wave_count' not in globals():
-            wave_count = 0
-        if 'last_wave_time' not in globals():
-            last_wave_time = time.time()
-            
         nighttime = is_nighttime_from_input(time_str)
         print(f"Processing video: {video_path}, nighttime: {nighttime}")
         
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             print(f"Error: Could not open video file {video_path}")
-            return []
+            if raise_errors:
+                raise IOError(f"Could not open video file {video_path}")
+            return
 
-        detections = []
-        frame_count = 0
-        processed_frames = 0
+        batch_size = max(1, int(batch_size))
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        print(f"Total frames in video: {total_frames}")
+        video_fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        if video_fps <= 0:
+            video_fps = DEFAULT_VIDEO_FPS
+        print(f"Total frames in video: {total_frames} at {video_fps:.2f} fps")
         
-        # Track detection statistics
-        stats = {
-            "frames_processed": 0,
-            "persons_detected": 0,
-            "gender_classifications": {"Male": 0, "Female": 0, "Unknown": 0},
-            "forced_detections": 0,
-            "sos_detections": 0,
-            "more_men_detections": 0
+        # Per-video state shared by analyze_frame across batches
+        state = {
+            "video_path": video_path,
+            "nighttime": nighttime,
+            "headless": headless,
+            "draw": (not headless) if draw is None else draw,
+            "fps": video_fps,
+            "tracker": PersonTracker() if track_people else None,
+            "landmarker": PersonLandmarker(screen_options=SCREEN_OPTIONS if GESTURE_SCREEN else None,
+                                           **HOLISTIC_OPTIONS),
+            "gesture_engine": GestureEngine(GESTURE_RULES),
+            "detection_count": 0,
+            "frames_analyzed": 0,
+            # Alert cooldowns, keyed by detection type, in video seconds
+            "apply_cooldowns": apply_cooldowns,
+            "last_alert_times": {},
+            # Track gender counts for more men detection
+            "male_count": 0,
+            "female_count": 0,
+            # Track detection statistics
+            "stats": {
+                "frames_processed": 0,
+                "persons_detected": 0,
+                "gender_classifications": {"Male": 0, "Female": 0, "Unknown": 0},
+                "forced_detections": 0,
+                "sos_detections": 0,
+                "more_men_detections": 0
+            }
         }
+        stats = state["stats"]
 
         # Create a window for displaying frames
-        cv2.namedWindow("Detection", cv2.WINDOW_NORMAL)
-        
-        # Track gender counts for more men detection
-        male_count = 0
-        female_count = 0
-        last_more_men_alert_time = 0
+        if not headless:
+            cv2.namedWindow("Detection", cv2.WINDOW_NORMAL)
         
         # Performance optimization: Process only a subset of frames
-        max_frames_to_process = min(total_frames, MAX_FRAMES)
-        print(f"Will process up to {max_frames_to_process} frames for performance")
+        end_frame = total_frames if end_frame is None else min(end_frame, total_frames)
+        max_frames_to_process = end_frame - start_frame if max_frames is None else min(end_frame - start_frame, max_frames)
+        print(f"Will process up to {max_frames_to_process} frames (frames {start_frame + 1}-{end_frame})")
+        stride = sampling_stride(cap, sample_fps)
+        print(f"Analyzing every {stride} frame(s) (sample_fps={sample_fps})")
+        print(f"Running YOLO on batches of up to {batch_size} frames with {inference_workers} inference worker(s)")
+        expected_frames = min(end_frame // stride - start_frame // stride, max_frames_to_process)
+
+        # Decode and YOLO + gender run as threaded stages; the alert rules run here
+        frame_source = iter_sampled_frames(cap, max_frames_to_process, total_frames, stats, stride,
+                                           start_frame=start_frame, end_frame=end_frame)
+        gate = MotionGate() if motion_gate else None
+        if gate:
+            # Gated in the decode stage, so static frames never reach the models
+            # but still reach the rules in frame order
+            frame_source = iter_motion_frames(frame_source, gate)
+        pipeline_stats = {}
+        tracker = state["tracker"]
+        pipeline = iter_video_pipeline(
+            frame_source, lambda worker_idx: make_inference_worker(worker_idx, classify=tracker is None),
+            batch_size, inference_workers, stats=pipeline_stats,
+            # Tracking needs frames in order, so it runs as the pipeline's ordered step
+            ordered=(lambda frames, results: track_persons_batch(frames, results, tracker)) if tracker else None
+        )
         
-        while cap.isOpened() and processed_frames < max_frames_to_process:
+        last_people = []
+        for frame_count, frame, result in pipeline:
             try:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                    
-                frame_count += 1
-                
-                # Skip frames to speed up processing
-                if frame_count % FRAME_SKIP != 0:
-                    continue
-                    
-                processed_frames += 1
-                stats["frames_processed"] += 1
-                
-                if processed_frames % 10 == 0:
-                    print(f"Processing frame {processed_frames}/{max_frames_to_process} ({frame_count}/{total_frames})")
-
-                # ---- YOLO: Person Detection ----
-                results = yolo_model(frame)
-                persons = []
-                for result in results:
-                    for box in result.boxes:
-                        cls = int(box.cls[0])
-                        conf = float(box.conf[0])
-                        if cls == 0 and conf > PERSON_CONFIDENCE_THRESHOLD:
-                            x1, y1, x2, y2 = map(int, box.xyxy[0])
-                            persons.append((x1, y1, x2, y2))
-                            print(f"Person detected with confidence {conf:.2f}")
-
-                if len(persons) > 0:
-                    stats["persons_detected"] += 1
-                    
-                    # Reset gender counts for this frame
-                    frame_male_count = 0
-                    frame_female_count = 0
-                    
-                    # Classify gender for each person
-                    for x1, y1, x2, y2 in persons:
-                        face_height = int((y2 - y1) * FACE_HEIGHT_RATIO)
-                        face_img = frame[y1:y1+face_height, x1:x2]
-                        if face_img.size > 0:
-                            # Add face size check
-                            min_face_size = 50  # Minimum face size in pixels
-                            if face_img.shape[0] >= min_face_size and face_img.shape[1] >= min_face_size:
-                                gender, confidence = classify_gender(face_img)
-                                
-                                # Track gender classification
-                                if gender and confidence > GENDER_CONFIDENCE_THRESHOLD:  # Only count high confidence detections
-                                    stats["gender_classifications"][gender] += 1
-                                    if gender == "Male":
-                                        frame_male_count += 1
-                                        male_count += 1
-                                    elif gender == "Female":
-                                        frame_female_count += 1
-                                        female_count += 1
-                                else:
-                                    stats["gender_classifications"]["Unknown"] += 1
-                    
-                    # Check if more men than women in this frame
-                    current_time = time.time()
-                    if frame_male_count > frame_female_count and frame_male_count > 0:
-                        if current_time - last_more_men_alert_time > ALERT_COOLDOWN:
-                            alert_msg = f"MORE MEN THAN WOMEN DETECTED ({frame_male_count} men, {frame_female_count} women)"
-                            frame = show_alert(frame, alert_msg)
-                            play_alert_sound()
-                            detections.append({
-                                "frame": frame_count, 
-                                "event": alert_msg,
-                                "type": "More Men",
-                                "male_count": frame_male_count,
-                                "female_count": frame_female_count
-                            })
-                            last_more_men_alert_time = current_time
-                            stats["more_men_detections"] += 1
-                            print(f"More men detected at frame {frame_count}: {frame_male_count} men, {frame_female_count} women")
-                    
-                    # Lone woman detection
-                    if len(persons) == 1:
-                        print(f"Single person detected in frame {frame_count}")
-                        x1, y1, x2, y2 = persons[0]
-                        face_height = int((y2 - y1) * 0.4)
-                        face_img = frame[y1:y1+face_height, x1:x2]
-                        if face_img.size > 0:
-                            gender, confidence = classify_gender(face_img)
-                            current_time = time.time()
-                            
-                            # Force detection for testing - regardless of gender
-                            if frame_count % 30 == 0:  # Every 30 frames, force a detection
-                                alert_msg = "LONE WOMAN DETECTED AT NIGHT (TEST)"
-                                frame = show_alert(frame, alert_msg)
-                                play_alert_sound()
-                                detections.append({
-                                    "frame": frame_count, 
-                                    "event": alert_msg,
-                                    "type": "Lone Woman"
-                                })
-                                last_alert_time = current_time
-                                stats["forced_detections"] += 1
-                                print(f"Forced detection at frame {frame_count}")
-                            
-                            # Normal detection logic - modified to accept any gender for testing
-                            elif (confidence > GENDER_CONFIDENCE_THRESHOLD and nighttime and 
-                                  (current_time - last_alert_time >= ALERT_COOLDOWN)):
-                                alert_msg = f"PERSON DETECTED AT NIGHT ({gender})"
-                                frame = show_alert(frame, alert_msg)
-                                play_alert_sound()
-                                detections.append({
-                                    "frame": frame_count, 
-                                    "event": alert_msg,
-                                    "type": "Lone Woman"
-                                })
-                                last_alert_time = current_time
-                                print(f"Person detected at frame {frame_count}: {gender} with confidence {confidence}")
-
-                # ---- MediaPipe: SOS Gesture Detection ----
-                # Only process every 3rd frame for MediaPipe to save time
-                if frame_count % 3 == 0:
-                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    results_mediapipe = holistic.process(rgb_frame)
-                    gestures = detect_sos_gesture(results_mediapipe)
-                    
-                    # Force SOS detection for testing - with specific gesture types
-                    if frame_count % 45 == 0:  # Every 45 frames, force a detection
-                        # Rotate through different gesture types for testing
-                        gesture_types = [
-                            {
-                                "type": "Waving Hands",
-                                "message": "HELP NEEDED - WAVING HANDS",
-                                "description": "Person is waving hands for help"
-                            },
-                            {
-                                "type": "Hand on Mouth",
-                                "message": "DISTRESS SIGNAL - HAND ON MOUTH",
-                                "description": "Person has hand on mouth indicating distress"
-                            },
-                            {
-                                "type": "Crossed Hands",
-                                "message": "DISTRESS SIGNAL - CROSSED HANDS",
-                                "description": "Person has crossed hands indicating distress"
-                            },
-                            {
-                                "type": "Raised Hand",
-                                "message": "DISTRESS SIGNAL - RAISED HAND",
-                                "description": "Person has raised one hand in distress"
-                            },
-                            {
-                                "type": "Both Hands Up",
-                                "message": "EMERGENCY ALERT - BOTH HANDS UP",
-                                "description": "Person has raised both hands in emergency"
-                            }
-                        ]
-                        gesture = gesture_types[frame_count % len(gesture_types)]
-                        frame = show_alert(frame, gesture["message"])
-                        play_alert_sound()
-                        detections.append({
-                            "frame": frame_count, 
-                            "event": gesture["message"],
-                            "type": "SOS Gesture",
-                            "gesture_type": gesture["type"],
-                            "gesture_description": gesture["description"]
-                        })
-                        stats["sos_detections"] += 1
-                        print(f"Forced SOS detection at frame {frame_count}: {gesture['type']}")
-                    
-                    # Normal gesture detection
-                    for gesture in gestures:
-                        frame = show_alert(frame, gesture["message"])
-                        play_alert_sound()
-                        detections.append({
-                            "frame": frame_count, 
-                            "event": gesture["message"],
-                            "type": "SOS Gesture",
-                            "gesture_type": gesture["type"],
-                            "gesture_description": gesture["description"]
-                        })
-                        stats["sos_detections"] += 1
-                        print(f"SOS gesture detected at frame {frame_count}: {gesture['type']} - {gesture['description']}")
+                gated = isinstance(frame, GatedFrame)
+                if gated:
+                    # Nothing moved since the last analyzed frame, so neither did its people
+                    frame, people = frame.frame, last_people
+                else:
+                    people = last_people = result
+                frame, frame_detections = analyze_frame(frame, frame_count, people, state, gated)
+            except Exception as e:
+                print(f"Error processing frame {frame_count}: {str(e)}")
+                # Continue to next frame instead of breaking the entire process
+                continue
+
+            state["frames_analyzed"] += 1
+            state["detection_count"] += len(frame_detections)
+            if progress_callback:
+                progress_callback(min(state["frames_analyzed"], expected_frames), expected_frames, frame_detections)
+            for detection in frame_detections:
+                yield detection
 
+            if should_stop and should_stop():
+                print(f"Stop requested at frame {frame_count}")
+                break
+            if not headless:
                 # Display the frame
                 cv2.imshow("Detection", frame)
                 
-                # Break if 'q' is pressed
+                # Stop if 'q' is pressed
                 if cv2.waitKey(1) & 0xFF == ord('q'):
                     break
-            except Exception as e:
-                print(f"Error processing frame {frame_count}: {str(e)}")
-                # Continue to next frame instead of breaking the entire process
-                continue
 
-        cap.release()
-        cv2.destroyAllWindows()
-        print(f"Video processing complete. Found {len(detections)} detections")
-        print(f"Processing statistics:")
+        print(f"Video processing complete. Found {state['detection_count']} detections")
+        print("Processing statistics:")
         print(f"  - Frames processed: {stats['frames_processed']}/{total_frames}")
         print(f"  - Persons detected: {stats['persons_detected']}")
         print(f"  - Gender classifications: {stats['gender_classifications']}")
         print(f"  - Forced detections: {stats['forced_detections']}")
         print(f"  - SOS detections: {stats['sos_detections']}")
         print(f"  - More men detections: {stats['more_men_detections']}")
-        print(f"  - Total male count: {male_count}")
-        print(f"  - Total female count: {female_count}")
+        print(f"  - Total male count: {state['male_count']}")
+        print(f"  - Total female count: {state['female_count']}")
+        if tracker:
+            print(f"  - Person tracks: {tracker.next_id - 1}, gender classifications: "
+                  f"{tracker.classifications}, reused from tracks: {tracker.cache_hits}")
+        if gate:
+            print(f"  - Motion gate: {gate.frames_gated}/{gate.frames_seen} sampled frames kept from the models as static")
+        landmarker = state["landmarker"]
+        print(f"  - Gesture checks: {landmarker.crops_processed} person crops, "
+              f"{landmarker.frames_skipped} frames without people skipped")
+        if landmarker.screen_options is not None:
+            print(f"  - Gesture screen: {landmarker.crops_screened} crops screened, "
+                  f"{landmarker.escalations} escalated to full Holistic")
+        print_pipeline_stats(pipeline_stats)
+    except Exception as e:
+        import traceback
+        error_details = traceback.format_exc()
+        print(f"Error in iter_video_detections: {error_details}")
+        if raise_errors:
+            raise
+    finally:
+        # Also runs when the consumer closes the generator early
+        if pipeline is not None:
+            pipeline.close()
+        if cap is not None:
+            cap.release()
+        if state is not None:
+            state["landmarker"].close()
+        if not headless:
+            cv2.destroyAllWindows()
+
+def process_video_combined(video_path, time_str, **options):
+    """Analyze a video file and return all of its detection records.
+
+    Accepts the same options as iter_video_detections.
+    """
+    return list(iter_video_detections(video_path, time_str, **options))
+
+def _init_shard_worker(torch_threads):
+    # Split the cores between shard processes instead of oversubscribing them
+    import inference_backend
+    torch.set_num_threads(torch_threads)
+    inference_backend.INTRA_OP_THREADS = max(1, torch_threads // inference_backend.INFERENCE_CALLERS)
+
+def process_video_shard(video_path, time_str, start_frame, end_frame, options, warmup_start=None):
+    """Worker-process entry point: raw (pre-cooldown) detections for one frame range.
+
+    Analysis starts at `warmup_start` so tracks, motion background and gesture
+    histories are built up by the time the range begins; detections from the
+    warm-up frames belong to the previous shard and are dropped.
+    """
+    warmup_start = start_frame if warmup_start is None else warmup_start
+    print(f"Shard frames {start_frame + 1}-{end_frame} of {video_path} starting")
+    detections = process_video_combined(
+        video_path, time_str, headless=True, max_frames=None,
+        start_frame=warmup_start, end_frame=end_frame, apply_cooldowns=False,
+        **options
+    )
+    return [detection for detection in detections if detection["frame"] > start_frame]
+
+def process_video_sharded(video_path, time_str, workers=SHARD_WORKERS, shards=None, **options):
+    """Analyze a whole video by splitting it into time ranges processed in parallel.
+
+    Each worker process loads its own models and analyzes one range of frames
+    without applying cooldowns; the candidates are then merged in frame order
+    and the alert cooldowns are applied once over the whole video, so
+    cooldowns work across shard boundaries as in a single pass. Tracks, the
+    motion gate and gesture histories are per process, though: each shard
+    starts SHARD_OVERLAP_SECONDS early to rebuild them, which covers the
+    gesture window, but track IDs and gender votes near a boundary can still
+    differ from a single pass. `workers` is capped by SHARD_WORKERS and the
+    core count, since every process loads its own models. There is no
+    MAX_FRAMES cap in this mode. `options` are passed to
+    process_video_combined (e.g. batch_size, sample_fps).
+    """
+    try:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            print(f"Error: Could not open video file {video_path}")
+            return []
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        video_fps = cap.get(cv2.CAP_PROP_FPS) or DEFAULT_VIDEO_FPS
+        stride = sampling_stride(cap, options.get("sample_fps"))
+        cap.release()
+
+        # Every worker loads YOLO, the gender model and MediaPipe, so never start more than the host can hold
+        workers = max(1, min(int(workers), SHARD_WORKERS, os.cpu_count() or 1))
+        shards = max(1, int(shards or workers))
+        overlap = int(SHARD_OVERLAP_SECONDS * video_fps)
+        # Shard boundaries fall on sampled frames so numbering matches a single pass
+        shard_length = -(-total_frames // shards)
+        shard_length = max(stride, -(-shard_length // stride) * stride)
+        ranges = [(start, min(start + shard_length, total_frames))
+                  for start in range(0, total_frames, shard_length)]
+        print(f"Sharding {video_path}: {total_frames} frames into {len(ranges)} shard(s) "
+              f"of ~{shard_length / video_fps:.1f}s on {workers} process(es)")
+
+        torch_threads = max(1, (os.cpu_count() or 1) // workers)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_shard_worker, initargs=(torch_threads,)) as executor:
+            futures = [
+                executor.submit(process_video_shard, video_path, time_str, start, end, options,
+                                # Warm-up starts on a sampled frame so numbering matches a single pass
+                                max(0, (start - overlap) // stride * stride))
+                for start, end in ranges
+            ]
+            candidates = []
+            for (start, end), future in zip(ranges, futures):
+                shard_detections = future.result()
+                print(f"Shard frames {start + 1}-{end} returned {len(shard_detections)} candidate(s)")
+                candidates.extend(shard_detections)
+
+        candidates.sort(key=lambda detection: detection["frame"])
+        detections = apply_cooldowns(candidates)
+        print(f"Sharded processing complete. Found {len(detections)} detections "
+              f"({len(candidates)} before cooldowns)")
         return detections
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
-        print(f"Error in process_video_combined: {error_details}")
-        # Return empty detections instead of raising an exception
+        print(f"Error in process_video_sharded: {error_details}")
         return []